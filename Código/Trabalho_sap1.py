@@ -1,54 +1,44 @@
-import tkinter as tk
-from tkinter import ttk, messagebox
+import collections
+import os
 import time
-import re
-
-CAPACIDADE_MEMORIA = 16
-
-class NucleoSAP1:
-    def __init__(self):
-        self.registradores = {
-            "ContadorPrograma": 0,
-            "Acumulador": 0,
-            "RegistradorEndereco": 0,
-            "RegistradorInstrucao": 0,
-            "RegistradorB": 0,
-            "RegistradorSaida": 0,
-            "Flags": {"Zero": 0, "Carry": 0}
-        }
-        self.memoria_principal = [0] * CAPACIDADE_MEMORIA
-
-        self.conjunto_instrucoes = {
-            0b0000: ("CAR", self._executar_car),
-            0b0001: ("SOM", self._executar_som),
-            0b0010: ("SUB", self._executar_sub),
-            0b1110: ("SAI", self._executar_sai),
-            0b1111: ("PAR", self._executar_par)
-        }
-
-    def _executar_car(self, operando):
-        self.registradores['RegistradorEndereco'] = operando
-        self.registradores['Acumulador'] = self.memoria_principal[self.registradores['RegistradorEndereco']]
-        return False
-
-    def _executar_som(self, operando):
-        self.registradores['RegistradorEndereco'] = operando
-        self.registradores['RegistradorB'] = self.memoria_principal[self.registradores['RegistradorEndereco']]
-        self.registradores['Acumulador'] = (self.registradores['Acumulador'] + self.registradores['RegistradorB']) & 0xFF
-        return False
-
-    def _executar_sub(self, operando):
-        self.registradores['RegistradorEndereco'] = operando
-        self.registradores['RegistradorB'] = self.memoria_principal[self.registradores['RegistradorEndereco']]
-        self.registradores['Acumulador'] = (self.registradores['Acumulador'] - self.registradores['RegistradorB']) & 0xFF
-        return False
-
-    def _executar_sai(self, _):
-        self.registradores['RegistradorSaida'] = self.registradores['Acumulador']
-        return False
-
-    def _executar_par(self, _):
-        return True
+import tkinter as tk
+from tkinter import ttk, messagebox, filedialog
+
+from nucleo_sap1 import (NucleoSAP1, LARGURA_ENDERECO_PADRAO, LARGURA_ENDERECO_MAXIMA, INSTRUCOES_SEM_OPERANDO,
+                         PARADA_PAR, PARADA_FIM_MEMORIA, PARADA_OPCODE_INVALIDO, PARADA_LACO_INFINITO,
+                         PARADA_LIMITE_PASSOS, FASE_EXECUCAO)
+from montador import MontadorIncremental, aplicar_memoria, desmontar
+from imagens import carregar_imagem, salvar_imagem, largura_da_imagem, EXTENSOES_INTEL_HEX
+from expressao import compilar_expressao
+from renderizador import RenderizadorCPU
+from agendador import AgendadorAnimacao
+from rastro import RastroExecucao, LeitorRastro, NOMES_FASES
+from historico import HistoricoExecucao
+from perfilador import PerfiladorSAP1
+from microcodigo import (SequenciadorSAP1, decodificar_palavra, sinais_ativos, rom_do_nucleo, FONTE_NENHUMA,
+                         FONTE_CP, FONTE_OPERANDO, FONTE_RAM, FONTE_ACC, FONTE_ULA, DESTINO_REM, DESTINO_RI,
+                         DESTINO_ACC, DESTINO_B, DESTINO_SAIDA, DESTINO_CP, DESTINO_RAM)
+
+# No modo turbo cada chamada do agendador executa lotes de LOTE_TURBO instruções por até
+# FATIA_TURBO segundos e devolve o controle ao Tk, que desenha o estado e trata eventos
+LOTE_TURBO = 1000
+FATIA_TURBO = 0.03
+LOTE_ILIMITADO = 10000
+ESCALA_IPS_MAXIMA = 4.0
+ATRASO_MONTAGEM_AO_VIVO = 300
+CAPACIDADE_RASTRO = 4096  # fases mantidas no rastro em memória (4 por instrução)
+# Blocos do canvas ligados a cada fonte e destino do barramento nas palavras de controle
+BLOCOS_FONTES = {FONTE_CP: "bloco_cp", FONTE_OPERANDO: "bloco_ri", FONTE_RAM: "ram", FONTE_ACC: "bloco_acc",
+                 FONTE_ULA: "bloco_ula"}
+NOMES_FONTES = {FONTE_CP: "CP", FONTE_OPERANDO: "Operando do RI", FONTE_RAM: "Memória", FONTE_ACC: "ACC",
+                FONTE_ULA: "ULA"}
+CONTROLE_DESTINOS = ((DESTINO_REM, "bloco_rem", "REM"), (DESTINO_RI, "bloco_ri", "RI"), (DESTINO_ACC, "bloco_acc", "ACC"),
+                     (DESTINO_B, "bloco_regb", "Reg B"), (DESTINO_SAIDA, "bloco_saida", "Saída"),
+                     (DESTINO_CP, "bloco_cp", "CP"), (DESTINO_RAM, "ram", "Memória"))
+# Métodos cronometrados quando o perfilador está ligado
+METODOS_PERFILADOS = ("_atualizar_tela", "_enfileirar_instrucao", "_animar_microciclo", "_mostrar_estado",
+                      "_animar_transferencia",
+                      "_animar_conexao_direta", "_animar_leitura_ram", "_piscar_relogio", "_destacar_componente")
 
 class AplicativoSimulador:
     def __init__(self, janela_principal):
@@ -58,11 +48,23 @@ class AplicativoSimulador:
         self.janela_principal.configure(bg='#000000')  # Fundo preto
 
         self.nucleo = NucleoSAP1()
+        self.rastro = RastroExecucao(CAPACIDADE_RASTRO)
+        self.nucleo.rastro = self.rastro
+        self.historico = HistoricoExecucao(self.nucleo)
+        self.passo_alvo = tk.StringVar(value="0")
+        self.perfilador = None
+        self.perfilar = tk.BooleanVar(value=False)
         self.executando = False
-        self.velocidade_simulacao = 1.0
+        self.ips_alvo = 1.0
 
         self.valor_campo_expressao = tk.StringVar(value="")
         self.linha_codigo_atual = -1
+        self.endereco_para_linha = {}
+        self.montador = MontadorIncremental()
+        self._montagem_agendada = None
+        self.modo_turbo = tk.BooleanVar(value=False)
+        self.modo_estendido = tk.BooleanVar(value=False)
+        self.largura_endereco = tk.StringVar(value=str(LARGURA_ENDERECO_PADRAO))
 
         self._configurar_estilos()
         self._construir_interface()
@@ -85,6 +87,7 @@ class AplicativoSimulador:
                   background=[('active', '#a0a0ff'), ('pressed', '#8888ff')],
                   foreground=[('active', 'white'), ('pressed', 'white')])
 
+        estilo.configure('TCheckbutton', background='#f0f0f5', font=('Arial', 9))
         estilo.configure('TLabelFrame', background='#f0f0f5', foreground='#333355', font=('Arial', 10, 'bold'))
         estilo.configure('Horizontal.TScale', background='#f0f0f5', troughcolor='#c0c0ff')
 
@@ -131,11 +134,36 @@ class AplicativoSimulador:
         ttk.Button(painel_controle, text="Montar Programa", command=self._montar_codigo).pack(fill=tk.X, pady=3)
         ttk.Button(painel_controle, text="Executar", command=self._iniciar_simulacao).pack(fill=tk.X, pady=3)
         ttk.Button(painel_controle, text="Passo a Passo", command=self._executar_passo).pack(fill=tk.X, pady=3)
+        ttk.Button(painel_controle, text="Voltar Passo", command=self._voltar_passo).pack(fill=tk.X, pady=3)
+        frame_ir_para = ttk.Frame(painel_controle)
+        frame_ir_para.pack(fill=tk.X, pady=3)
+        ttk.Label(frame_ir_para, text="Passo:").pack(side=tk.LEFT)
+        ttk.Entry(frame_ir_para, textvariable=self.passo_alvo, width=8).pack(side=tk.LEFT, padx=3)
+        ttk.Button(frame_ir_para, text="Ir", command=self._ir_para_passo).pack(side=tk.LEFT, expand=True, fill=tk.X)
         ttk.Button(painel_controle, text="Reiniciar", command=self.reiniciar_simulador).pack(fill=tk.X, pady=3)
+        ttk.Button(painel_controle, text="Salvar Rastro...", command=self._salvar_rastro).pack(fill=tk.X, pady=3)
+        ttk.Button(painel_controle, text="Reproduzir Rastro...", command=self._escolher_rastro).pack(fill=tk.X, pady=3)
+        ttk.Button(painel_controle, text="Abrir Imagem...", command=self._escolher_imagem).pack(fill=tk.X, pady=3)
+        ttk.Button(painel_controle, text="Salvar Imagem...", command=self._salvar_imagem).pack(fill=tk.X, pady=3)
+        ttk.Checkbutton(painel_controle, text="Turbo (exibir só o estado final)", variable=self.modo_turbo,
+                        command=self._alternar_turbo).pack(anchor='w', pady=3)
+        ttk.Checkbutton(painel_controle, text="Modo estendido (LDI, STA, JMP, JZ, JC)", variable=self.modo_estendido,
+                        command=self._alternar_modo_estendido).pack(anchor='w', pady=3)
+        frame_largura = ttk.Frame(painel_controle)
+        frame_largura.pack(fill=tk.X, pady=3)
+        ttk.Label(frame_largura, text="Bits de endereço:").pack(side=tk.LEFT)
+        ttk.Spinbox(frame_largura, from_=LARGURA_ENDERECO_PADRAO, to=LARGURA_ENDERECO_MAXIMA, width=4, state='readonly',
+                    textvariable=self.largura_endereco, command=self._alterar_largura_endereco).pack(side=tk.LEFT, padx=3)
+        ttk.Checkbutton(painel_controle, text="Perfilador", variable=self.perfilar,
+                        command=self._alternar_perfilador).pack(anchor='w', pady=3)
+        ttk.Button(painel_controle, text="Salvar Perfil...", command=self._salvar_perfil).pack(fill=tk.X, pady=3)
 
         frame_velocidade = ttk.LabelFrame(painel_controle, text="", padding="8")
         frame_velocidade.pack(fill=tk.X, pady=10)
-        self.controle_velocidade = ttk.Scale(frame_velocidade, from_=0.1, to=2.0, value=1.0,
+        self.rotulo_velocidade = tk.StringVar()
+        ttk.Label(frame_velocidade, textvariable=self.rotulo_velocidade).pack(anchor='w')
+        # Escala logarítmica: 10^valor instruções por segundo; acima de ESCALA_IPS_MAXIMA é ilimitado
+        self.controle_velocidade = ttk.Scale(frame_velocidade, from_=0.0, to=ESCALA_IPS_MAXIMA + 0.5, value=0.0,
                                     command=self._atualizar_velocidade,
                                     orient=tk.HORIZONTAL, length=200)
         self.controle_velocidade.pack(fill=tk.X, pady=5)
@@ -145,21 +173,37 @@ class AplicativoSimulador:
 
         self.canvas_cpu = tk.Canvas(painel_cpu, width=600, height=550, bg="#1a1a1a", relief="groove", borderwidth=2, highlightthickness=0)
         self.canvas_cpu.pack(fill=tk.BOTH, expand=True)
+        self.renderizador = RenderizadorCPU(self.canvas_cpu)
 
         self.mensagem_status = tk.StringVar()
         self.mensagem_status.set("Pronto.")
-        barra_status = ttk.Label(self.janela_principal, textvariable=self.mensagem_status,
+        self.mensagem_ips = tk.StringVar()
+        barra_inferior = ttk.Frame(self.janela_principal)
+        barra_inferior.pack(fill=tk.X, side=tk.BOTTOM)
+        ttk.Label(barra_inferior, textvariable=self.mensagem_ips,
+                  relief=tk.SUNKEN, padding="6", font=('Arial', 9), anchor='e',
+                  background='#8e44ad', foreground='white').pack(side=tk.RIGHT)
+        barra_status = ttk.Label(barra_inferior, textvariable=self.mensagem_status,
                              relief=tk.SUNKEN, padding="6", font=('Arial', 9), anchor='w', 
                              background='#8e44ad', foreground='white')
-        barra_status.pack(fill=tk.X, side=tk.BOTTOM)
+        barra_status.pack(fill=tk.X, side=tk.LEFT, expand=True)
+
+        self.agendador = AgendadorAnimacao(self.janela_principal, self.renderizador, self._desenhar_estado,
+                                           self.mensagem_status.set, self._destacar_linha, self._mostrar_ips)
+        self._atualizar_velocidade(self.controle_velocidade.get())
 
         self._desenhar_cpu()
 
         self.area_texto.tag_configure("linha_ativa", background="#8e44ad", foreground="white")
         self.area_texto.tag_configure("erro", background="#e74c3c", foreground="white")
+        self.area_texto.bind("<KeyRelease>", self._agendar_montagem_ao_vivo)
+        self.canvas_cpu.bind("<MouseWheel>", self._rolar_ram_roda)
+        self.canvas_cpu.bind("<Button-4>", self._rolar_ram_roda)
+        self.canvas_cpu.bind("<Button-5>", self._rolar_ram_roda)
 
     def _desenhar_cpu(self):
         self.canvas_cpu.delete("all")
+        self.renderizador.invalidar()
 
         cor_componente = "#2c3e50"
         cor_borda = "#9b59b6"
@@ -197,6 +241,7 @@ class AplicativoSimulador:
         criar_componente(400, 200, 150, 70, "ULA", "bloco_ula", "")
         self.canvas_cpu.create_line(475, 270, 475, POSICAO_BARRA_Y, width=1, fill=cor_barramento, tags="conexao_ula")
         self.canvas_cpu.create_text(475, 235, text="±", font=('Arial', 18, 'bold'), fill=cor_texto, tags="simbolo_ula")
+        self.canvas_cpu.create_text(475, 285, text="Z=0  C=0", font=('Consolas', 9), fill="#7f8c8d", tags="flags_val")
 
         RAM_X = 600
         RAM_Y = 50
@@ -204,13 +249,11 @@ class AplicativoSimulador:
         RAM_ALTURA = 280
         self.canvas_cpu.create_rectangle(RAM_X + 4, RAM_Y + 4, RAM_X + RAM_LARGURA + 4, RAM_Y + RAM_ALTURA + 4, fill=cor_sombra, tags="ram_sombra", outline="")
         self.canvas_cpu.create_rectangle(RAM_X, RAM_Y, RAM_X + RAM_LARGURA, RAM_Y + RAM_ALTURA, fill="#2c3e50", outline=cor_borda, width=2, tags="ram")
-        self.canvas_cpu.create_text(RAM_X + RAM_LARGURA/2, RAM_Y - 20, text="RAM (16 Bytes)", font=('Arial', 11, 'bold'), fill=cor_texto)
+        capacidade = self.nucleo.capacidade
+        tamanho = f"{capacidade // 1024} KiB" if capacidade >= 1024 else f"{capacidade} Bytes"
+        self.canvas_cpu.create_text(RAM_X + RAM_LARGURA/2, RAM_Y - 20, text=f"RAM ({tamanho})", font=('Arial', 11, 'bold'), fill=cor_texto)
         self.canvas_cpu.create_line(RAM_X + RAM_LARGURA/2, RAM_Y + RAM_ALTURA, RAM_X + RAM_LARGURA/2, POSICAO_BARRA_Y, width=1, fill=cor_barramento, tags="conexao_ram")
 
-        self.celulas_ram = []
-        self.textos_ram = []
-        self.enderecos_ram = []
-
         largura_celula = 35
         altura_celula = 30
         espacamento_x = 7
@@ -218,22 +261,25 @@ class AplicativoSimulador:
         inicio_x = RAM_X + 10
         inicio_y = RAM_Y + 30
 
-        for i in range(CAPACIDADE_MEMORIA):
-            col = i % 4
-            lin = i // 4
+        # Só as células da janela visível existem no canvas; rolar troca os endereços que elas mostram
+        colunas = self.renderizador.colunas
+        for i in range(self.renderizador.celulas_visiveis):
+            col = i % colunas
+            lin = i // colunas
             x1 = inicio_x + col * (largura_celula + espacamento_x)
             y1 = inicio_y + lin * (altura_celula + espacamento_y)
             x2 = x1 + largura_celula
             y2 = y1 + altura_celula
 
-            celula = self.canvas_cpu.create_rectangle(x1, y1, x2, y2, fill="#34495e", tags=f"celula_ram_{i}", width=1, outline="#7f8c8d")
-            self.celulas_ram.append(celula)
+            self.canvas_cpu.create_rectangle(x1, y1, x2, y2, fill="#34495e", tags=f"celula_ram_{i}", width=1, outline="#7f8c8d")
+            self.canvas_cpu.create_text(x1 + largura_celula/2, y1 + altura_celula/2, text="00", tags=f"valor_ram_{i}", font=('Consolas', 9, 'bold'), fill=cor_texto)
+            self.canvas_cpu.create_text(x1 + largura_celula/2, y1 - 10, text=f"{i:01X}", tags=f"endereco_ram_{i}", font=('Arial', 7), fill="#bdc3c7")
 
-            texto = self.canvas_cpu.create_text(x1 + largura_celula/2, y1 + altura_celula/2, text="00", tags=f"valor_ram_{i}", font=('Consolas', 9, 'bold'), fill=cor_texto)
-            self.textos_ram.append(texto)
-
-            endereco = self.canvas_cpu.create_text(x1 + largura_celula/2, y1 - 10, text=f"{i:01X}", tags=f"endereco_ram_{i}", font=('Arial', 7), fill="#bdc3c7")
-            self.enderecos_ram.append(endereco)
+        if self.renderizador.linhas_ram > self.renderizador.linhas_visiveis:
+            self._criar_barra_ram(RAM_X + RAM_LARGURA + 8, inicio_y - 10,
+                                  self.renderizador.linhas_visiveis * (altura_celula + espacamento_y))
+        else:
+            self.barra_ram = None
 
         criar_componente(100, 500, 100, 70, "SAÍDA", "bloco_saida", "0x00")
         self.canvas_cpu.create_line(150, 500, 150, POSICAO_BARRA_Y, width=1, fill=cor_barramento, tags="conexao_saida")
@@ -243,13 +289,18 @@ class AplicativoSimulador:
         self.leds_saida = []
         for i in range(8):
             x = POSICAO_LED_X + i * 20
-            led = self.canvas_cpu.create_oval(x, POSICAO_LED_Y, x+15, POSICAO_LED_Y+15, fill="#34495e", outline="#7f8c8d")
+            led = self.canvas_cpu.create_oval(x, POSICAO_LED_Y, x+15, POSICAO_LED_Y+15, fill="#34495e", outline="#7f8c8d", tags=f"led_saida_{7-i}")
             self.leds_saida.append(led)
             self.canvas_cpu.create_text(x+7, POSICAO_LED_Y+25, text=f"B{7-i}", font=('Arial', 7), fill='#bdc3c7')
 
         self.canvas_cpu.create_rectangle(650, 480, 720, 530, fill="#2c3e50", outline=cor_borda, width=2, tags="relogio")
         self.canvas_cpu.create_text(685, 505, text="CLOCK", tags="texto_relogio", font=('Arial', 10, 'bold'), fill=cor_texto)
 
+    def _criar_barra_ram(self, x, y, altura):
+        self.barra_ram = ttk.Scrollbar(self.canvas_cpu, orient=tk.VERTICAL, command=self._rolar_ram)
+        self.canvas_cpu.create_window(x, y, anchor='nw', window=self.barra_ram, height=altura)
+        self._atualizar_barra_ram()
+
     def _tecla_expressao(self, tecla):
         valor_atual = self.valor_campo_expressao.get()
         if tecla in ['+', '-']:
@@ -268,56 +319,11 @@ class AplicativoSimulador:
             messagebox.showwarning("Expressão Vazia", "Digite uma expressão para gerar código.")
             return
 
-        componentes = re.findall(r'(\d+)|([+-])', expressao)
-
-        numeros = []
-        operadores = []
-
         try:
-            num_atual = ""
-            for parte_num, parte_op in componentes:
-                if parte_num:
-                    num_atual += parte_num
-                elif parte_op:
-                    if num_atual:
-                        numeros.append(int(num_atual))
-                        num_atual = ""
-                    operadores.append(parte_op)
-
-            if num_atual:
-                numeros.append(int(num_atual))
-
-            if not numeros:
-                raise ValueError("Nenhum número válido encontrado.")
-
-            if len(operadores) >= len(numeros):
-                 raise ValueError("Expressão mal formada (operador sem operando).")
-
-            codigo = "; Código gerado para: " + expressao + "\n"
-            codigo += "; Dados armazenados no final da memória.\n\n"
-
-            inicio_dados = CAPACIDADE_MEMORIA - len(numeros)
-            if inicio_dados < 0:
-                raise ValueError(f"Expressão muito longa. Máximo de {CAPACIDADE_MEMORIA} números na memória.")
-
-            codigo += f"CAR {inicio_dados:01X}   ; Carrega o primeiro número no ACC\n"
-
-            for i in range(len(operadores)):
-                op = operadores[i]
-                endereco = inicio_dados + i + 1
-                if op == "+":
-                    codigo += f"SOM {endereco:01X}   ; Soma o próximo número\n"
-                elif op == "-":
-                    codigo += f"SUB {endereco:01X}   ; Subtrai o próximo número\n"
-
-            codigo += "SAI      ; Mostra o resultado final\n"
-            codigo += "PAR      ; Termina a execução\n\n"
-
-            codigo += f"ORG {inicio_dados:01X}   ; Seção de dados\n"
-            for num in numeros:
-                if not (0 <= num <= 255):
-                    raise ValueError(f"Número '{num}' fora do intervalo (0-255).")
-                codigo += f"DB {num}     ; Byte de dados\n"
+            codigo = compilar_expressao(expressao).codigo
+            if self.nucleo.largura_endereco != LARGURA_ENDERECO_PADRAO:
+                # O gerador de expressões produz programas para a memória de 16 bytes
+                self._definir_largura_endereco(LARGURA_ENDERECO_PADRAO)
 
             self.area_texto.delete(1.0, tk.END)
             self.area_texto.insert(1.0, codigo)
@@ -336,52 +342,59 @@ class AplicativoSimulador:
 
     def reiniciar_simulador(self):
         self.executando = False
-        self.nucleo.registradores = {
-            "ContadorPrograma": 0,
-            "Acumulador": 0,
-            "RegistradorEndereco": 0,
-            "RegistradorInstrucao": 0,
-            "RegistradorB": 0,
-            "RegistradorSaida": 0,
-            "Flags": {"Zero": 0, "Carry": 0}
-        }
-        self.nucleo.memoria_principal = [0] * CAPACIDADE_MEMORIA
+        self.agendador.parar()
+        self.nucleo.reiniciar()
+        self.rastro.limpar()
+        self.historico.limpar()
+        self.endereco_para_linha = {}
 
         self._atualizar_tela()
         self.linha_codigo_atual = -1
         self.mensagem_status.set("Simulador reiniciado. Carregue e monte um programa.")
         self._limpar_destaques()
-        self.canvas_cpu.itemconfig("bloco_ula_val", text="")
-        for i in range(CAPACIDADE_MEMORIA):
-            self.canvas_cpu.itemconfig(f"celula_ram_{i}", fill="#34495e")
-            self.canvas_cpu.itemconfig(f"endereco_ram_{i}", fill="#bdc3c7")
+        self.renderizador.configurar("bloco_ula_val", text="")
+        for i in range(self.renderizador.celulas_visiveis):
+            self.renderizador.configurar(f"celula_ram_{i}", fill="#34495e")
+            self.renderizador.configurar(f"endereco_ram_{i}", fill="#bdc3c7")
 
     def _atualizar_tela(self):
-        regs = self.nucleo.registradores
-        self.canvas_cpu.itemconfig("bloco_cp_val", text=f"0x{regs['ContadorPrograma']:01X}")
-        self.canvas_cpu.itemconfig("bloco_rem_val", text=f"0x{regs['RegistradorEndereco']:01X}")
-        self.canvas_cpu.itemconfig("bloco_ri_val", text=f"0x{regs['RegistradorInstrucao']:02X}")
-        self.canvas_cpu.itemconfig("bloco_acc_val", text=f"0x{regs['Acumulador']:02X}")
-        self.canvas_cpu.itemconfig("bloco_regb_val", text=f"0x{regs['RegistradorB']:02X}")
-        self.canvas_cpu.itemconfig("bloco_saida_val", text=f"0x{regs['RegistradorSaida']:02X}")
-
-        for i in range(CAPACIDADE_MEMORIA):
-            self.canvas_cpu.itemconfig(f"valor_ram_{i}", text=f"{self.nucleo.memoria_principal[i]:02X}")
-
-        for i in range(CAPACIDADE_MEMORIA):
-            self.canvas_cpu.itemconfig(f"celula_ram_{i}", fill="#34495e")
-            self.canvas_cpu.itemconfig(f"endereco_ram_{i}", fill="#bdc3c7")
-
-        if 0 <= regs['RegistradorEndereco'] < CAPACIDADE_MEMORIA:
-            self.canvas_cpu.itemconfig(f"celula_ram_{regs['RegistradorEndereco']}", fill="#9b59b6")
-            self.canvas_cpu.itemconfig(f"endereco_ram_{regs['RegistradorEndereco']}", fill="#ffffff")
-
-        saida = regs['RegistradorSaida']
-        for i in range(8):
-            if (saida >> i) & 1:
-                self.canvas_cpu.itemconfig(self.leds_saida[7-i], fill="#e74c3c")
-            else:
-                self.canvas_cpu.itemconfig(self.leds_saida[7-i], fill="#34495e")
+        self.renderizador.desenhar_estado(self.nucleo.estado)
+        self._atualizar_barra_ram()
+
+    def _desenhar_estado(self, estado):
+        # Usado pelo agendador: desenha o quadro e mantém a barra da RAM na posição da janela
+        self.renderizador.desenhar_estado(estado)
+        self._atualizar_barra_ram()
+
+    def _atualizar_barra_ram(self):
+        if getattr(self, "barra_ram", None) is None:
+            return
+        linhas = self.renderizador.linhas_ram
+        inicio = self.renderizador.primeira_linha
+        self.barra_ram.set(inicio / linhas, (inicio + self.renderizador.linhas_visiveis) / linhas)
+
+    def _rolar_ram(self, comando, valor, unidade=None):
+        # Protocolo do yscrollcommand: ("moveto", fração) ou ("scroll", n, "units"|"pages")
+        renderizador = self.renderizador
+        if comando == "moveto":
+            linha = round(float(valor) * renderizador.linhas_ram)
+        else:
+            passo = renderizador.linhas_visiveis if unidade == "pages" else 1
+            linha = renderizador.primeira_linha + int(valor) * passo
+        if renderizador.rolar_ram(linha):
+            self._atualizar_tela()
+
+    def _rolar_ram_roda(self, evento):
+        if getattr(evento, "num", None) == 4 or getattr(evento, "delta", 0) > 0:
+            self._rolar_ram("scroll", -1, "units")
+        else:
+            self._rolar_ram("scroll", 1, "units")
+
+    # As funções de animação abaixo apenas enfileiram quadros no agendador;
+    # a exibição acontece no laço de eventos do Tk, sem sleep nem update().
+
+    def _mostrar_estado(self, estado, duracao=0.4):
+        self.agendador.quadro(estado=estado.copy(), duracao=duracao)
 
     def _animar_transferencia(self, origem, destino, duracao=0.3):
         cor_ativa = "#e74c3c"  # Vermelho para animação
@@ -398,76 +411,71 @@ class AplicativoSimulador:
         if origem == "bloco_ula": tag_origem = "conexao_ula"
         if destino == "bloco_ula": tag_destino = "conexao_ula"
 
-        self.canvas_cpu.itemconfig(origem, fill=cor_ativa)
-        if tag_origem and self.canvas_cpu.find_withtag(tag_origem):
-            self.canvas_cpu.itemconfig(tag_origem, fill=cor_ativa, width=2)
-        self.canvas_cpu.update()
-        time.sleep(duracao / (3 * self.velocidade_simulacao))
-
-        self.canvas_cpu.itemconfig("barramento", fill=cor_ativa, width=4)
-        self.canvas_cpu.update()
-        time.sleep(duracao / (3 * self.velocidade_simulacao))
-
-        if tag_destino and self.canvas_cpu.find_withtag(tag_destino):
-            self.canvas_cpu.itemconfig(tag_destino, fill=cor_ativa, width=2)
-        self.canvas_cpu.itemconfig(destino, fill=cor_ativa)
-        self.canvas_cpu.update()
-        time.sleep(duracao / (3 * self.velocidade_simulacao))
-
-        self.canvas_cpu.itemconfig(origem, fill=cor_componente)
-        if tag_origem and self.canvas_cpu.find_withtag(tag_origem):
-            self.canvas_cpu.itemconfig(tag_origem, fill=cor_barramento, width=1)
-        self.canvas_cpu.itemconfig("barramento", fill=cor_barramento, width=3)
-        if tag_destino and self.canvas_cpu.find_withtag(tag_destino):
-            self.canvas_cpu.itemconfig(tag_destino, fill=cor_barramento, width=1)
-        self.canvas_cpu.itemconfig(destino, fill=cor_componente)
-        self.canvas_cpu.update()
-        time.sleep(0.1 / self.velocidade_simulacao)
+        conecta_origem = tag_origem and self.renderizador.existe(tag_origem)
+        conecta_destino = tag_destino and self.renderizador.existe(tag_destino)
+
+        quadro = [(origem, {"fill": cor_ativa})]
+        if conecta_origem:
+            quadro.append((tag_origem, {"fill": cor_ativa, "width": 2}))
+        self.agendador.quadro(quadro, duracao=duracao / 3)
+
+        self.agendador.quadro([("barramento", {"fill": cor_ativa, "width": 4})], duracao=duracao / 3)
+
+        quadro = [(destino, {"fill": cor_ativa})]
+        if conecta_destino:
+            quadro.insert(0, (tag_destino, {"fill": cor_ativa, "width": 2}))
+        self.agendador.quadro(quadro, duracao=duracao / 3)
+
+        quadro = [(origem, {"fill": cor_componente})]
+        if conecta_origem:
+            quadro.append((tag_origem, {"fill": cor_barramento, "width": 1}))
+        quadro.append(("barramento", {"fill": cor_barramento, "width": 3}))
+        if conecta_destino:
+            quadro.append((tag_destino, {"fill": cor_barramento, "width": 1}))
+        quadro.append((destino, {"fill": cor_componente}))
+        self.agendador.quadro(quadro, duracao=0.1)
 
     def _animar_conexao_direta(self, origem, destino, linha, duracao=0.3):
         cor_ativa = "#e74c3c"
         cor_barramento = "#8e44ad"
         cor_componente = "#2c3e50"
 
-        self.canvas_cpu.itemconfig(origem, fill=cor_ativa)
-        self.canvas_cpu.itemconfig(linha, fill=cor_ativa, width=2)
-        self.canvas_cpu.itemconfig(destino, fill=cor_ativa)
-        self.canvas_cpu.update()
-        time.sleep(duracao / self.velocidade_simulacao)
-
-        self.canvas_cpu.itemconfig(origem, fill=cor_componente)
-        self.canvas_cpu.itemconfig(linha, fill=cor_barramento, width=1)
-        self.canvas_cpu.itemconfig(destino, fill=cor_componente)
-        self.canvas_cpu.update()
-        time.sleep(0.1 / self.velocidade_simulacao)
+        self.agendador.quadro([(origem, {"fill": cor_ativa}),
+                               (linha, {"fill": cor_ativa, "width": 2}),
+                               (destino, {"fill": cor_ativa})], duracao=duracao)
+        self.agendador.quadro([(origem, {"fill": cor_componente}),
+                               (linha, {"fill": cor_barramento, "width": 1}),
+                               (destino, {"fill": cor_componente})], duracao=0.1)
+
+    def _colorir_celula(self, endereco, cor, duracao=0.0):
+        # A célula é resolvida só na exibição: até lá a janela da RAM pode ter rolado
+        def colorir():
+            if self.renderizador.colorir_celula(endereco, cor):
+                self._atualizar_barra_ram()
+        self.agendador.quadro(acao=colorir, duracao=duracao)
+
+    def _animar_leitura_ram(self, endereco, destino):
+        if 0 <= endereco < self.nucleo.capacidade:
+            self._colorir_celula(endereco, "#e74c3c", duracao=0.2)
+            self._animar_transferencia("ram", destino)
+            self._colorir_celula(endereco, "#9b59b6")
+
+    def _animar_escrita_ram(self, origem, endereco):
+        if 0 <= endereco < self.nucleo.capacidade:
+            self._animar_transferencia(origem, "ram")
+            self._colorir_celula(endereco, "#e74c3c", duracao=0.2)
+            self._colorir_celula(endereco, "#9b59b6")
 
     def _piscar_relogio(self):
         for _ in range(2):
-            self.canvas_cpu.itemconfig("relogio", fill="#e74c3c")
-            self.canvas_cpu.update()
-            time.sleep(0.15 / self.velocidade_simulacao)
-            self.canvas_cpu.itemconfig("relogio", fill="#2c3e50")
-            self.canvas_cpu.update()
-            time.sleep(0.15 / self.velocidade_simulacao)
+            self.agendador.quadro([("relogio", {"fill": "#e74c3c"})], duracao=0.15)
+            self.agendador.quadro([("relogio", {"fill": "#2c3e50"})], duracao=0.15)
 
     def _destacar_componente(self, componente, duracao=0.5):
         cor_original = "#2c3e50"
-        self.canvas_cpu.itemconfig(componente, fill="#e74c3c")
         tag_valor = f"{componente}_val"
-        try:
-             self.canvas_cpu.itemconfig(tag_valor, fill="white")
-        except:
-             pass
-
-        self.canvas_cpu.update()
-        time.sleep(duracao / self.velocidade_simulacao)
-
-        self.canvas_cpu.itemconfig(componente, fill=cor_original)
-        try:
-            self.canvas_cpu.itemconfig(tag_valor, fill="white")
-        except:
-            pass
-        self.canvas_cpu.update()
+        self.agendador.quadro([(componente, {"fill": "#e74c3c"}), (tag_valor, {"fill": "white"})], duracao=duracao)
+        self.agendador.quadro([(componente, {"fill": cor_original}), (tag_valor, {"fill": "white"})])
 
     def _destacar_linha(self, linha):
         if self.linha_codigo_atual != -1:
@@ -477,6 +485,11 @@ class AplicativoSimulador:
         self.linha_codigo_atual = linha
         self.area_texto.see(f"{linha}.0")
 
+    def _destacar_linha_do_endereco(self, endereco):
+        linha = self.endereco_para_linha.get(endereco)
+        if linha is not None:
+            self._destacar_linha(linha)
+
     def _limpar_destaques(self):
         if self.linha_codigo_atual != -1:
             self.area_texto.tag_remove("linha_ativa", f"{self.linha_codigo_atual}.0", f"{self.linha_codigo_atual}.end")
@@ -484,313 +497,560 @@ class AplicativoSimulador:
         self.area_texto.tag_remove("erro", "1.0", tk.END)
 
 
+    def _marcar_erros(self, erros):
+        self.area_texto.tag_remove("erro", "1.0", tk.END)
+        for linha, _ in erros:
+            self.area_texto.tag_add("erro", f"{linha}.0", f"{linha}.end")
+        if erros:
+            linha, mensagem = erros[0]
+            self.mensagem_status.set(f"{len(erros)} erro(s) de montagem. Linha {linha}: {mensagem}")
+
     def _montar_codigo(self):
-        codigo = self.area_texto.get(1.0, tk.END)
-        linhas = codigo.split('\n')
+        programa, erros = self.montador.montar(self.area_texto.get(1.0, tk.END))
+        self._marcar_erros(erros)
+        if erros:
+            return False
+
+        aplicar_memoria(self.nucleo.memoria_principal, programa.memoria)
+        self.nucleo.registradores['ContadorPrograma'] = 0
+        self.nucleo.motivo_parada = None
+        self.nucleo.reiniciar_deteccao_lacos()
+        self.rastro.limpar()
+        self.historico.limpar()
+        self.endereco_para_linha = programa.endereco_para_linha
+        self._atualizar_tela()
+        self.mensagem_status.set("Montagem concluída! Pronto para executar.")
+        self._limpar_destaques()
+        return True
 
-        memoria = [0] * CAPACIDADE_MEMORIA
+    def _agendar_montagem_ao_vivo(self, _evento=None):
+        # Debounce: só monta quando a digitação pausa por ATRASO_MONTAGEM_AO_VIVO ms
+        if self._montagem_agendada is not None:
+            self.janela_principal.after_cancel(self._montagem_agendada)
+        self._montagem_agendada = self.janela_principal.after(ATRASO_MONTAGEM_AO_VIVO, self._montar_ao_vivo)
 
-        ponteiro_instrucao = 0
-        ponteiro_dados = None
+    def _montar_ao_vivo(self):
+        self._montagem_agendada = None
+        if self.executando or self.agendador.ocupado:
+            return
 
-        self.area_texto.tag_remove("erro", "1.0", tk.END)
+        programa, erros = self.montador.montar(self.area_texto.get(1.0, tk.END))
+        self._marcar_erros(erros)
+        if erros:
+            return
 
-        try:
-            for num_linha, linha in enumerate(linhas, 1):
-                linha_processada = linha
-                inicio_comentario = linha_processada.find(';')
-                if inicio_comentario != -1:
-                    linha_processada = linha_processada[:inicio_comentario].strip()
-
-                if not linha_processada:
-                    continue
-
-                partes = linha_processada.split()
-                mnemonic = partes[0].upper()
-
-                if mnemonic == "ORG":
-                    if len(partes) < 2:
-                        raise ValueError(f"ORG requer um endereço.")
-                    endereco = int(partes[1], 16)
-                    if not (0 <= endereco < CAPACIDADE_MEMORIA):
-                        raise ValueError(f"Endereço ORG fora do intervalo (00-{CAPACIDADE_MEMORIA-1:01X}).")
-                    ponteiro_dados = endereco
-                    continue
-
-                elif mnemonic == "DB":
-                    if ponteiro_dados is None:
-                        raise ValueError(f"DB deve ser precedido por ORG.")
-                    if len(partes) < 2:
-                        raise ValueError(f"DB requer um valor.")
-
-                    valor = int(partes[1])
-                    if not (0 <= valor <= 255):
-                        raise ValueError(f"Valor DB deve estar entre 0 e 255.")
-
-                    if ponteiro_dados >= CAPACIDADE_MEMORIA:
-                        raise ValueError(f"Memória insuficiente para DB (máx {CAPACIDADE_MEMORIA} bytes).")
-
-                    memoria[ponteiro_dados] = valor
-                    ponteiro_dados += 1
-                    continue
-
-                if ponteiro_instrucao >= CAPACIDADE_MEMORIA:
-                    raise ValueError(f"Programa muito grande para memória (máx {CAPACIDADE_MEMORIA} bytes).")
-
-                opcode = {
-                    "CAR": 0b0000,
-                    "SOM": 0b0001,
-                    "SUB": 0b0010,
-                    "SAI": 0b1110,
-                    "PAR": 0b1111
-                }.get(mnemonic)
-
-                if opcode is None:
-                    raise ValueError(f"Mnemonico inválido: {mnemonic}.")
-
-                operando = 0
-                if mnemonic in ["CAR", "SOM", "SUB"]:
-                    if len(partes) < 2:
-                        raise ValueError(f"Operando faltando para {mnemonic}.")
-                    try:
-                        operando = int(partes[1], 16)
-                    except ValueError:
-                        raise ValueError(f"Operando inválido para {mnemonic}. Esperado endereço hexadecimal.")
-
-                    if not (0 <= operando < CAPACIDADE_MEMORIA):
-                        raise ValueError(f"Operando para {mnemonic} deve estar entre 00 e {CAPACIDADE_MEMORIA-1:01X}.")
-                elif len(partes) > 1:
-                     raise ValueError(f"Instrução {mnemonic} não aceita operando.")
-
-                memoria[ponteiro_instrucao] = (opcode << 4) | operando
-                ponteiro_instrucao += 1
-
-            self.nucleo.memoria_principal = memoria
-            self.nucleo.registradores['ContadorPrograma'] = 0
+        self.endereco_para_linha = programa.endereco_para_linha
+        if aplicar_memoria(self.nucleo.memoria_principal, programa.memoria):
+            self.rastro.limpar()
+            self.historico.limpar()
             self._atualizar_tela()
-            self.mensagem_status.set("Montagem concluída! Pronto para executar.")
-            self._limpar_destaques()
-            return True
-
-        except Exception as e:
-            self.area_texto.tag_add("erro", f"{num_linha}.0", f"{num_linha}.end")
-            messagebox.showerror("Erro", f"Erro na linha {num_linha}: {str(e)}")
-            self.mensagem_status.set(f"Erro na linha {num_linha}.")
-            return False
+            self.mensagem_status.set("Memória atualizada a partir do editor.")
 
     def _iniciar_simulacao(self):
         if self.executando:
             return
 
+        self.agendador.parar()
         self.nucleo.registradores['ContadorPrograma'] = 0
+        self.nucleo.motivo_parada = None
+        self.rastro.limpar()
+        self.historico.limpar()
         self._atualizar_tela()
         self._limpar_destaques()
 
-        def executar_simulacao():
-            self.executando = True
-            self.mensagem_status.set("Executando programa...")
-
-            while self.executando and self.nucleo.registradores['ContadorPrograma'] < CAPACIDADE_MEMORIA:
-                linha_asm = 1
-                contador_instrucoes = 0
-                for i, linha in enumerate(self.area_texto.get("1.0", tk.END).split('\n')):
-                    linha_limpa = linha.strip()
-                    if linha_limpa and not linha_limpa.startswith(';'):
-                        if contador_instrucoes == self.nucleo.registradores['ContadorPrograma']:
-                            self._destacar_linha(i + 1)
-                            break
-                        contador_instrucoes += 1
-                    linha_asm += 1
-
-                if not self._executar_passo():
-                    break
-                time.sleep(0.5 / self.velocidade_simulacao)
+        self.executando = True
+        self.mensagem_status.set("Executando programa...")
+        self.agendador.ao_esvaziar = self._produzir_instrucao
+        self.agendador.ao_terminar = self._finalizar_simulacao
+        self.agendador.iniciar()
 
-            self.executando = False
-            self._limpar_destaques()
-            if self.nucleo.registradores['ContadorPrograma'] >= CAPACIDADE_MEMORIA:
-                self.mensagem_status.set("Execução finalizada (Contador de Programa excedeu memória).")
+    def _produzir_instrucao(self):
+        # Chamado pelo agendador quando a fila de quadros esvazia
+        if not self.executando or self.nucleo.motivo_parada is not None:
+            return False
+        if self.nucleo.registradores['ContadorPrograma'] >= self.nucleo.capacidade:
+            return False
+
+        lote = self.agendador.instrucoes_por_lote()
+        if self.modo_turbo.get() or lote != 1:
+            # Sem tempo para animar cada fase: executa um lote no núcleo e mostra só o estado final
+            if self.modo_turbo.get():
+                passos = self._executar_fatia_turbo()
             else:
-                self.mensagem_status.set("Execução finalizada (Instrução PAR encontrada).")
+                passos = self.historico.executar(max_passos=LOTE_ILIMITADO if lote is None else lote).passos
+            self.agendador.quadro([("bloco_ula_val", {"text": ""})], estado=self.nucleo.estado.copy(),
+                                  instrucoes=passos)
+            return True
 
-        import threading
-        thread = threading.Thread(target=executar_simulacao)
-        thread.start()
+        self._enfileirar_instrucao(pausa_final=0.5)
+        return True
+
+    def _executar_fatia_turbo(self):
+        # Limitada no tempo para não travar o laço de eventos; o agendador chama de novo após desenhar
+        fim = time.perf_counter() + FATIA_TURBO
+        passos = 0
+        while True:
+            resultado = self.historico.executar(max_passos=LOTE_TURBO)
+            passos += resultado.passos
+            if resultado.motivo_parada != PARADA_LIMITE_PASSOS or time.perf_counter() >= fim:
+                return passos
+
+    def _finalizar_simulacao(self):
+        self.executando = False
+        self._limpar_destaques()
+        self.mensagem_status.set(self._mensagem_parada())
+
+    def _mensagem_parada(self):
+        """Texto da barra de status para o motivo de parada atual do núcleo."""
+        motivo = self.nucleo.motivo_parada
+        if motivo == PARADA_OPCODE_INVALIDO:
+            return "Execução interrompida (opcode inválido)."
+        if motivo == PARADA_LACO_INFINITO:
+            return "Execução interrompida: o programa não termina (estado repetido em um laço)."
+        if motivo == PARADA_FIM_MEMORIA or self.nucleo.registradores['ContadorPrograma'] >= self.nucleo.capacidade:
+            return "Execução finalizada (Contador de Programa excedeu memória)."
+        if motivo is None or motivo == PARADA_PAR:
+            return "Execução finalizada (Instrução PAR encontrada)."
+        return f"Execução interrompida ({motivo})."
+
+    def _alternar_modo_estendido(self):
+        if self.executando:
+            self.modo_estendido.set(self.nucleo.estendido)
+            return
+        ativo = self.modo_estendido.get()
+        self.nucleo.usar_conjunto_estendido(ativo)
+        self.montador.usar_conjunto_estendido(ativo)
+        self.historico.limpar()
+        if self._montar_codigo():
+            self.mensagem_status.set("Modo estendido ativado." if ativo else "Modo estendido desativado.")
+
+    def _alterar_largura_endereco(self):
+        try:
+            largura = int(self.largura_endereco.get())
+        except ValueError:
+            largura = self.nucleo.largura_endereco
+        if self.executando or largura == self.nucleo.largura_endereco:
+            self.largura_endereco.set(str(self.nucleo.largura_endereco))
+            return
+        self._definir_largura_endereco(largura)
+        if self._montar_codigo():
+            self.mensagem_status.set(f"Memória de {self.nucleo.capacidade} bytes (endereços de {largura} bits).")
+
+    def _definir_largura_endereco(self, largura):
+        self.agendador.parar()
+        self.nucleo.definir_largura_endereco(largura)
+        self.montador.definir_largura_endereco(largura)
+        self.largura_endereco.set(str(largura))
+        self.rastro = RastroExecucao(CAPACIDADE_RASTRO, tamanho_memoria=self.nucleo.capacidade)
+        self.nucleo.rastro = self.rastro
+        if self.perfilador is not None:
+            self.perfilador.tamanho_memoria = self.nucleo.capacidade
+            self.perfilador.limpar()
+        self.historico.limpar()
+        self.endereco_para_linha = {}
+        self.renderizador.configurar_ram(self.nucleo.capacidade)
+        self._desenhar_cpu()
+        self._atualizar_tela()
+
+    def _alternar_turbo(self):
+        if self.modo_turbo.get():
+            self.agendador.descartar()
 
     def _executar_passo(self):
-        if self.nucleo.registradores['ContadorPrograma'] >= CAPACIDADE_MEMORIA:
+        if self.executando:
+            return False
+        self.agendador.descartar()
+
+        if self.nucleo.registradores['ContadorPrograma'] >= self.nucleo.capacidade:
             self.mensagem_status.set("Contador de Programa além do limite. Reinicie.")
-            self.executando = False
             self._limpar_destaques()
             return False
+        if self.nucleo.motivo_parada is not None:
+            self.mensagem_status.set(self._mensagem_parada())
+            return False
 
-        linha_editor = 1
-        instrucoes_executadas = 0
-        for i, linha in enumerate(self.area_texto.get("1.0", tk.END).split('\n')):
-            linha_limpa = linha.strip()
-            if linha_limpa and not linha_limpa.startswith(';'):
-                if instrucoes_executadas == self.nucleo.registradores['ContadorPrograma']:
-                    self._destacar_linha(i + 1)
-                    break
-                instrucoes_executadas += 1
-            linha_editor += 1
+        self._enfileirar_instrucao()
+        if self.modo_turbo.get():
+            self.agendador.descartar()
+        self.agendador.iniciar()
+        return self.nucleo.motivo_parada is None
 
-        self._piscar_relogio()
+    def _voltar_passo(self):
+        if self.executando:
+            return
+        self.agendador.descartar()
+        if not self.historico.voltar():
+            self.mensagem_status.set("Não há passo anterior guardado no histórico.")
+            return
+        self._mostrar_passo_do_historico(f"Voltou para o passo {self.historico.passo_atual}.")
 
-        # 1. CICLO DE BUSCA
-        self.mensagem_status.set(f"Busca (T1): CP ({self.nucleo.registradores['ContadorPrograma']:01X}) para REM")
-        self._animar_transferencia("bloco_cp", "bloco_rem")
-        self.nucleo.registradores['RegistradorEndereco'] = self.nucleo.registradores['ContadorPrograma']
+    def _ir_para_passo(self):
+        if self.executando:
+            return
+        try:
+            alvo = int(self.passo_alvo.get())
+        except ValueError:
+            self.mensagem_status.set("Informe o número do passo.")
+            return
+        self.agendador.descartar()
+        alcancado = self.historico.ir_para(max(0, alvo))
+        mensagem = f"No passo {alcancado}."
+        if alcancado != alvo:
+            mensagem += f" Histórico disponível: passos {self.historico.primeiro} a {self.historico.ultimo}."
+        self._mostrar_passo_do_historico(mensagem)
+
+    def _mostrar_passo_do_historico(self, mensagem):
+        self.passo_alvo.set(str(self.historico.passo_atual))
+        self.renderizador.configurar("bloco_ula_val", text="")
         self._atualizar_tela()
-        time.sleep(0.4 / self.velocidade_simulacao)
+        self._limpar_destaques()
+        # Destaca a próxima instrução a executar
+        self._destacar_linha_do_endereco(self.nucleo.estado.contador_programa)
+        self.mensagem_status.set(mensagem)
 
-        self.mensagem_status.set(f"Busca (T2): Incrementar CP ({self.nucleo.registradores['ContadorPrograma']:01X} -> {self.nucleo.registradores['ContadorPrograma']+1:01X})")
-        self._destacar_componente("bloco_cp")
-        self.nucleo.registradores['ContadorPrograma'] += 1
-        self._atualizar_tela()
-        time.sleep(0.4 / self.velocidade_simulacao)
+    def _enfileirar_instrucao(self, pausa_final=0.0):
+        """Executa uma instrução no núcleo e enfileira a animação de suas fases."""
+        estado = self.nucleo.estado.copy()
+        motivo = self.historico.avancar()
+        final = self.nucleo.estado.copy()
 
-        self.mensagem_status.set(f"Busca (T3): Memória[{self.nucleo.registradores['RegistradorEndereco']:01X}] para RI")
-        if 0 <= self.nucleo.registradores['RegistradorEndereco'] < CAPACIDADE_MEMORIA:
-            self.canvas_cpu.itemconfig(f"celula_ram_{self.nucleo.registradores['RegistradorEndereco']}", fill="#e74c3c")
-            self.canvas_cpu.update()
-            time.sleep(0.2 / self.velocidade_simulacao)
-            self._animar_transferencia("ram", "bloco_ri")
-            self.canvas_cpu.itemconfig(f"celula_ram_{self.nucleo.registradores['RegistradorEndereco']}", fill="#9b59b6")
+        self.agendador.quadro(linha=self.endereco_para_linha.get(estado.contador_programa))
+        self._piscar_relogio()
 
-        self.nucleo.registradores['RegistradorInstrucao'] = self.nucleo.memoria_principal[self.nucleo.registradores['RegistradorEndereco']]
-        self._atualizar_tela()
-        time.sleep(0.4 / self.velocidade_simulacao)
+        if self.nucleo.bytes_operando:
+            self._animar_instrucao_larga(estado, final)
+        else:
+            # Cada estado T é animado a partir da palavra de controle da ROM de microcódigo
+            sequenciador = SequenciadorSAP1(estado, rom_do_nucleo(self.nucleo))
+            while True:
+                antes = estado.copy()
+                ciclo = sequenciador.ciclo()
+                if ciclo is None:
+                    break
+                self._animar_microciclo(antes, ciclo, sequenciador.motivo_parada)
+                self._mostrar_estado(estado)
+                if sequenciador.t == 0:
+                    break
 
-        # 2. CICLO DE EXECUÇÃO
-        opcode = self.nucleo.registradores['RegistradorInstrucao'] >> 4
-        operando = self.nucleo.registradores['RegistradorInstrucao'] & 0x0F
+        if motivo == PARADA_OPCODE_INVALIDO:
+            opcode = estado.registrador_instrucao >> 4
+            erro = f"Opcode inválido: {opcode:04b} na instrução 0x{estado.registrador_instrucao:02X} no endereço 0x{estado.registrador_endereco:01X}."
+            self.agendador.quadro(mensagem="Erro: opcode inválido.", acao=lambda: self._mostrar_erro(erro))
+
+        self.agendador.quadro([("bloco_ula_val", {"text": ""})], estado=final, duracao=pausa_final, instrucoes=1)
+        return estado
+
+    def _mostrar_erro(self, mensagem):
+        messagebox.showerror("Erro", mensagem)
+
+    def _animar_instrucao_larga(self, estado, final):
+        """Animação resumida para endereços largos, que a ROM de microcódigo não descreve."""
+        endereco = estado.contador_programa
+        instrucao = self.nucleo.conjunto_instrucoes.get(final.registrador_instrucao >> 4)
+        nome = instrucao[0] if instrucao else "???"
+        self.agendador.quadro(mensagem=f"Busca: instrução em 0x{endereco:X}.")
+        self._animar_transferencia("cp", "rem")
+        self._animar_leitura_ram(endereco, "ri")
+        if nome not in INSTRUCOES_SEM_OPERANDO:
+            largura = self.nucleo.bytes_operando
+            operando = int.from_bytes(estado.memoria[endereco + 1:endereco + 1 + largura], "little")
+            self.agendador.quadro(mensagem=f"Execução {nome} 0x{operando:X}.")
+        else:
+            self.agendador.quadro(mensagem=f"Execução {nome}.")
+        self._destacar_componente("bloco_ri")
 
-        if opcode in self.nucleo.conjunto_instrucoes:
-            nome_instrucao, funcao = self.nucleo.conjunto_instrucoes[opcode]
-            self.mensagem_status.set(f"Executando: {nome_instrucao} 0x{operando:01X}")
+    def _animar_microciclo(self, antes, ciclo, motivo):
+        """Enfileira a animação de um estado T: quem dirige o barramento e quem carrega dele."""
+        micro = decodificar_palavra(ciclo.palavra)
+        sinais = " ".join(sinais_ativos(ciclo.palavra)) or "nenhum sinal ativo"
+        if ciclo.t <= 3:
+            fase = f"Busca (T{ciclo.t})"
+        else:
+            instrucao = self.nucleo.conjunto_instrucoes.get(antes.registrador_instrucao >> 4)
+            fase = f"Execução {instrucao[0] if instrucao else '???'} (T{ciclo.t})"
 
-            parar = funcao(operando)
-            self._atualizar_tela()
-            self.canvas_cpu.itemconfig("bloco_ula_val", text="")
-            return not parar
+        if motivo is not None and micro.fonte == FONTE_NENHUMA and not micro.destinos:
+            self.agendador.quadro(mensagem=f"{fase}: instrução decodificada, relógio parado.")
+            self._destacar_componente("bloco_ri")
+            return
+
+        destinos = [(bloco, nome) for destino, bloco, nome in CONTROLE_DESTINOS if micro.destinos & destino]
+        if micro.condicao is not None and not getattr(antes, micro.condicao):
+            # Desvio condicional não tomado: o CP não é carregado
+            destinos = [(bloco, nome) for bloco, nome in destinos if bloco != "bloco_cp"]
+            sinais += f" (flag {'Zero' if micro.condicao == 'flag_zero' else 'Carry'} desligada, sem desvio)"
+        if micro.fonte == FONTE_NENHUMA:
+            transferencia = "incrementa CP" if micro.incrementa_cp else "espera"
+        else:
+            origem = NOMES_FONTES[micro.fonte]
+            if micro.fonte == FONTE_RAM:
+                origem = f"Memória[{antes.registrador_endereco:01X}]"
+            nomes = ", ".join(f"Memória[{antes.registrador_endereco:01X}]" if bloco == "ram" else nome
+                              for bloco, nome in destinos)
+            transferencia = f"{origem} (0x{ciclo.barramento:02X}) -> {nomes or 'nenhum registrador'}"
+        self.agendador.quadro(mensagem=f"{fase}: {sinais} | {transferencia}")
+
+        if micro.fonte == FONTE_ULA:
+            self._animar_conexao_direta("bloco_acc", "bloco_ula", "conexao_acc_alu")
+            self._animar_conexao_direta("bloco_regb", "bloco_ula", "conexao_regb_alu")
+            self.agendador.quadro([("bloco_ula_val", {"text": f"0x{ciclo.barramento:02X}", "font": ('Consolas', 11)})])
+            self._destacar_componente("bloco_ula")
+
+        for bloco, _ in destinos:
+            if micro.fonte == FONTE_RAM:
+                self._animar_leitura_ram(antes.registrador_endereco, bloco)
+            elif bloco == "ram":
+                self._animar_escrita_ram(BLOCOS_FONTES[micro.fonte], antes.registrador_endereco)
+            else:
+                self._animar_transferencia(BLOCOS_FONTES[micro.fonte], bloco)
+
+        if micro.incrementa_cp:
+            self._destacar_componente("bloco_cp")
+
+    def _atualizar_velocidade(self, valor):
+        valor = float(valor)
+        if valor > ESCALA_IPS_MAXIMA:
+            self.ips_alvo = None
+            self.rotulo_velocidade.set("Velocidade: ilimitada")
         else:
-            messagebox.showerror("Erro", f"Opcode inválido: {opcode:04b} na instrução 0x{self.nucleo.registradores['RegistradorInstrucao']:02X} no endereço 0x{self.nucleo.registradores['RegistradorEndereco']:01X}.")
+            self.ips_alvo = 10 ** valor
+            self.rotulo_velocidade.set(f"Velocidade: {self.ips_alvo:.0f} instruções/s")
+        self.agendador.ips_alvo = self.ips_alvo
+
+    def _mostrar_ips(self, ips):
+        self.mensagem_ips.set(f"{ips:,.1f} instr/s")
+
+    def _alternar_perfilador(self):
+        if self.perfilar.get():
+            self.perfilador = PerfiladorSAP1(self.nucleo.capacidade)
+            self.nucleo.perfilador = self.perfilador
+            self.perfilador.instrumentar(self, METODOS_PERFILADOS)
+            self.perfilador.instrumentar(self.agendador, ("_exibir", "ao_desenhar_estado"))
+            self.mensagem_status.set("Perfilador ligado.")
+        elif self.perfilador is not None:
+            # Os dados continuam disponíveis para "Salvar Perfil..." até ligar de novo
+            self.nucleo.perfilador = None
+            self.perfilador.desinstrumentar()
+            self.mensagem_status.set(f"Perfilador desligado ({self.perfilador.total_instrucoes} instruções medidas).")
+
+    def _salvar_perfil(self):
+        if self.perfilador is None:
+            messagebox.showinfo("Perfil", "Ligue o perfilador e execute um programa primeiro.")
+            return
+        caminho = filedialog.asksaveasfilename(defaultextension=".json", filetypes=[("JSON", "*.json")])
+        if caminho:
+            self.perfilador.salvar_json(caminho)
+            self.mensagem_status.set(f"Perfil salvo em {caminho}.")
+
+    def _salvar_rastro(self):
+        if not len(self.rastro):
+            messagebox.showinfo("Rastro", "Nenhuma instrução executada desde a última montagem.")
+            return
+        caminho = filedialog.asksaveasfilename(defaultextension=".trc", filetypes=[("Rastro SAP-1", "*.trc")])
+        if caminho:
+            self.rastro.salvar(caminho)
+            self.mensagem_status.set(f"Rastro salvo: {len(self.rastro)} fases.")
+
+    def _escolher_rastro(self):
+        caminho = filedialog.askopenfilename(filetypes=[("Rastro SAP-1", "*.trc"), ("Todos", "*")])
+        if caminho:
+            self.reproduzir_rastro(caminho)
+
+    def _escolher_imagem(self):
+        caminho = filedialog.askopenfilename(filetypes=[("Imagem binária", "*.bin"), ("Intel HEX", "*.hex *.ihx"),
+                                                        ("Todos", "*")])
+        if caminho:
+            self.abrir_imagem(caminho)
+
+    def abrir_imagem(self, caminho):
+        """Carrega uma imagem binária ou Intel HEX no editor, como um fonte que monta os mesmos bytes."""
+        if self.executando:
+            return
+        try:
+            if not caminho.lower().endswith(EXTENSOES_INTEL_HEX):
+                # Uma imagem crua diz pelo tamanho quantos bits de endereço a memória tem
+                largura = largura_da_imagem(os.path.getsize(caminho))
+                if largura is not None and largura != self.nucleo.largura_endereco:
+                    self._definir_largura_endereco(largura)
+            memoria = carregar_imagem(caminho, self.nucleo.largura_endereco)
+        except (OSError, ValueError) as e:
+            messagebox.showerror("Erro", f"Falha ao abrir imagem: {str(e)}")
+            return
+        self.area_texto.delete(1.0, tk.END)
+        self.area_texto.insert(1.0, desmontar(memoria, self.nucleo.estendido, self.nucleo.largura_endereco))
+        if self._montar_codigo():
+            self.mensagem_status.set(f"Imagem de {len(memoria)} bytes carregada de {os.path.basename(caminho)}.")
+
+    def _salvar_imagem(self):
+        programa, erros = self.montador.montar(self.area_texto.get(1.0, tk.END))
+        if erros:
+            self._marcar_erros(erros)
+            messagebox.showerror("Erro", "Corrija os erros de montagem antes de salvar a imagem.")
+            return
+        caminho = filedialog.asksaveasfilename(defaultextension=".bin",
+                                               filetypes=[("Imagem binária", "*.bin"), ("Intel HEX", "*.hex")])
+        if caminho:
+            try:
+                salvar_imagem(caminho, programa.memoria)
+            except OSError as e:
+                messagebox.showerror("Erro", f"Falha ao salvar imagem: {str(e)}")
+                return
+            self.mensagem_status.set(f"Imagem salva em {os.path.basename(caminho)}.")
+
+    def reproduzir_rastro(self, caminho):
+        """Reproduz no canvas um rastro gravado, fase a fase, na velocidade selecionada."""
+        if self.executando:
+            return
+        try:
+            leitor = LeitorRastro(caminho)
+        except (OSError, ValueError) as e:
+            messagebox.showerror("Erro", f"Falha ao abrir rastro: {str(e)}")
+            return
+        largura = leitor.tamanho_memoria.bit_length() - 1
+        if (leitor.tamanho_memoria != 1 << largura
+                or not LARGURA_ENDERECO_PADRAO <= largura <= LARGURA_ENDERECO_MAXIMA):
+            leitor.fechar()
+            messagebox.showerror("Erro", f"Rastro gravado com memória de {leitor.tamanho_memoria} bytes.")
+            return
+        if largura != self.nucleo.largura_endereco:
+            self._definir_largura_endereco(largura)
+
+        self.agendador.parar()
+        self._limpar_destaques()
+        self.executando = True
+        estados = leitor.estados()
+
+        def produzir():
+            if not self.executando:
+                return False
+            enfileirou = False
+            for registro, estado in estados:
+                fim_instrucao = registro.fase == FASE_EXECUCAO
+                mensagem = (f"Rastro #{registro.sequencia} ({NOMES_FASES.get(registro.fase, '?')}): "
+                            f"RI=0x{registro.registrador_instrucao:02X} ACC=0x{registro.acumulador:02X}")
+                self.agendador.quadro(estado=estado, mensagem=mensagem,
+                                      duracao=0.5 if fim_instrucao else 0.3, instrucoes=int(fim_instrucao))
+                enfileirou = True
+                if fim_instrucao:
+                    return True
+            return enfileirou
+
+        def terminar():
             self.executando = False
-            self._limpar_destaques()
-            return False
+            estados.close()
+            leitor.fechar()
+            self.mensagem_status.set(f"Reprodução concluída ({len(leitor)} fases).")
 
-    def _executar_car(self, operando):
-        self.mensagem_status.set(f"Execução CAR: Carregar Mem[{operando:01X}] no ACC")
-        self._destacar_componente("bloco_ri")
-        self._animar_transferencia("bloco_ri", "bloco_rem")
-        self.nucleo.registradores['RegistradorEndereco'] = operando
-        self._atualizar_tela()
-        time.sleep(0.4 / self.velocidade_simulacao)
+        self.mensagem_status.set(f"Reproduzindo rastro com {len(leitor)} fases...")
+        self.agendador.ao_esvaziar = produzir
+        self.agendador.ao_terminar = terminar
+        self.agendador.iniciar()
 
-        self.mensagem_status.set(f"Execução CAR: Memória[{self.nucleo.registradores['RegistradorEndereco']:01X}] para ACC")
-        if 0 <= self.nucleo.registradores['RegistradorEndereco'] < CAPACIDADE_MEMORIA:
-            self.canvas_cpu.itemconfig(f"celula_ram_{self.nucleo.registradores['RegistradorEndereco']}", fill="#e74c3c")
-            self.canvas_cpu.update()
-            time.sleep(0.2 / self.velocidade_simulacao)
-            self._animar_transferencia("ram", "bloco_acc")
-            self.canvas_cpu.itemconfig(f"celula_ram_{self.nucleo.registradores['RegistradorEndereco']}", fill="#9b59b6")
+class _VariavelSemJanela:
+    # Faz o papel de tk.StringVar/BooleanVar, que exigem uma janela Tk
+    def __init__(self, valor=None):
+        self._valor = valor
 
-        self.nucleo.registradores['Acumulador'] = self.nucleo.memoria_principal[self.nucleo.registradores['RegistradorEndereco']]
-        self._atualizar_tela()
-        time.sleep(0.4 / self.velocidade_simulacao)
+    def get(self):
+        return self._valor
 
-        return False
+    def set(self, valor):
+        self._valor = valor
 
-    def _executar_som(self, operando):
-        self.mensagem_status.set(f"Execução SOM: Somar Mem[{operando:01X}] ao ACC")
-        self._destacar_componente("bloco_ri")
-        self._animar_transferencia("bloco_ri", "bloco_rem")
-        self.nucleo.registradores['RegistradorEndereco'] = operando
-        self._atualizar_tela()
-        time.sleep(0.4 / self.velocidade_simulacao)
-
-        self.mensagem_status.set(f"Execução SOM: Memória[{self.nucleo.registradores['RegistradorEndereco']:01X}] para Reg B")
-        if 0 <= self.nucleo.registradores['RegistradorEndereco'] < CAPACIDADE_MEMORIA:
-            self.canvas_cpu.itemconfig(f"celula_ram_{self.nucleo.registradores['RegistradorEndereco']}", fill="#e74c3c")
-            self.canvas_cpu.update()
-            time.sleep(0.2 / self.velocidade_simulacao)
-            self._animar_transferencia("ram", "bloco_regb")
-            self.canvas_cpu.itemconfig(f"celula_ram_{self.nucleo.registradores['RegistradorEndereco']}", fill="#9b59b6")
-        self.nucleo.registradores['RegistradorB'] = self.nucleo.memoria_principal[self.nucleo.registradores['RegistradorEndereco']]
-        self._atualizar_tela()
-        time.sleep(0.4 / self.velocidade_simulacao)
 
-        self.mensagem_status.set("Execução SOM: ACC + Reg B -> ULA -> ACC")
-        self._animar_conexao_direta("bloco_acc", "bloco_ula", "conexao_acc_alu")
-        self._animar_conexao_direta("bloco_regb", "bloco_ula", "conexao_regb_alu")
+class _EventosSemJanela:
+    """Fila de callbacks no lugar de after()/after_idle() do Tk; processar() roda tudo sem esperar as pausas."""
 
-        resultado = (self.nucleo.registradores['Acumulador'] + self.nucleo.registradores['RegistradorB']) & 0xFF
-        self.canvas_cpu.itemconfig("bloco_ula_val", text=f"0x{resultado:02X}", font=('Consolas', 11))
-        self._destacar_componente("bloco_ula")
-        self._animar_transferencia("bloco_ula", "bloco_acc")
+    def __init__(self):
+        self._pendentes = collections.OrderedDict()
+        self._proximo = 0
 
-        self.nucleo.registradores['Acumulador'] = resultado
-        self._atualizar_tela()
-        time.sleep(0.4 / self.velocidade_simulacao)
+    def after(self, _milissegundos, funcao):
+        self._proximo += 1
+        self._pendentes[self._proximo] = funcao
+        return self._proximo
 
-        return False
+    def after_idle(self, funcao):
+        return self.after(0, funcao)
 
-    def _executar_sub(self, operando):
-        self.mensagem_status.set(f"Execução SUB: Subtrair Mem[{operando:01X}] do ACC")
-        self._destacar_componente("bloco_ri")
-        self._animar_transferencia("bloco_ri", "bloco_rem")
-        self.nucleo.registradores['RegistradorEndereco'] = operando
-        self._atualizar_tela()
-        time.sleep(0.4 / self.velocidade_simulacao)
-
-        self.mensagem_status.set(f"Execução SUB: Memória[{self.nucleo.registradores['RegistradorEndereco']:01X}] para Reg B")
-        if 0 <= self.nucleo.registradores['RegistradorEndereco'] < CAPACIDADE_MEMORIA:
-            self.canvas_cpu.itemconfig(f"celula_ram_{self.nucleo.registradores['RegistradorEndereco']}", fill="#e74c3c")
-            self.canvas_cpu.update()
-            time.sleep(0.2 / self.velocidade_simulacao)
-            self._animar_transferencia("ram", "bloco_regb")
-            self.canvas_cpu.itemconfig(f"celula_ram_{self.nucleo.registradores['RegistradorEndereco']}", fill="#9b59b6")
-        self.nucleo.registradores['RegistradorB'] = self.nucleo.memoria_principal[self.nucleo.registradores['RegistradorEndereco']]
-        self._atualizar_tela()
-        time.sleep(0.4 / self.velocidade_simulacao)
+    def after_cancel(self, identificador):
+        self._pendentes.pop(identificador, None)
 
-        self.mensagem_status.set("Execução SUB: ACC - Reg B -> ULA -> ACC")
-        self._animar_conexao_direta("bloco_acc", "bloco_ula", "conexao_acc_alu")
-        self._animar_conexao_direta("bloco_regb", "bloco_ula", "conexao_regb_alu")
+    def processar(self):
+        while self._pendentes:
+            _, funcao = self._pendentes.popitem(last=False)
+            funcao()
 
-        resultado = (self.nucleo.registradores['Acumulador'] - self.nucleo.registradores['RegistradorB']) & 0xFF
-        self.canvas_cpu.itemconfig("bloco_ula_val", text=f"0x{resultado:02X}", font=('Consolas', 11))
-        self._destacar_componente("bloco_ula")
-        self._animar_transferencia("bloco_ula", "bloco_acc")
 
-        self.nucleo.registradores['Acumulador'] = resultado
-        self._atualizar_tela()
-        time.sleep(0.4 / self.velocidade_simulacao)
+class AplicativoSemJanela(AplicativoSimulador):
+    """O caminho de execução da interface sem Tk nem widgets, desenhando em `canvas`.
 
-        return False
+    Núcleo com rastro, histórico, animação pela ROM de microcódigo, agendador e
+    renderizador são os mesmos da janela; `canvas` só precisa dos métodos de
+    desenho (ex.: desempenho.CanvasFicticio). Os quadros rodam em
+    processar_eventos() e as mensagens de erro ficam em `erros`. É o motor
+    "interface" do teste diferencial (diferencial.py).
+    """
 
-    def _executar_sai(self, _):
-        self.mensagem_status.set("Execução SAI: ACC para Registrador de Saída")
-        self._destacar_componente("bloco_acc")
-        self._animar_transferencia("bloco_acc", "bloco_saida")
+    def __init__(self, canvas, estendido=False, largura_endereco=LARGURA_ENDERECO_PADRAO):
+        self.janela_principal = _EventosSemJanela()
+        self.nucleo = NucleoSAP1()
+        self.rastro = RastroExecucao(CAPACIDADE_RASTRO)
+        self.nucleo.rastro = self.rastro
+        self.historico = HistoricoExecucao(self.nucleo)
+        self.perfilador = None
+        self.executando = False
+        self.ips_alvo = 1.0
+        self.linha_codigo_atual = -1
+        self.endereco_para_linha = {}
+        self.montador = MontadorIncremental()
+        self.modo_turbo = _VariavelSemJanela(False)
+        self.largura_endereco = _VariavelSemJanela(str(LARGURA_ENDERECO_PADRAO))
+        self.mensagem_status = _VariavelSemJanela("Pronto.")
+        self.erros = []
+
+        self.canvas_cpu = canvas
+        self.renderizador = RenderizadorCPU(canvas)
+        self.agendador = AgendadorAnimacao(self.janela_principal, self.renderizador, self._desenhar_estado,
+                                           self.mensagem_status.set, self._destacar_linha)
+        self._desenhar_cpu()
+        if largura_endereco != LARGURA_ENDERECO_PADRAO:
+            self._definir_largura_endereco(largura_endereco)
+        self.nucleo.usar_conjunto_estendido(estendido)
+        self.reiniciar_simulador()
 
-        self.nucleo.registradores['RegistradorSaida'] = self.nucleo.registradores['Acumulador']
+    def carregar_memoria(self, memoria):
+        """Como reiniciar e abrir uma imagem: a execução recomeça do passo 0 com esta memória."""
+        self.reiniciar_simulador()
+        self.nucleo.carregar_programa(memoria)
+        self.rastro.limpar()
+        self.historico.limpar()
+        self.erros = []
         self._atualizar_tela()
-        time.sleep(0.4 / self.velocidade_simulacao)
 
-        return False
+    def processar_eventos(self):
+        self.janela_principal.processar()
 
-    def _executar_par(self, _):
-        self.mensagem_status.set("Execução parada (instrução PAR encontrada).")
-        self._destacar_componente("bloco_ri")
-        self.executando = False
-        return True
+    def _criar_barra_ram(self, x, y, altura):
+        self.barra_ram = None
 
-    def _atualizar_velocidade(self, valor):
-        self.velocidade_simulacao = float(valor)
+    def _mostrar_erro(self, mensagem):
+        self.erros.append(mensagem)
 
-if __name__ == "__main__":
+    # Sem editor de código não há linhas a destacar
+    def _destacar_linha(self, linha):
+        self.linha_codigo_atual = linha
+
+    def _limpar_destaques(self):
+        self.linha_codigo_atual = -1
+
+
+def principal(rastro=None):
     janela = tk.Tk()
     app = AplicativoSimulador(janela)
-    janela.mainloop()
\ No newline at end of file
+    if rastro is not None:
+        app.reproduzir_rastro(rastro)
+    janela.mainloop()
+
+if __name__ == "__main__":
+    principal()
\ No newline at end of file
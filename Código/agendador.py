@@ -0,0 +1,199 @@
+import collections
+import time
+
+# alteracoes: sequência de (alvo, {opção: valor}) aplicada via RenderizadorCPU.configurar
+# estado: EstadoSAP1 a desenhar; mensagem: texto da barra de status; linha: linha do editor a destacar
+# acao: função chamada quando o quadro é exibido; duracao: pausa nominal em segundos após o quadro
+# instrucoes: quantas instruções terminam neste quadro (marca o fim do grupo de uma instrução)
+Quadro = collections.namedtuple("Quadro", ["alteracoes", "estado", "mensagem", "linha", "acao", "duracao", "instrucoes"])
+
+FATOR_MEDIA = 0.2  # peso da última medição na média móvel do custo de desenho
+JANELA_IPS = 1.0  # segundos entre atualizações da taxa medida
+
+
+class AgendadorAnimacao:
+    """Fila de quadros de animação consumida pelo laço de eventos do Tk via after().
+
+    O núcleo executa à frente da tela e enfileira os quadros de cada instrução;
+    nada aqui dorme nem chama update(). Quando a fila esvazia, `ao_esvaziar` é
+    chamado para produzir a próxima instrução (deve devolver False ao terminar).
+
+    A velocidade é uma meta em instruções por segundo (`ips_alvo`, None para
+    ilimitado). Ao começar cada instrução, suas pausas nominais são escaladas
+    para caber no orçamento de 1/ips_alvo e, se o custo medido de desenhar os
+    quadros não couber, fases consecutivas são mescladas em menos quadros.
+    """
+
+    def __init__(self, widget, renderizador, ao_desenhar_estado, ao_mensagem, ao_destacar_linha, ao_medir_ips=None):
+        self.widget = widget
+        self.renderizador = renderizador
+        self.ao_desenhar_estado = ao_desenhar_estado
+        self.ao_mensagem = ao_mensagem
+        self.ao_destacar_linha = ao_destacar_linha
+        self.ao_medir_ips = ao_medir_ips
+        self.ao_esvaziar = None
+        self.ao_terminar = None
+        self.ips_alvo = 1.0
+        self.custo_quadro = 0.0
+        self.ips_medido = 0.0
+        self._fila = collections.deque()
+        self._agendado = None
+        self._restantes_grupo = 0
+        self._instrucoes_janela = 0
+        self._inicio_janela = time.perf_counter()
+
+    @property
+    def ocupado(self):
+        return bool(self._fila) or self._agendado is not None
+
+    def quadro(self, alteracoes=(), estado=None, mensagem=None, linha=None, acao=None, duracao=0.0, instrucoes=0):
+        self._fila.append(Quadro(tuple(alteracoes), estado, mensagem, linha, acao, duracao, instrucoes))
+
+    def instrucoes_por_lote(self):
+        """Quantas instruções o produtor deve executar por quadro exibido (None: fatia de tempo livre)."""
+        if self.ips_alvo is None:
+            return None
+        return max(1, int(self.ips_alvo * self.custo_quadro))
+
+    def iniciar(self):
+        if self._agendado is None:
+            self._inicio_janela = time.perf_counter()
+            self._instrucoes_janela = 0
+            self._agendado = self.widget.after_idle(self._proximo_quadro)
+
+    def parar(self):
+        # Interrompe a reprodução e descarta os quadros pendentes sem exibi-los
+        if self._agendado is not None:
+            self.widget.after_cancel(self._agendado)
+            self._agendado = None
+        self._fila.clear()
+        self._restantes_grupo = 0
+        self.ao_esvaziar = None
+        self.ao_terminar = None
+
+    def descartar(self):
+        """Modo turbo: aplica de uma vez o efeito final dos quadros pendentes."""
+        if not self._fila:
+            return
+        quadro = self._mesclar(list(self._fila), 0.0)
+        self._fila.clear()
+        self._restantes_grupo = 0
+        self._exibir(quadro)
+
+    @staticmethod
+    def _mesclar(quadros, duracao):
+        finais = {}
+        estado = mensagem = linha = None
+        acoes = []
+        instrucoes = 0
+        for quadro in quadros:
+            for alvo, opcoes in quadro.alteracoes:
+                for opcao, valor in opcoes.items():
+                    finais[(alvo, opcao)] = valor
+            estado = quadro.estado if quadro.estado is not None else estado
+            mensagem = quadro.mensagem if quadro.mensagem is not None else mensagem
+            linha = quadro.linha if quadro.linha is not None else linha
+            if quadro.acao is not None:
+                acoes.append(quadro.acao)
+            instrucoes += quadro.instrucoes
+
+        alteracoes = collections.defaultdict(dict)
+        for (alvo, opcao), valor in finais.items():
+            alteracoes[alvo][opcao] = valor
+
+        acao = None
+        if len(acoes) == 1:
+            acao = acoes[0]
+        elif acoes:
+            def acao():
+                for funcao in acoes:
+                    funcao()
+        return Quadro(tuple(alteracoes.items()), estado, mensagem, linha, acao, duracao, instrucoes)
+
+    def _planejar_grupo(self):
+        # Converte as pausas nominais da próxima instrução em pausas reais dentro do orçamento
+        grupo = []
+        while self._fila:
+            quadro = self._fila.popleft()
+            grupo.append(quadro)
+            if quadro.instrucoes:
+                break
+
+        instrucoes = sum(quadro.instrucoes for quadro in grupo) or 1
+        if self.ips_alvo is None:
+            planejado = [self._mesclar(grupo, 0.0)]
+        else:
+            orcamento = instrucoes / self.ips_alvo
+            maximo = len(grupo)
+            if self.custo_quadro > 0:
+                maximo = max(1, min(maximo, int(orcamento / self.custo_quadro)))
+            if maximo < len(grupo):
+                tamanho = -(-len(grupo) // maximo)
+                grupo = [self._mesclar(grupo[i:i + tamanho], sum(q.duracao for q in grupo[i:i + tamanho]))
+                         for i in range(0, len(grupo), tamanho)]
+
+            livre = max(0.0, orcamento - self.custo_quadro * len(grupo))
+            nominal = sum(quadro.duracao for quadro in grupo)
+            if nominal > 0:
+                escala = livre / nominal
+                planejado = [quadro._replace(duracao=quadro.duracao * escala) for quadro in grupo]
+            else:
+                planejado = grupo[:-1] + [grupo[-1]._replace(duracao=livre)]
+
+        self._fila.extendleft(reversed(planejado))
+        self._restantes_grupo = len(planejado)
+
+    def _exibir(self, quadro):
+        inicio = time.perf_counter()
+        for alvo, opcoes in quadro.alteracoes:
+            self.renderizador.configurar(alvo, **opcoes)
+        if quadro.estado is not None:
+            self.ao_desenhar_estado(quadro.estado)
+        if quadro.mensagem is not None:
+            self.ao_mensagem(quadro.mensagem)
+        if quadro.linha is not None:
+            self.ao_destacar_linha(quadro.linha)
+        if quadro.acao is not None:
+            quadro.acao()
+        fim = time.perf_counter()
+        self.custo_quadro += FATOR_MEDIA * ((fim - inicio) - self.custo_quadro)
+
+        if quadro.instrucoes:
+            self._instrucoes_janela += quadro.instrucoes
+            if fim - self._inicio_janela >= JANELA_IPS:
+                self._fechar_janela_ips(fim)
+
+    def _fechar_janela_ips(self, agora=None):
+        agora = time.perf_counter() if agora is None else agora
+        decorrido = agora - self._inicio_janela
+        if self._instrucoes_janela and decorrido > 0:
+            self.ips_medido = self._instrucoes_janela / decorrido
+            if self.ao_medir_ips is not None:
+                self.ao_medir_ips(self.ips_medido)
+        self._instrucoes_janela = 0
+        self._inicio_janela = agora
+
+    def _proximo_quadro(self):
+        self._agendado = None
+        if not self._fila and not (self.ao_esvaziar is not None and self.ao_esvaziar()):
+            self._fechar_janela_ips()
+            self.ao_esvaziar = None
+            ao_terminar, self.ao_terminar = self.ao_terminar, None
+            if ao_terminar is not None:
+                ao_terminar()
+            return
+
+        atraso = 0.0
+        while self._fila and atraso <= 0:
+            if self._restantes_grupo <= 0:
+                self._planejar_grupo()
+            quadro = self._fila.popleft()
+            self._restantes_grupo -= 1
+            self._exibir(quadro)
+            atraso = quadro.duracao
+
+        milissegundos = int(1000 * atraso)
+        if milissegundos > 0:
+            self._agendado = self.widget.after(milissegundos, self._proximo_quadro)
+        else:
+            self._agendado = self.widget.after_idle(self._proximo_quadro)
@@ -0,0 +1,142 @@
+import collections
+import sqlite3
+
+from nucleo_sap1 import EstadoSAP1, ResultadoExecucao, resultado_dentro_do_limite
+
+CAPACIDADE_PADRAO = 65536
+GRAVACOES_POR_COMMIT = 256
+PREFIXO_ESTENDIDO = b"E"
+# A tabela leva a versão de EstadoSAP1.empacotar (v2: CP de 32 bits); bancos antigos são ignorados
+
+# Resultado guardado para uma imagem: saída, passos, motivo de parada e estado final da máquina
+EntradaCache = collections.namedtuple("EntradaCache", ["resultado", "estado"])
+
+
+class CacheResultados:
+    """Cache LRU de execuções completas, indexado pelos bytes da imagem de memória.
+
+    Uma execução a partir do estado inicial (registradores zerados, como após
+    NucleoSAP1.reiniciar) depende apenas da memória, então um acerto restaura o
+    estado final no próprio núcleo sem executar nada. Com `arquivo`, as entradas
+    também são gravadas em um banco SQLite local e sobrevivem a reinícios.
+    """
+
+    def __init__(self, capacidade=CAPACIDADE_PADRAO, arquivo=None):
+        if capacidade < 1:
+            raise ValueError("A capacidade do cache deve ser pelo menos 1.")
+        self.capacidade = capacidade
+        self.acertos = 0
+        self.acertos_disco = 0
+        self.falhas = 0
+        self.despejos = 0
+        self._entradas = collections.OrderedDict()
+        self._banco = None
+        self._gravacoes_pendentes = 0
+        if arquivo is not None:
+            self._banco = sqlite3.connect(arquivo)
+            self._banco.execute("CREATE TABLE IF NOT EXISTS resultados_v2 ("
+                                "imagem BLOB PRIMARY KEY, saida INTEGER, passos INTEGER, motivo TEXT, estado BLOB)")
+
+    def __len__(self):
+        return len(self._entradas)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *_):
+        self.fechar()
+
+    def obter(self, imagem):
+        chave = bytes(imagem)
+        entrada = self._entradas.get(chave)
+        if entrada is not None:
+            self._entradas.move_to_end(chave)
+            self.acertos += 1
+            return entrada
+
+        if self._banco is not None:
+            linha = self._banco.execute("SELECT saida, passos, motivo, estado FROM resultados_v2 WHERE imagem = ?",
+                                        (chave,)).fetchone()
+            if linha is not None:
+                saida, passos, motivo, estado = linha
+                entrada = EntradaCache(ResultadoExecucao(saida, passos, motivo), EstadoSAP1.desempacotar(estado))
+                self._inserir(chave, entrada)
+                self.acertos_disco += 1
+                return entrada
+
+        self.falhas += 1
+        return None
+
+    def guardar(self, imagem, resultado, estado):
+        chave = bytes(imagem)
+        entrada = EntradaCache(resultado, estado.copy())
+        self._inserir(chave, entrada)
+        if self._banco is not None:
+            self._banco.execute("INSERT OR REPLACE INTO resultados_v2 VALUES (?, ?, ?, ?, ?)",
+                                (chave, resultado.saida, resultado.passos, resultado.motivo_parada,
+                                 estado.empacotar()))
+            self._gravacoes_pendentes += 1
+            if self._gravacoes_pendentes >= GRAVACOES_POR_COMMIT:
+                self.sincronizar()
+        return entrada
+
+    def _inserir(self, chave, entrada):
+        self._entradas[chave] = entrada
+        self._entradas.move_to_end(chave)
+        while len(self._entradas) > self.capacidade:
+            self._entradas.popitem(last=False)
+            self.despejos += 1
+
+    def executar(self, nucleo, max_passos=None):
+        """Equivalente a nucleo.executar(max_passos), reaproveitando execuções já vistas.
+
+        Só consulta o cache com o núcleo no estado inicial (nucleo.em_estado_inicial()):
+        prepare cada imagem com nucleo.reiniciar(memoria). carregar_programa volta só
+        o CP a 0 e mantém os demais registradores da execução anterior, e nesse caso
+        a imagem é executada sem cache.
+        """
+        if not nucleo.em_estado_inicial() or nucleo.rastro is not None or nucleo.perfilador is not None:
+            return nucleo.executar(max_passos)
+
+        imagem = bytes(nucleo.memoria_principal)
+        if nucleo.estendido:
+            # A mesma imagem tem outro resultado no modo estendido; o prefixo separa as chaves
+            imagem = PREFIXO_ESTENDIDO + imagem
+        entrada = self.obter(imagem)
+        if entrada is not None:
+            resultado = entrada.resultado
+            if resultado_dentro_do_limite(resultado.passos, resultado.motivo_parada, max_passos):
+                nucleo.restaurar(entrada.estado, resultado.motivo_parada)
+                return resultado
+            return nucleo.executar(max_passos)
+
+        resultado = nucleo.executar(max_passos)
+        if nucleo.motivo_parada is not None:
+            self.guardar(imagem, resultado, nucleo.estado)
+        return resultado
+
+    def estatisticas(self):
+        consultas = self.acertos + self.acertos_disco + self.falhas
+        return {
+            "tamanho": len(self._entradas),
+            "capacidade": self.capacidade,
+            "acertos": self.acertos,
+            "acertos_disco": self.acertos_disco,
+            "falhas": self.falhas,
+            "despejos": self.despejos,
+            "taxa_acerto": (self.acertos + self.acertos_disco) / consultas if consultas else 0.0,
+        }
+
+    def limpar(self):
+        self._entradas.clear()
+
+    def sincronizar(self):
+        if self._banco is not None:
+            self._banco.commit()
+            self._gravacoes_pendentes = 0
+
+    def fechar(self):
+        if self._banco is not None:
+            self.sincronizar()
+            self._banco.close()
+            self._banco = None
@@ -0,0 +1,125 @@
+import collections
+import functools
+
+from nucleo_sap1 import (NucleoSAP1, CAPACIDADE_MEMORIA, PARADA_PAR, PARADA_FIM_MEMORIA,
+                         PARADA_OPCODE_INVALIDO, ResultadoExecucao, resultado_dentro_do_limite)
+
+# Sem saltos nem escrita em memória, a execução de uma imagem é uma linha reta
+# do endereço 0 até PAR, um opcode inválido ou o fim da memória. O compilador
+# traduz essa linha reta em uma função Python e guarda o resultado em cache.
+
+TAMANHO_CACHE = 4096
+
+OPCODES_BASE = {0b0000: "CAR", 0b0001: "SOM", 0b0010: "SUB", 0b1110: "SAI", 0b1111: "PAR"}
+
+ProgramaCompilado = collections.namedtuple("ProgramaCompilado", ["fonte", "funcao", "passos", "motivo_parada"])
+
+
+def _prefixo_executado(imagem):
+    # Palavras buscadas a partir do endereço 0 e o motivo de parada
+    for endereco, palavra in enumerate(imagem):
+        nome = OPCODES_BASE.get(palavra >> 4)
+        if nome is None:
+            return imagem[:endereco + 1], PARADA_OPCODE_INVALIDO
+        if nome == "PAR":
+            return imagem[:endereco + 1], PARADA_PAR
+    return imagem, PARADA_FIM_MEMORIA
+
+
+def gerar_fonte(prefixo):
+    """Gera o código de uma função f(m) -> (CP, REM, RI, ACC, B, SAIDA) para o prefixo dado.
+
+    Endereços dentro do prefixo são constantes; os demais são lidos de `m`.
+    """
+    linhas = ["def programa(m):"]
+    lidos = {}
+
+    def ler(endereco):
+        if endereco < len(prefixo):
+            return prefixo[endereco]
+        if endereco not in lidos:
+            lidos[endereco] = f"d{endereco:X}"
+            linhas.append(f"    d{endereco:X} = m[{endereco}]")
+        return lidos[endereco]
+
+    acc, b, saida = 0, 0, 0
+    rem = 0
+    for endereco, palavra in enumerate(prefixo):
+        opcode, operando = palavra >> 4, palavra & 0x0F
+        nome = OPCODES_BASE.get(opcode)
+        rem = endereco
+        if nome == "CAR":
+            rem = operando
+            acc = ler(operando)
+        elif nome in ("SOM", "SUB"):
+            rem = operando
+            b = ler(operando)
+            sinal = "+" if nome == "SOM" else "-"
+            if isinstance(acc, int) and isinstance(b, int):
+                acc = (acc + b if nome == "SOM" else acc - b) & 0xFF
+            else:
+                linhas.append(f"    acc = ({acc} {sinal} {b}) & 0xFF")
+                acc = "acc"
+        elif nome == "SAI":
+            if isinstance(acc, int):
+                saida = acc
+            else:
+                linhas.append(f"    saida = {acc}")
+                saida = "saida"
+
+    ri = prefixo[-1] if prefixo else 0
+    linhas.append(f"    return ({len(prefixo)}, {rem}, {ri}, {acc}, {b}, {saida})")
+    return "\n".join(linhas) + "\n"
+
+
+@functools.lru_cache(maxsize=TAMANHO_CACHE)
+def _compilar_prefixo(prefixo, motivo_parada):
+    fonte = gerar_fonte(prefixo)
+    escopo = {}
+    exec(compile(fonte, "<sap1-jit>", "exec"), escopo)
+    return ProgramaCompilado(fonte, escopo["programa"], len(prefixo), motivo_parada)
+
+
+def compilar(imagem):
+    """Compila a imagem; imagens com o mesmo código executado compartilham a função gerada."""
+    imagem = bytes(imagem)
+    if len(imagem) != CAPACIDADE_MEMORIA:
+        raise ValueError(f"Imagem de memória deve ter {CAPACIDADE_MEMORIA} bytes.")
+    return _compilar_prefixo(*_prefixo_executado(imagem))
+
+
+@functools.lru_cache(maxsize=TAMANHO_CACHE)
+def _estado_final(imagem):
+    programa = compilar(imagem)
+    return programa, programa.funcao(imagem)
+
+
+def _pode_compilar(nucleo):
+    # Só é seguro partir de um núcleo recém-reiniciado com o conjunto de instruções original;
+    # com rastro ou perfilador ativos cada fase precisa ser vista, então o interpretador é usado
+    return (type(nucleo) is NucleoSAP1
+            and nucleo.rastro is None and nucleo.perfilador is None
+            and len(nucleo.estado.memoria) == CAPACIDADE_MEMORIA
+            and {op: nome for op, (nome, _) in nucleo.conjunto_instrucoes.items()} == OPCODES_BASE
+            and nucleo.em_estado_inicial())
+
+
+def executar(nucleo, max_passos=None):
+    """Equivalente a nucleo.executar(max_passos), usando o código compilado quando possível."""
+    if not _pode_compilar(nucleo):
+        return nucleo.executar(max_passos)
+
+    programa, final = _estado_final(bytes(nucleo.estado.memoria))
+    if not resultado_dentro_do_limite(programa.passos, programa.motivo_parada, max_passos):
+        return nucleo.executar(max_passos)
+
+    estado = nucleo.estado
+    (estado.contador_programa, estado.registrador_endereco, estado.registrador_instrucao,
+     estado.acumulador, estado.registrador_b, estado.registrador_saida) = final
+    nucleo.motivo_parada = programa.motivo_parada
+    return ResultadoExecucao(estado.registrador_saida, programa.passos, programa.motivo_parada)
+
+
+def limpar_cache():
+    _compilar_prefixo.cache_clear()
+    _estado_final.cache_clear()
@@ -0,0 +1,314 @@
+"""Medições de desempenho reproduzíveis do simulador.
+
+    python desempenho.py -o base.json                 mede e grava
+    python desempenho.py --comparar base.json         mede e aponta regressões (código de saída 1)
+    python desempenho.py --tk                         mede também o canvas real (precisa de display, ex.: Xvfb)
+
+Cada medição é repetida e o melhor resultado é guardado; as entradas são
+geradas com semente fixa para que execuções diferentes meçam o mesmo trabalho.
+"""
+import argparse
+import json
+import platform
+import random
+import sys
+import time
+
+from nucleo_sap1 import NucleoSAP1, CAPACIDADE_MEMORIA
+from montador import montar, MontadorIncremental
+from expressao import compilar_expressao, gerar_codigo_expressao
+from renderizador import RenderizadorCPU
+import compilador_jit
+
+VERSAO_FORMATO = 1
+SEMENTE = 1234
+TOLERANCIA_PADRAO = 0.10
+
+# Tags que RenderizadorCPU atualiza a cada quadro
+TAGS_REGISTRADORES = ("bloco_cp_val", "bloco_rem_val", "bloco_ri_val", "bloco_acc_val", "bloco_regb_val",
+                      "bloco_saida_val", "bloco_ula_val")
+
+
+class CanvasFicticio:
+    """Canvas mínimo que só guarda as opções dos itens (legíveis por itemcget) e conta as chamadas de itemconfig."""
+
+    def __init__(self):
+        self._itens = {}
+        self._proximo_id = 1
+        self.chamadas_itemconfig = 0
+
+    def _criar(self, *_coordenadas, tags=(), **opcoes):
+        item = self._proximo_id
+        self._proximo_id += 1
+        self._itens[item] = ((tags,) if isinstance(tags, str) else tuple(tags), opcoes)
+        return item
+
+    create_rectangle = create_text = create_line = create_oval = _criar
+
+    def find_withtag(self, tag):
+        if isinstance(tag, int):
+            return (tag,) if tag in self._itens else ()
+        return tuple(item for item, (tags, _) in self._itens.items() if tag in tags)
+
+    def itemconfig(self, item, **opcoes):
+        self.chamadas_itemconfig += 1
+        for alvo in self.find_withtag(item):
+            self._itens[alvo][1].update(opcoes)
+
+    itemconfigure = itemconfig
+
+    def itemcget(self, item, opcao):
+        # Como no Tk: a opção do primeiro item com a tag
+        for alvo in self.find_withtag(item):
+            return self._itens[alvo][1].get(opcao, "")
+        return ""
+
+    def delete(self, tag):
+        for item in self.find_withtag(tag) if tag != "all" else tuple(self._itens):
+            del self._itens[item]
+
+
+def canvas_ficticio_cpu():
+    canvas = CanvasFicticio()
+    for tag in TAGS_REGISTRADORES:
+        canvas.create_text(0, 0, text="", tags=tag)
+    for i in range(CAPACIDADE_MEMORIA):
+        canvas.create_rectangle(0, 0, 1, 1, fill="", tags=f"celula_ram_{i}")
+        canvas.create_text(0, 0, text="00", tags=f"valor_ram_{i}")
+        canvas.create_text(0, 0, text=f"{i:01X}", tags=f"endereco_ram_{i}")
+    for bit in range(8):
+        canvas.create_oval(0, 0, 1, 1, fill="", tags=f"led_saida_{bit}")
+    return canvas
+
+
+def _melhor(funcao, repeticoes):
+    # Cada função devolve (trabalho, segundos); o melhor é o de maior vazão
+    return max((funcao() for _ in range(repeticoes)), key=lambda medida: medida[0] / medida[1])
+
+
+def _imagens(quantidade):
+    gerador = random.Random(SEMENTE)
+    imagens = []
+    for _ in range(quantidade):
+        codigo = [0x0F] + [gerador.choice((0x1E, 0x2D, 0x1F, 0xE0)) for _ in range(13)] + [0xF0]
+        imagens.append(codigo + [gerador.randrange(256)])
+    return imagens
+
+
+def _expressoes(quantidade):
+    gerador = random.Random(SEMENTE)
+    expressoes = []
+    for _ in range(quantidade):
+        termos = [str(gerador.randrange(256)) for _ in range(gerador.randint(1, 6))]
+        expressao = termos[0]
+        for termo in termos[1:]:
+            expressao += gerador.choice("+-") + termo
+        expressoes.append(expressao)
+    return expressoes
+
+
+def medir_nucleo(escala, com_carga=False):
+    """Instruções/s de NucleoSAP1.executar; com `com_carga` o tempo inclui também
+    reiniciar(imagem), o custo de carregar cada programa curto (como no lote e no servidor)."""
+    imagens = _imagens(2000 * escala)
+    nucleo = NucleoSAP1()
+    relogio = time.perf_counter
+
+    def rodada():
+        instrucoes = 0
+        segundos = 0.0
+        inicio_rodada = relogio()
+        for imagem in imagens:
+            nucleo.reiniciar(imagem)
+            inicio = relogio()
+            instrucoes += nucleo.executar().passos
+            segundos += relogio() - inicio
+        if com_carga:
+            segundos = relogio() - inicio_rodada
+        return instrucoes, segundos
+    return rodada
+
+
+def medir_jit(escala):
+    imagens = _imagens(2000 * escala)
+    nucleo = NucleoSAP1()
+
+    def rodada():
+        compilador_jit.limpar_cache()
+        instrucoes = 0
+        inicio = time.perf_counter()
+        for imagem in imagens:
+            nucleo.reiniciar(imagem)
+            instrucoes += compilador_jit.executar(nucleo).passos
+        return instrucoes, time.perf_counter() - inicio
+    return rodada
+
+
+def medir_montador(escala):
+    fontes = [compilar_expressao(expressao).codigo for expressao in _expressoes(500 * escala)]
+    linhas = sum(fonte.count("\n") + 1 for fonte in fontes)
+
+    def rodada():
+        inicio = time.perf_counter()
+        for fonte in fontes:
+            montar(fonte)
+        return linhas, time.perf_counter() - inicio
+    return rodada
+
+
+def medir_montador_incremental(escala):
+    # Edição típica no editor: uma linha alterada por montagem
+    fonte = compilar_expressao("10+20+30-5").codigo.split("\n")
+    edicoes = []
+    for i in range(500 * escala):
+        copia = list(fonte)
+        copia[-2] = f"DB {i % 256}     ; Byte de dados"
+        edicoes.append("\n".join(copia))
+    linhas = sum(edicao.count("\n") + 1 for edicao in edicoes)
+
+    def rodada():
+        montador = MontadorIncremental()
+        inicio = time.perf_counter()
+        for edicao in edicoes:
+            montador.montar(edicao)
+        return linhas, time.perf_counter() - inicio
+    return rodada
+
+
+def medir_expressoes(gerar, escala):
+    expressoes = _expressoes(1000 * escala)
+
+    def rodada():
+        inicio = time.perf_counter()
+        for expressao in expressoes:
+            gerar(expressao)
+        return len(expressoes), time.perf_counter() - inicio
+    return rodada
+
+
+def _estados_execucao(escala):
+    # Estados sucessivos de várias execuções, como os quadros finais de cada instrução na interface
+    estados = []
+    nucleo = NucleoSAP1()
+    for imagem in _imagens(50 * escala):
+        nucleo.reiniciar(imagem)
+        while nucleo.passo() is None:
+            estados.append(nucleo.estado.copy())
+    return estados
+
+
+def medir_quadros(renderizador, canvas, estados, repeticoes):
+    """Devolve (chamadas de itemconfig por quadro, milissegundos por quadro)."""
+    melhor = None
+    for _ in range(repeticoes):
+        renderizador.invalidar()
+        chamadas_antes = renderizador.chamadas_itemconfig
+        inicio = time.perf_counter()
+        for estado in estados:
+            renderizador.desenhar_estado(estado)
+            renderizador.configurar("bloco_ula_val", text="")
+            if hasattr(canvas, "update_idletasks"):
+                canvas.update_idletasks()
+        segundos = time.perf_counter() - inicio
+        medida = ((renderizador.chamadas_itemconfig - chamadas_antes) / len(estados),
+                  1000 * segundos / len(estados))
+        if melhor is None or medida[1] < melhor[1]:
+            melhor = medida
+    return melhor
+
+
+def _resultado(valor, unidade, maior_melhor=True):
+    return {"valor": valor, "unidade": unidade, "maior_melhor": maior_melhor}
+
+
+def executar_medicoes(repeticoes=5, escala=1, tk_real=False):
+    resultados = {}
+
+    def vazao(nome, funcao, unidade):
+        trabalho, segundos = _melhor(funcao, repeticoes)
+        resultados[nome] = _resultado(trabalho / segundos, unidade)
+
+    vazao("nucleo_ips", medir_nucleo(escala), "instruções/s")
+    vazao("nucleo_ips_com_carga", medir_nucleo(escala, com_carga=True), "instruções/s")
+    vazao("jit_ips_com_compilacao", medir_jit(escala), "instruções/s")
+    vazao("montador_linhas_por_s", medir_montador(escala), "linhas/s")
+    vazao("montador_incremental_linhas_por_s", medir_montador_incremental(escala), "linhas/s")
+    vazao("expressoes_por_s", medir_expressoes(gerar_codigo_expressao, escala), "expressões/s")
+    vazao("expressoes_otimizadas_por_s", medir_expressoes(compilar_expressao, escala), "expressões/s")
+
+    estados = _estados_execucao(escala)
+    canvas = canvas_ficticio_cpu()
+    chamadas, milissegundos = medir_quadros(RenderizadorCPU(canvas), canvas, estados, repeticoes)
+    resultados["canvas_ficticio_itemconfig_por_quadro"] = _resultado(chamadas, "chamadas/quadro", False)
+    resultados["canvas_ficticio_ms_por_quadro"] = _resultado(milissegundos, "ms/quadro", False)
+
+    if tk_real:
+        import tkinter as tk
+        import Trabalho_sap1
+        janela = tk.Tk()
+        app = Trabalho_sap1.AplicativoSimulador(janela)
+        janela.update()
+        chamadas, milissegundos = medir_quadros(app.renderizador, app.canvas_cpu, estados, repeticoes)
+        janela.destroy()
+        resultados["canvas_tk_itemconfig_por_quadro"] = _resultado(chamadas, "chamadas/quadro", False)
+        resultados["canvas_tk_ms_por_quadro"] = _resultado(milissegundos, "ms/quadro", False)
+
+    return {
+        "versao": VERSAO_FORMATO,
+        "data": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "implementacao": platform.python_implementation(),
+        "plataforma": platform.platform(),
+        "repeticoes": repeticoes,
+        "escala": escala,
+        "resultados": resultados,
+    }
+
+
+def comparar(atual, base, tolerancia=TOLERANCIA_PADRAO):
+    """Lista (nome, valor base, valor atual, variação) das medições que pioraram além da tolerância."""
+    regressoes = []
+    for nome, medida in atual["resultados"].items():
+        anterior = base.get("resultados", {}).get(nome)
+        if anterior is None or not anterior["valor"]:
+            continue
+        variacao = medida["valor"] / anterior["valor"] - 1
+        piorou = variacao < -tolerancia if medida["maior_melhor"] else variacao > tolerancia
+        if piorou:
+            regressoes.append((nome, anterior["valor"], medida["valor"], variacao))
+    return regressoes
+
+
+def principal(argumentos=None):
+    parser = argparse.ArgumentParser(description="Mede o desempenho do núcleo, montador, compilador e renderizador.")
+    parser.add_argument("-o", "--saida", help="gravar os resultados em JSON neste arquivo")
+    parser.add_argument("--comparar", help="JSON de uma execução anterior para detectar regressões")
+    parser.add_argument("--tolerancia", type=float, default=TOLERANCIA_PADRAO,
+                        help="piora relativa tolerada antes de acusar regressão (padrão: 0.10)")
+    parser.add_argument("--repeticoes", type=int, default=5)
+    parser.add_argument("--escala", type=int, default=1, help="multiplica o tamanho das entradas")
+    parser.add_argument("--tk", action="store_true", help="medir também o canvas real do Tk (precisa de display)")
+    args = parser.parse_args(argumentos)
+
+    atual = executar_medicoes(args.repeticoes, args.escala, args.tk)
+    for nome, medida in atual["resultados"].items():
+        print(f"{nome:<40} {medida['valor']:>14,.3f} {medida['unidade']}")
+
+    if args.saida:
+        with open(args.saida, "w", encoding="utf-8") as arquivo:
+            json.dump(atual, arquivo, ensure_ascii=False, indent=2)
+
+    if args.comparar:
+        with open(args.comparar, encoding="utf-8") as arquivo:
+            base = json.load(arquivo)
+        regressoes = comparar(atual, base, args.tolerancia)
+        for nome, anterior, valor, variacao in regressoes:
+            print(f"REGRESSÃO {nome}: {anterior:,.3f} -> {valor:,.3f} ({variacao:+.1%})")
+        if regressoes:
+            return 1
+        print("Nenhuma regressão acima da tolerância.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(principal())
@@ -0,0 +1,619 @@
+"""Teste diferencial aleatório entre os motores de execução do simulador.
+
+    python diferencial.py                           roda até Ctrl+C em todos os núcleos da CPU
+    python diferencial.py --imagens 100000 -j 4     para depois de 100 mil imagens
+    python diferencial.py --motores jit,interface   só os motores escolhidos (e a referência)
+    python diferencial.py --modo estendido --largura-endereco 4 8 16
+
+Cada imagem de memória aleatória roda no interpretador de referência e em
+todos os motores que aceitam a configuração (conjunto básico ou estendido,
+largura do endereço); o estado final de cada motor é comparado ao da
+referência. Uma imagem que diverge é reduzida (zerando trechos e simplificando
+bytes enquanto a divergência persistir) e gravada como uma linha JSON com o
+fonte desmontado. As imagens saem de uma semente e do número do bloco, então
+qualquer divergência pode ser reproduzida com --semente.
+"""
+import argparse
+import collections
+import itertools
+import json
+import random
+import signal
+import sys
+import time
+
+from nucleo_sap1 import (NucleoSAP1, ResultadoExecucao, LARGURA_ENDERECO_PADRAO, LARGURA_ENDERECO_MAXIMA,
+                         PARADA_PAR, PARADA_FIM_MEMORIA, PARADA_OPCODE_INVALIDO, PARADA_LIMITE_PASSOS,
+                         PARADA_LACO_INFINITO, capacidade_memoria, bytes_operando, limite_passos)
+from montador import desmontar
+from cache_resultados import CacheResultados
+from rastro import RastroExecucao
+from historico import HistoricoExecucao
+from lote import executar_em_ordem
+import compilador_jit
+import microcodigo
+
+TAMANHO_BLOCO = 256
+# Com memórias grandes o bloco encolhe para caber neste total de bytes de imagens
+BYTES_POR_BLOCO = 1 << 20
+LIMITE_PASSOS_PADRAO = 256
+MAX_DIVERGENCIAS_PADRAO = 20
+# Imagens divergentes reduzidas por bloco; as demais do bloco só são contadas
+REDUCOES_POR_BLOCO = 4
+INTERVALO_RELATORIO = 5.0
+PROBABILIDADE_BYTE_LIVRE = 0.02
+PROBABILIDADE_PAR = 0.05
+INSTRUCOES_MAXIMAS_GERADAS = 64
+DIFERENCAS_DE_MEMORIA_MOSTRADAS = 8
+CAPACIDADE_RASTRO = 64
+# Checkpoints próximos para que ir_para passe pelo caminho dos checkpoints mesmo em execuções curtas
+INTERVALO_CHECKPOINT_HISTORICO = 8
+
+CAR, SOM, SUB, LDI, STA, JMP, JZ, JC, SAI, PAR = 0x0, 0x1, 0x2, 0x3, 0x4, 0x5, 0x6, 0x7, 0xE, 0xF
+# PAR fica por último: gerar_imagem o sorteia à parte, com PROBABILIDADE_PAR
+OPCODES_BASICOS = (CAR, SOM, SUB, SAI, PAR)
+OPCODES_ESTENDIDOS = (CAR, SOM, SUB, SAI, LDI, STA, JMP, JZ, JC, PAR)
+
+CAMPOS_REGISTRADORES = ("contador_programa", "acumulador", "registrador_endereco", "registrador_instrucao",
+                        "registrador_b", "registrador_saida", "flag_zero", "flag_carry")
+
+Configuracao = collections.namedtuple("Configuracao", ["estendido", "largura_endereco"])
+
+# executar(imagens, configuracao, max_passos) -> lista de assinaturas; suporta(configuracao) -> bool
+Motor = collections.namedtuple("Motor", ["executar", "suporta"])
+
+# execucoes e segundos: por motor; divergencias: dicionários prontos para JSON (ver _divergencia)
+ResumoBloco = collections.namedtuple("ResumoBloco", ["bloco", "imagens", "execucoes", "segundos", "divergencias",
+                                                     "nao_reduzidas"])
+
+
+def gerar_imagem(gerador, configuracao):
+    """Imagem aleatória do tamanho da memória: código com opcodes válidos no início e dados depois.
+
+    Uma fração dos bytes do código é sorteada livremente, o que inclui opcodes
+    inválidos e o nibble baixo ignorado das instruções com operando em bytes.
+    """
+    capacidade = capacidade_memoria(configuracao.largura_endereco)
+    tamanho_operando = bytes_operando(configuracao.largura_endereco)
+    opcodes = OPCODES_ESTENDIDOS if configuracao.estendido else OPCODES_BASICOS
+    fim_codigo = gerador.randint(1, min(capacidade, INSTRUCOES_MAXIMAS_GERADAS * (1 + tamanho_operando)))
+    memoria = bytearray(capacidade)
+    endereco = 0
+    while endereco < fim_codigo:
+        if gerador.random() < PROBABILIDADE_BYTE_LIVRE:
+            memoria[endereco] = gerador.randrange(256)
+            endereco += 1
+            continue
+        opcode = PAR if gerador.random() < PROBABILIDADE_PAR else gerador.choice(opcodes[:-1])
+        # Saltos caem dentro do código; os demais operandos apontam para qualquer endereço
+        destino = gerador.randrange(fim_codigo if opcode in (JMP, JZ, JC) else capacidade)
+        if not tamanho_operando:
+            memoria[endereco] = opcode << 4 | (destino & 0x0F)
+            endereco += 1
+            continue
+        memoria[endereco] = opcode << 4 | gerador.randrange(16)
+        endereco += 1
+        if opcode not in (SAI, PAR):
+            operando = destino.to_bytes(tamanho_operando, "little")
+            memoria[endereco:endereco + tamanho_operando] = operando[:capacidade - endereco]
+            endereco += tamanho_operando
+    inicio_dados = min(endereco, capacidade)
+    memoria[inicio_dados:] = gerador.randbytes(capacidade - inicio_dados)
+    return bytes(memoria)
+
+
+def executar_referencia(memoria, configuracao, max_passos=LIMITE_PASSOS_PADRAO):
+    """Interpretador de referência: a especificação da máquina escrita direto, sem otimizações.
+
+    Decodifica cada instrução da memória no momento em que ela executa (sem
+    tabela pré-decodificada) e não detecta laços. Devolve a assinatura do estado final.
+    """
+    memoria = bytearray(memoria)
+    capacidade = len(memoria)
+    tamanho_operando = bytes_operando(configuracao.largura_endereco)
+    opcodes = OPCODES_ESTENDIDOS if configuracao.estendido else OPCODES_BASICOS
+    cp = acc = rem = ri = b = saida = zero = carry = 0
+    passos = 0
+    while True:
+        if passos == max_passos:
+            motivo = PARADA_LIMITE_PASSOS
+            break
+        if cp >= capacidade:
+            motivo = PARADA_FIM_MEMORIA
+            break
+        rem = cp
+        ri = memoria[cp]
+        opcode = ri >> 4
+        passos += 1
+        if not tamanho_operando:
+            operando = ri & 0x0F
+            cp += 1
+        elif opcode in (SAI, PAR) or opcode not in opcodes:
+            operando = 0
+            cp += 1
+        else:
+            # Bytes de operando além do fim da memória valem 0
+            operando = int.from_bytes(memoria[cp + 1:cp + 1 + tamanho_operando], "little") & (capacidade - 1)
+            cp += 1 + tamanho_operando
+
+        if opcode not in opcodes:
+            motivo = PARADA_OPCODE_INVALIDO
+            break
+        if opcode == CAR:
+            rem = operando
+            acc = memoria[operando]
+        elif opcode in (SOM, SUB):
+            rem = operando
+            b = memoria[operando]
+            valor = acc + b if opcode == SOM else acc - b
+            acc = valor & 0xFF
+            if configuracao.estendido:
+                zero = int(acc == 0)
+                carry = int(valor > 0xFF or valor < 0)
+        elif opcode == SAI:
+            saida = acc
+        elif opcode == PAR:
+            motivo = PARADA_PAR
+            break
+        elif opcode == LDI:
+            acc = operando & 0xFF
+        elif opcode == STA:
+            rem = operando
+            memoria[operando] = acc
+        elif opcode == JMP or (opcode == JZ and zero) or (opcode == JC and carry):
+            cp = operando
+
+    return {"saida": saida, "passos": passos, "motivo_parada": motivo, "contador_programa": cp, "acumulador": acc,
+            "registrador_endereco": rem, "registrador_instrucao": ri, "registrador_b": b,
+            "registrador_saida": saida, "flag_zero": zero, "flag_carry": carry, "memoria": bytes(memoria)}
+
+
+def _assinatura(estado, resultado):
+    assinatura = {campo: getattr(estado, campo) for campo in CAMPOS_REGISTRADORES}
+    assinatura.update(saida=resultado.saida, passos=resultado.passos, motivo_parada=resultado.motivo_parada,
+                      memoria=bytes(estado.memoria))
+    return assinatura
+
+
+def diferencas(esperado, obtido):
+    """Lista de (campo, esperado, obtido) em que o motor discorda da referência.
+
+    Só os campos presentes em `obtido` são conferidos: a interface, por exemplo,
+    mostra só uma janela da RAM ("memoria_visivel", endereço -> valor).
+    """
+    if obtido["motivo_parada"] == PARADA_LACO_INFINITO:
+        # A referência não detecta laços: um laço sem fim de verdade a leva até o limite de passos
+        if esperado["motivo_parada"] == PARADA_LIMITE_PASSOS:
+            return []
+        return [("motivo_parada", esperado["motivo_parada"], obtido["motivo_parada"])]
+
+    encontradas = []
+    for campo, valor in obtido.items():
+        if campo == "memoria" and valor == esperado["memoria"]:
+            continue
+        if campo == "memoria" or campo == "memoria_visivel":
+            enderecos = range(len(valor)) if campo == "memoria" else sorted(valor)
+            for endereco in enderecos:
+                if valor[endereco] != esperado["memoria"][endereco]:
+                    encontradas.append((f"memoria[0x{endereco:X}]", esperado["memoria"][endereco], valor[endereco]))
+        elif valor != esperado[campo]:
+            encontradas.append((campo, esperado[campo], valor))
+    return encontradas
+
+
+def _executar_por_imagem(executar_uma, preparar=None):
+    # Adapta uma função (núcleo carregado, max_passos) -> ResultadoExecucao à interface dos motores
+    def executar(imagens, configuracao, max_passos):
+        nucleo = NucleoSAP1(*configuracao)
+        if preparar is not None:
+            preparar(nucleo)
+        assinaturas = []
+        for imagem in imagens:
+            nucleo.reiniciar(imagem)
+            resultado = executar_uma(nucleo, max_passos)
+            assinaturas.append(_assinatura(nucleo.estado, resultado))
+        return assinaturas
+    return executar
+
+
+def _executar_nucleo(nucleo, max_passos):
+    return nucleo.executar(max_passos)
+
+
+def _ligar_rastro(nucleo):
+    nucleo.rastro = RastroExecucao(CAPACIDADE_RASTRO, tamanho_memoria=nucleo.capacidade)
+
+
+def _executar_cache(imagens, configuracao, max_passos):
+    # A primeira execução de cada imagem preenche o cache; a segunda restaura o estado guardado
+    cache = CacheResultados(len(imagens))
+    nucleo = NucleoSAP1(*configuracao)
+    assinaturas = []
+    for imagem in imagens:
+        nucleo.reiniciar(imagem)
+        cache.executar(nucleo, max_passos)
+        nucleo.reiniciar(imagem)
+        # Um acerto copia o estado guardado para nucleo.estado
+        resultado = cache.executar(nucleo, max_passos)
+        assinaturas.append(_assinatura(nucleo.estado, resultado))
+    return assinaturas
+
+
+def _executar_historico(nucleo, max_passos):
+    # Executa gravando o histórico e o percorre como os botões da interface: volta alguns passos,
+    # refaz um a um, salta para o meio (checkpoint) e de volta ao fim, e tenta passar do fim.
+    # O estado final tem de ser o da primeira execução
+    historico = HistoricoExecucao(nucleo, INTERVALO_CHECKPOINT_HISTORICO)
+    resultado = historico.executar(max_passos)
+    alcancado = historico.passo_atual
+    for _ in range(3):
+        historico.voltar()
+    while historico.passo_atual < alcancado and nucleo.motivo_parada is None:
+        historico.avancar()
+    historico.ir_para(alcancado // 2)
+    historico.ir_para(alcancado)
+    if resultado.motivo_parada != PARADA_LIMITE_PASSOS:
+        # Depois de uma parada não há passo seguinte; o fim da memória é detectado de novo sem contar passo
+        historico.ir_para(alcancado + 1)
+    return ResultadoExecucao(nucleo.estado.registrador_saida, historico.passo_atual,
+                             nucleo.motivo_parada or PARADA_LIMITE_PASSOS)
+
+
+def _executar_sequenciador(nucleo, max_passos):
+    # Estado T a estado T, como na animação da interface, em vez das sequências fundidas de executar()
+    sequenciador = microcodigo.SequenciadorSAP1(nucleo.estado, microcodigo.rom_do_nucleo(nucleo),
+                                                nucleo.estado_repetido)
+    passos = 0
+    while sequenciador.motivo_parada is None:
+        if passos == max_passos:
+            return ResultadoExecucao(nucleo.estado.registrador_saida, passos, PARADA_LIMITE_PASSOS)
+        if sequenciador.instrucao():
+            passos += 1
+    return ResultadoExecucao(nucleo.estado.registrador_saida, passos, sequenciador.motivo_parada)
+
+
+def _executar_vetorizado(imagens, configuracao, max_passos):
+    import numpy as np
+    from motor_vetorizado import MotorVetorizadoSAP1
+    matriz = np.frombuffer(b"".join(imagens), dtype=np.uint8).reshape(len(imagens), -1)
+    motor = MotorVetorizadoSAP1(matriz).executar(max_passos)
+    assinaturas = []
+    for i in range(len(motor)):
+        # O motor vetorizado não tem flags, que o conjunto básico nunca altera
+        assinatura = {campo: int(getattr(motor, campo)[i]) for campo in CAMPOS_REGISTRADORES[:6]}
+        assinatura.update(zip(("saida", "passos", "motivo_parada"), motor.resultado(i)))
+        assinatura["memoria"] = motor.memoria[i].tobytes()
+        assinaturas.append(assinatura)
+    return assinaturas
+
+
+# Aplicativos sem janela reaproveitados entre blocos, um por configuração em cada processo
+_aplicativos_do_processo = {}
+
+
+def _executar_interface(imagens, configuracao, max_passos):
+    from Trabalho_sap1 import AplicativoSemJanela
+    from desempenho import CanvasFicticio
+    app = _aplicativos_do_processo.get(configuracao)
+    if app is None:
+        app = _aplicativos_do_processo[configuracao] = AplicativoSemJanela(CanvasFicticio(), *configuracao)
+    assinaturas = []
+    for imagem in imagens:
+        # O botão "Passo a Passo": cada instrução é animada pela ROM e desenhada quadro a quadro
+        app.carregar_memoria(imagem)
+        while app.historico.passo_atual < max_passos and app._executar_passo():
+            app.processar_eventos()
+        app.processar_eventos()
+        assinaturas.append(_estado_da_tela(app, max_passos))
+    return assinaturas
+
+
+def _estado_da_tela(app, max_passos):
+    # Lê do canvas o que o usuário vê: registradores, flags, LEDs da saída e a janela visível da RAM
+    from renderizador import COR_LED_ACESO
+    canvas = app.canvas_cpu
+
+    def texto(tag):
+        return canvas.itemcget(tag, "text")
+
+    assinatura = {campo: int(texto(tag), 16) for campo, tag in (
+        ("contador_programa", "bloco_cp_val"), ("acumulador", "bloco_acc_val"), ("registrador_endereco", "bloco_rem_val"),
+        ("registrador_instrucao", "bloco_ri_val"), ("registrador_b", "bloco_regb_val"),
+        ("registrador_saida", "bloco_saida_val"))}
+    zero, carry = texto("flags_val").split()
+    assinatura["flag_zero"] = int(zero[2:])
+    assinatura["flag_carry"] = int(carry[2:])
+    assinatura["saida"] = sum(1 << bit for bit in range(8)
+                              if canvas.itemcget(f"led_saida_{bit}", "fill") == COR_LED_ACESO)
+    assinatura["passos"] = app.historico.passo_atual
+    motivo = app.nucleo.motivo_parada
+    if motivo is None:
+        # Como em _executar_passo: com o CP além da memória a interface não executa mais nada
+        motivo = PARADA_FIM_MEMORIA if assinatura["contador_programa"] >= app.nucleo.capacidade else PARADA_LIMITE_PASSOS
+    assinatura["motivo_parada"] = motivo
+    assinatura["memoria_visivel"] = {int(texto(f"endereco_ram_{i}"), 16): int(texto(f"valor_ram_{i}"), 16)
+                                     for i in range(app.renderizador.celulas_visiveis) if texto(f"endereco_ram_{i}")}
+    return assinatura
+
+
+def _so_4_bits(configuracao):
+    return configuracao.largura_endereco == LARGURA_ENDERECO_PADRAO
+
+
+def _so_basico_4_bits(configuracao):
+    return not configuracao.estendido and _so_4_bits(configuracao)
+
+
+def _qualquer(_configuracao):
+    return True
+
+
+MOTORES = {
+    "nucleo": Motor(_executar_por_imagem(_executar_nucleo), _qualquer),
+    "instrumentado": Motor(_executar_por_imagem(_executar_nucleo, _ligar_rastro), _qualquer),
+    "cache": Motor(_executar_cache, _qualquer),
+    "historico": Motor(_executar_por_imagem(_executar_historico), _qualquer),
+    "jit": Motor(_executar_por_imagem(compilador_jit.executar), _so_basico_4_bits),
+    "microcodigo": Motor(_executar_por_imagem(microcodigo.executar_nucleo), _so_4_bits),
+    "sequenciador": Motor(_executar_por_imagem(_executar_sequenciador), _so_4_bits),
+    "vetorizado": Motor(_executar_vetorizado, _so_basico_4_bits),
+    "interface": Motor(_executar_interface, _qualquer),
+}
+
+
+def verificar_motor(nome):
+    """Mensagem de erro se o motor depende de um módulo que não está instalado, senão None."""
+    try:
+        if nome == "vetorizado":
+            import motor_vetorizado  # noqa: F401
+        elif nome == "interface":
+            import tkinter  # noqa: F401
+    except ImportError as e:
+        return str(e)
+    return None
+
+
+def minimizar(imagem, diverge):
+    """Reduz a imagem mantendo `diverge(imagem)` verdadeiro.
+
+    Primeiro zera trechos cada vez menores, como no delta debugging; depois
+    tenta valores menores em cada byte que sobrou (só o opcode, só o operando).
+    """
+    atual = bytearray(imagem)
+    tamanho = len(atual) // 2
+    while tamanho:
+        reduziu = False
+        for inicio in range(0, len(atual), tamanho):
+            if not any(atual[inicio:inicio + tamanho]):
+                continue
+            tentativa = bytearray(atual)
+            tentativa[inicio:inicio + tamanho] = bytes(len(tentativa[inicio:inicio + tamanho]))
+            if diverge(tentativa):
+                atual = tentativa
+                reduziu = True
+        if not reduziu:
+            tamanho //= 2
+
+    for endereco, valor in enumerate(atual):
+        for candidato in (valor & 0xF0, valor & 0x0F):
+            if candidato != valor:
+                tentativa = bytearray(atual)
+                tentativa[endereco] = candidato
+                if diverge(tentativa):
+                    atual = tentativa
+                    break
+    return bytes(atual)
+
+
+def _divergencia(nome, configuracao, max_passos, semente, bloco, indice, imagem):
+    motor = MOTORES[nome]
+
+    def diverge(candidata):
+        return bool(diferencas(executar_referencia(candidata, configuracao, max_passos),
+                               motor.executar([bytes(candidata)], configuracao, max_passos)[0]))
+
+    reduzida = minimizar(imagem, diverge)
+    esperado = executar_referencia(reduzida, configuracao, max_passos)
+    encontradas = diferencas(esperado, motor.executar([reduzida], configuracao, max_passos)[0])
+    campos_memoria = [diferenca for diferenca in encontradas if diferenca[0].startswith("memoria[")]
+    encontradas = ([diferenca for diferenca in encontradas if not diferenca[0].startswith("memoria[")]
+                   + campos_memoria[:DIFERENCAS_DE_MEMORIA_MOSTRADAS])
+    return {
+        "motor": nome,
+        "estendido": configuracao.estendido,
+        "largura_endereco": configuracao.largura_endereco,
+        "max_passos": max_passos,
+        "semente": semente,
+        "bloco": bloco,
+        "indice": indice,
+        "imagem": bytes(imagem).hex(),
+        "reduzida": reduzida.hex(),
+        "fonte": desmontar(reduzida, configuracao.estendido, configuracao.largura_endereco),
+        "diferencas": [{"campo": campo, "esperado": esperado_campo, "obtido": obtido}
+                       for campo, esperado_campo, obtido in encontradas],
+    }
+
+
+def testar_bloco(semente, bloco, configuracao, nomes, max_passos=LIMITE_PASSOS_PADRAO, tamanho_bloco=TAMANHO_BLOCO):
+    """Gera o bloco `bloco` de imagens da semente e compara cada motor de `nomes` com a referência."""
+    gerador = random.Random(semente * 1000003 + bloco)
+    tamanho_bloco = max(1, min(tamanho_bloco, BYTES_POR_BLOCO // capacidade_memoria(configuracao.largura_endereco)))
+    imagens = [gerar_imagem(gerador, configuracao) for _ in range(tamanho_bloco)]
+    inicio = time.perf_counter()
+    referencias = [executar_referencia(imagem, configuracao, max_passos) for imagem in imagens]
+    execucoes = {"referencia": len(imagens)}
+    segundos = {"referencia": time.perf_counter() - inicio}
+    divergencias = []
+    nao_reduzidas = 0
+    for nome in nomes:
+        motor = MOTORES[nome]
+        if not motor.suporta(configuracao):
+            continue
+        inicio = time.perf_counter()
+        assinaturas = motor.executar(imagens, configuracao, max_passos)
+        segundos[nome] = time.perf_counter() - inicio
+        execucoes[nome] = len(imagens)
+        for indice, (esperado, obtido) in enumerate(zip(referencias, assinaturas)):
+            if not diferencas(esperado, obtido):
+                continue
+            if len(divergencias) < REDUCOES_POR_BLOCO:
+                divergencias.append(_divergencia(nome, configuracao, max_passos, semente, bloco, indice,
+                                                 imagens[indice]))
+            else:
+                nao_reduzidas += 1
+    return [ResumoBloco(bloco, len(imagens), execucoes, segundos, divergencias, nao_reduzidas)]
+
+
+def _ignorar_interrupcao():
+    # Ctrl+C chega a todo o grupo de processos; quem para o teste é o processo principal
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+
+
+def executar_teste(configuracoes, nomes, semente=0, processos=None, max_passos=LIMITE_PASSOS_PADRAO,
+                   tamanho_bloco=TAMANHO_BLOCO, blocos=None):
+    """Gera um ResumoBloco por bloco testado, em ordem; sem `blocos`, não termina.
+
+    Os blocos alternam entre as configurações. Com processos=1 tudo roda no processo atual.
+    """
+    numeros = itertools.count() if blocos is None else range(blocos)
+    argumentos = ((semente, bloco, configuracoes[bloco % len(configuracoes)], nomes, max_passos, tamanho_bloco)
+                  for bloco in numeros)
+    return executar_em_ordem(testar_bloco, argumentos, processos, None, _ignorar_interrupcao)
+
+
+class Placar:
+    """Totais do teste: imagens, execuções e tempo de cada motor e divergências distintas."""
+
+    def __init__(self):
+        self.inicio = time.perf_counter()
+        self.imagens = 0
+        self.execucoes = collections.Counter()
+        self.segundos = collections.Counter()
+        self.divergencias = collections.Counter()
+        self.nao_reduzidas = 0
+        self._vistas = set()
+
+    def registrar(self, resumo):
+        """Soma o bloco e devolve as divergências ainda não vistas (mesmo motor e mesma imagem reduzida)."""
+        self.imagens += resumo.imagens
+        self.execucoes.update(resumo.execucoes)
+        self.segundos.update(resumo.segundos)
+        self.nao_reduzidas += resumo.nao_reduzidas
+        novas = []
+        for divergencia in resumo.divergencias:
+            self.divergencias[divergencia["motor"]] += 1
+            chave = (divergencia["motor"], divergencia["estendido"], divergencia["largura_endereco"],
+                     divergencia["reduzida"])
+            if chave not in self._vistas:
+                self._vistas.add(chave)
+                novas.append(divergencia)
+        return novas
+
+    @property
+    def total_divergencias(self):
+        return sum(self.divergencias.values()) + self.nao_reduzidas
+
+    def imagens_por_segundo(self):
+        decorrido = time.perf_counter() - self.inicio
+        return self.imagens / decorrido if decorrido > 0 else 0.0
+
+    def linha_progresso(self):
+        return (f"{self.imagens:,} imagens, {self.imagens_por_segundo():,.0f} imagens/s, "
+                f"{self.total_divergencias} divergências")
+
+    def tabela(self):
+        linhas = [f"{'motor':<14} {'execuções':>12} {'imagens/s':>12} {'divergências':>13}"]
+        for nome, execucoes in self.execucoes.items():
+            segundos = self.segundos[nome]
+            taxa = execucoes / segundos if segundos > 0 else 0.0
+            linhas.append(f"{nome:<14} {execucoes:>12,} {taxa:>12,.0f} {self.divergencias[nome]:>13}")
+        linhas.append(f"Total: {self.linha_progresso()} em {time.perf_counter() - self.inicio:,.1f} s "
+                      "(imagens/s por motor contam só o tempo do motor, somado entre processos).")
+        return "\n".join(linhas)
+
+
+def _lista_motores(texto):
+    nomes = [nome.strip() for nome in texto.split(",") if nome.strip()]
+    desconhecidos = [nome for nome in nomes if nome not in MOTORES]
+    if desconhecidos:
+        raise argparse.ArgumentTypeError(f"motor desconhecido: {', '.join(desconhecidos)} "
+                                         f"(disponíveis: {', '.join(MOTORES)})")
+    return nomes
+
+
+def principal(argumentos=None):
+    parser = argparse.ArgumentParser(description="Compara os motores de execução do SAP-1 em imagens aleatórias.")
+    parser.add_argument("--motores", type=_lista_motores, default=None,
+                        help=f"motores separados por vírgula (padrão: todos os instalados: {', '.join(MOTORES)})")
+    parser.add_argument("--modo", choices=("basico", "estendido", "ambos"), default="ambos",
+                        help="conjunto de instruções das imagens (padrão: ambos, alternando entre blocos)")
+    parser.add_argument("--largura-endereco", type=int, nargs="+", default=[LARGURA_ENDERECO_PADRAO, 8],
+                        choices=range(LARGURA_ENDERECO_PADRAO, LARGURA_ENDERECO_MAXIMA + 1), metavar="BITS",
+                        help="bits de endereço das imagens (padrão: 4 8)")
+    parser.add_argument("--semente", type=int, default=None, help="semente das imagens (padrão: aleatória)")
+    parser.add_argument("--imagens", type=int, default=None, help="parar depois de testar este número de imagens")
+    parser.add_argument("--duracao", type=float, default=None, help="parar depois deste número de segundos")
+    parser.add_argument("--max-divergencias", type=int, default=MAX_DIVERGENCIAS_PADRAO,
+                        help=f"parar depois de tantas divergências (padrão: {MAX_DIVERGENCIAS_PADRAO}; 0: nunca)")
+    parser.add_argument("--max-passos", type=limite_passos, default=LIMITE_PASSOS_PADRAO, help="limite de instruções por imagem")
+    parser.add_argument("-j", "--processos", type=int, default=None, help="número de processos (padrão: núcleos da CPU)")
+    parser.add_argument("--bloco", type=int, default=TAMANHO_BLOCO,
+                        help=f"imagens enviadas por vez a cada processo (no máximo {BYTES_POR_BLOCO >> 20} MiB de imagens)")
+    parser.add_argument("-o", "--saida", help="gravar as divergências (linhas JSON) neste arquivo em vez da saída padrão")
+    args = parser.parse_args(argumentos)
+
+    nomes = args.motores
+    if nomes is None:
+        nomes = []
+        for nome in MOTORES:
+            erro = verificar_motor(nome)
+            if erro is None:
+                nomes.append(nome)
+            else:
+                print(f"Motor {nome} ignorado: {erro}.", file=sys.stderr)
+    else:
+        for nome in nomes:
+            erro = verificar_motor(nome)
+            if erro is not None:
+                print(f"Erro: o motor {nome} não está disponível: {erro}.", file=sys.stderr)
+                return 1
+
+    modos = {"basico": (False,), "estendido": (True,), "ambos": (False, True)}[args.modo]
+    configuracoes = [Configuracao(estendido, largura) for largura in args.largura_endereco for estendido in modos]
+    semente = random.randrange(1 << 32) if args.semente is None else args.semente
+    print(f"Semente {semente}; motores: {', '.join(nomes)}; configurações: "
+          + ", ".join(f"{'estendido' if c.estendido else 'básico'}/{c.largura_endereco} bits" for c in configuracoes)
+          + ".", file=sys.stderr)
+
+    placar = Placar()
+    saida = sys.stdout if args.saida is None else open(args.saida, "a", encoding="utf-8")
+    proximo_relatorio = time.perf_counter() + INTERVALO_RELATORIO
+    resumos = executar_teste(configuracoes, nomes, semente, args.processos, args.max_passos, args.bloco)
+    try:
+        for resumo in resumos:
+            for divergencia in placar.registrar(resumo):
+                saida.write(json.dumps(divergencia, ensure_ascii=False) + "\n")
+                saida.flush()
+            agora = time.perf_counter()
+            if agora >= proximo_relatorio:
+                print(placar.linha_progresso(), file=sys.stderr)
+                proximo_relatorio = agora + INTERVALO_RELATORIO
+            if args.max_divergencias and placar.total_divergencias >= args.max_divergencias:
+                print("Limite de divergências atingido.", file=sys.stderr)
+                break
+            if args.imagens is not None and placar.imagens >= args.imagens:
+                break
+            if args.duracao is not None and agora - placar.inicio >= args.duracao:
+                break
+    except KeyboardInterrupt:
+        print("Interrompido.", file=sys.stderr)
+    finally:
+        resumos.close()
+        if saida is not sys.stdout:
+            saida.close()
+    print(placar.tabela(), file=sys.stderr)
+    return 1 if placar.total_divergencias else 0
+
+
+if __name__ == "__main__":
+    sys.exit(principal())
@@ -0,0 +1,171 @@
+import collections
+import re
+
+from nucleo_sap1 import CAPACIDADE_MEMORIA
+
+# codigo: fonte assembly; tamanho: bytes de memória ocupados; passos: instruções executadas até PAR
+ProgramaExpressao = collections.namedtuple("ProgramaExpressao", ["codigo", "tamanho", "passos"])
+
+_ZERO = None  # operando de CAR que aponta para uma célula livre (sempre 0)
+
+
+def analisar_expressao(expressao):
+    """Separa a expressão em (números, operadores)."""
+    componentes = re.findall(r'(\d+)|([+-])', expressao)
+
+    numeros = []
+    operadores = []
+
+    num_atual = ""
+    for parte_num, parte_op in componentes:
+        if parte_num:
+            num_atual += parte_num
+        elif parte_op:
+            if num_atual:
+                numeros.append(int(num_atual))
+                num_atual = ""
+            operadores.append(parte_op)
+
+    if num_atual:
+        numeros.append(int(num_atual))
+
+    if not numeros:
+        raise ValueError("Nenhum número válido encontrado.")
+
+    if len(operadores) >= len(numeros):
+        raise ValueError("Expressão mal formada (operador sem operando).")
+
+    return numeros, operadores
+
+
+def gerar_codigo_expressao(expressao):
+    """Gera o fonte assembly que calcula a expressão, com os dados no final da memória."""
+    numeros, operadores = analisar_expressao(expressao)
+
+    codigo = "; Código gerado para: " + expressao + "\n"
+    codigo += "; Dados armazenados no final da memória.\n\n"
+
+    inicio_dados = CAPACIDADE_MEMORIA - len(numeros)
+    if inicio_dados < 0:
+        raise ValueError(f"Expressão muito longa. Máximo de {CAPACIDADE_MEMORIA} números na memória.")
+
+    if len(operadores) + 3 > inicio_dados:
+        raise ValueError(f"Expressão muito longa: código e dados não cabem juntos em {CAPACIDADE_MEMORIA} bytes.")
+
+    codigo += f"CAR {inicio_dados:01X}   ; Carrega o primeiro número no ACC\n"
+
+    for i in range(len(operadores)):
+        op = operadores[i]
+        endereco = inicio_dados + i + 1
+        if op == "+":
+            codigo += f"SOM {endereco:01X}   ; Soma o próximo número\n"
+        elif op == "-":
+            codigo += f"SUB {endereco:01X}   ; Subtrai o próximo número\n"
+
+    codigo += "SAI      ; Mostra o resultado final\n"
+    codigo += "PAR      ; Termina a execução\n\n"
+
+    codigo += f"ORG {inicio_dados:01X}   ; Seção de dados\n"
+    for num in numeros:
+        if not (0 <= num <= 255):
+            raise ValueError(f"Número '{num}' fora do intervalo (0-255).")
+        codigo += f"DB {num}     ; Byte de dados\n"
+
+    return codigo
+
+
+def _coeficientes(numeros, operadores):
+    # Valor -> quantas vezes é somado (negativo: subtraído), em aritmética de 8 bits
+    coeficientes = collections.Counter()
+    for num, op in zip(numeros, ["+"] + operadores):
+        coeficientes[num] += 1 if op == "+" else -1
+    return coeficientes
+
+
+def _dobrar_repeticoes(coeficientes):
+    """Troca k ocorrências de x por uma de k*x e descarta termos nulos, até estabilizar."""
+    while True:
+        termos = {}
+        for valor, coeficiente in coeficientes.items():
+            coeficiente = (coeficiente + 128) % 256 - 128
+            if valor == 0 or coeficiente == 0:
+                continue
+            sinal = 1 if coeficiente > 0 else -1
+            termos[valor * abs(coeficiente) % 256] = termos.get(valor * abs(coeficiente) % 256, 0) + sinal
+        if all(abs(c) == 1 for c in termos.values()):
+            return {valor: c for valor, c in termos.items() if valor}
+        coeficientes = termos
+
+
+def _candidatos(termos):
+    # Cada candidato é a lista de (mnemônico, valor) antes de SAI/PAR
+    positivos = [valor for valor, sinal in termos.items() if sinal > 0]
+    negativos = [valor for valor, sinal in termos.items() if sinal < 0]
+    if positivos:
+        for inicial in positivos:
+            yield ([("CAR", inicial)] + [("SOM", v) for v in positivos if v != inicial]
+                   + [("SUB", v) for v in negativos])
+    elif negativos:
+        for inicial in negativos:
+            # -x vira CAR (256 - x); a alternativa sem dobrar parte de uma célula zerada
+            yield [("CAR", (256 - inicial) % 256)] + [("SUB", v) for v in negativos if v != inicial]
+        yield [("CAR", _ZERO)] + [("SUB", v) for v in negativos]
+    else:
+        yield [("CAR", _ZERO)]
+
+
+def _tamanho(instrucoes):
+    valores = {valor for _, valor in instrucoes}
+    return len(instrucoes) + 2 + len(valores)
+
+
+def _emitir(expressao, instrucoes):
+    celulas = list(dict.fromkeys(valor for _, valor in instrucoes if valor is not _ZERO))
+    tamanho_codigo = len(instrucoes) + 2
+    inicio_dados = CAPACIDADE_MEMORIA - len(celulas)
+    usa_zero = any(valor is _ZERO for _, valor in instrucoes)
+    tamanho = tamanho_codigo + len(celulas) + usa_zero
+    if tamanho > CAPACIDADE_MEMORIA:
+        raise ValueError(f"Expressão muito longa: o menor programa encontrado ocupa {tamanho} bytes "
+                         f"(máx {CAPACIDADE_MEMORIA}).")
+
+    endereco = {valor: inicio_dados + i for i, valor in enumerate(celulas)}
+    endereco[_ZERO] = tamanho_codigo
+    descricao = {"CAR": "Carrega", "SOM": "Soma", "SUB": "Subtrai"}
+
+    codigo = "; Código gerado para: " + expressao + "\n"
+    codigo += f"; Otimizado: {tamanho} bytes, {len(instrucoes) + 2} instruções executadas.\n\n"
+    for mnemonico, valor in instrucoes:
+        alvo = "0 (célula livre)" if valor is _ZERO else str(valor)
+        codigo += f"{mnemonico} {endereco[valor]:01X}   ; {descricao[mnemonico]} {alvo}\n"
+    codigo += "SAI      ; Mostra o resultado final\n"
+    codigo += "PAR      ; Termina a execução\n"
+
+    if celulas:
+        codigo += f"\nORG {inicio_dados:01X}   ; Seção de dados (um byte por valor distinto)\n"
+        for valor in celulas:
+            codigo += f"DB {valor}     ; Byte de dados\n"
+    return ProgramaExpressao(codigo, tamanho, len(instrucoes) + 2)
+
+
+def compilar_expressao(expressao, dobrar_constantes=False):
+    """Gera o menor programa encontrado para a expressão.
+
+    Valores repetidos ocupam uma só célula, x-x e +0 são eliminados, k
+    ocorrências de x viram uma de k*x e os termos são reordenados para que um
+    positivo seja carregado primeiro. Com dobrar_constantes a expressão inteira
+    é calculada aqui e o programa apenas carrega e mostra o resultado.
+    """
+    numeros, operadores = analisar_expressao(expressao)
+    for num in numeros:
+        if not (0 <= num <= 255):
+            raise ValueError(f"Número '{num}' fora do intervalo (0-255).")
+
+    coeficientes = _coeficientes(numeros, operadores)
+    if dobrar_constantes:
+        total = sum(valor * c for valor, c in coeficientes.items()) % 256
+        coeficientes = collections.Counter({total: 1})
+    termos = _dobrar_repeticoes(coeficientes)
+
+    melhor = min(_candidatos(termos), key=lambda instrucoes: (_tamanho(instrucoes), len(instrucoes)))
+    return _emitir(expressao, melhor)
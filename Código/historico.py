@@ -0,0 +1,174 @@
+import collections
+
+from nucleo_sap1 import ResultadoExecucao, PARADA_LIMITE_PASSOS, limite_passos
+
+INTERVALO_CHECKPOINT = 64
+LIMITE_BYTES_PADRAO = 8 * 1024 * 1024
+
+# Estimativas do custo em memória de cada entrada (objetos Python inclusos)
+CUSTO_DELTA = 160
+CUSTO_ESCRITA = 80
+CUSTO_CHECKPOINT = 200
+
+# registradores: EstadoSAP1.empacotar_registradores() antes do passo
+# motivo_parada: motivo antes do passo; escritas: ((endereço, valor anterior), ...) feitas pelo passo
+# motivo_resultante: motivo depois do passo, reposto quando o passo é refeito
+Delta = collections.namedtuple("Delta", ["registradores", "motivo_parada", "escritas", "motivo_resultante"])
+
+
+class HistoricoExecucao:
+    """Histórico de passos do núcleo que permite voltar e saltar para qualquer passo guardado.
+
+    Cada passo guarda apenas os registradores de antes do passo e os bytes de
+    memória que ele escreveu, então voltar um passo é O(1). A cada
+    `intervalo_checkpoint` passos um instantâneo completo é guardado; saltar
+    para um passo distante restaura o checkpoint mais próximo e reexecuta no
+    máximo esse intervalo. Quando a estimativa de memória passa de
+    `limite_bytes`, os passos mais antigos são descartados.
+
+    Qualquer alteração do núcleo feita por fora (montagem, reinício) invalida
+    o histórico: chame `limpar()`.
+    """
+
+    def __init__(self, nucleo, intervalo_checkpoint=INTERVALO_CHECKPOINT, limite_bytes=LIMITE_BYTES_PADRAO):
+        if intervalo_checkpoint < 1:
+            raise ValueError("O intervalo entre checkpoints deve ser pelo menos 1.")
+        self.nucleo = nucleo
+        self.intervalo_checkpoint = intervalo_checkpoint
+        self.limite_bytes = limite_bytes
+        self.limpar()
+
+    def limpar(self):
+        """Recomeça o histórico a partir do estado atual do núcleo (passo 0)."""
+        self._deltas = collections.deque()
+        self._checkpoints = collections.OrderedDict()
+        self.primeiro = 0
+        self.passo_atual = 0
+        self.bytes_usados = 0
+        self._guardar_checkpoint()
+        self.nucleo.reiniciar_deteccao_lacos()
+
+    @property
+    def ultimo(self):
+        """Maior passo já executado e guardado (o histórico cobre primeiro..ultimo)."""
+        return self.primeiro + len(self._deltas)
+
+    def _guardar_checkpoint(self):
+        instantaneo = self.nucleo.instantaneo()
+        self._checkpoints[self.passo_atual] = instantaneo
+        self.bytes_usados += CUSTO_CHECKPOINT + len(instantaneo.dados)
+
+    def _passo_registrado(self):
+        nucleo = self.nucleo
+        if nucleo.estado.contador_programa >= nucleo.capacidade:
+            # Como em NucleoSAP1.executar, o passo que só detecta o fim da memória não muda
+            # o estado e não conta: não é gravado, então passo_atual acompanha os passos executados
+            return nucleo.passo()
+        registradores = nucleo.estado.empacotar_registradores()
+        motivo_anterior = nucleo.motivo_parada
+        memoria = nucleo.memoria_principal
+        escritas = memoria.escritas = []
+        try:
+            motivo = nucleo.passo()
+        finally:
+            memoria.escritas = None
+
+        self._deltas.append(Delta(registradores, motivo_anterior, tuple(escritas) or None, motivo))
+        self.passo_atual += 1
+        self.bytes_usados += CUSTO_DELTA + CUSTO_ESCRITA * len(escritas)
+        if self.passo_atual % self.intervalo_checkpoint == 0:
+            self._guardar_checkpoint()
+        self._aplicar_limite()
+        return motivo
+
+    def _aplicar_limite(self):
+        deltas = self._deltas
+        checkpoints = self._checkpoints
+        while self.bytes_usados > self.limite_bytes and len(deltas) > 1:
+            delta = deltas.popleft()
+            self.primeiro += 1
+            self.bytes_usados -= CUSTO_DELTA + CUSTO_ESCRITA * len(delta.escritas or ())
+            while checkpoints and next(iter(checkpoints)) < self.primeiro:
+                _, instantaneo = checkpoints.popitem(last=False)
+                self.bytes_usados -= CUSTO_CHECKPOINT + len(instantaneo.dados)
+
+    def avancar(self):
+        """Executa um passo. Se o passo já está no histórico, refaz sem gravar de novo."""
+        nucleo = self.nucleo
+        if nucleo.motivo_parada is not None:
+            return nucleo.motivo_parada
+        if self.passo_atual < self.ultimo:
+            return self._refazer_passo()
+        return self._passo_registrado()
+
+    def _refazer_passo(self):
+        # Refaz um passo já gravado. A detecção de laços fica desligada: ela depende dos saltos
+        # vistos desde o último reinício dela (voltar e os checkpoints a reiniciam), então poderia
+        # parar antes ou depois da execução original. O motivo de parada gravado é reposto.
+        nucleo = self.nucleo
+        delta = self._deltas[self.passo_atual - self.primeiro]
+        detectar_lacos, nucleo.detectar_lacos = nucleo.detectar_lacos, False
+        try:
+            nucleo.passo()
+        finally:
+            nucleo.detectar_lacos = detectar_lacos
+        nucleo.motivo_parada = delta.motivo_resultante
+        self.passo_atual += 1
+        return nucleo.motivo_parada
+
+    def executar(self, max_passos=None):
+        """Como NucleoSAP1.executar, registrando cada passo."""
+        max_passos = limite_passos(max_passos)
+        passos = 0
+        while self.nucleo.motivo_parada is None:
+            if passos == max_passos:
+                return ResultadoExecucao(self.nucleo.estado.registrador_saida, passos, PARADA_LIMITE_PASSOS)
+            inicio = self.passo_atual
+            self.avancar()
+            passos += self.passo_atual - inicio
+        return ResultadoExecucao(self.nucleo.estado.registrador_saida, passos, self.nucleo.motivo_parada)
+
+    def voltar(self):
+        """Desfaz o último passo. Devolve False se não há passo anterior guardado."""
+        if self.passo_atual <= self.primeiro:
+            return False
+        self.passo_atual -= 1
+        delta = self._deltas[self.passo_atual - self.primeiro]
+        nucleo = self.nucleo
+        nucleo.estado.restaurar_registradores(delta.registradores)
+        nucleo.motivo_parada = delta.motivo_parada
+        if delta.escritas:
+            memoria = nucleo.memoria_principal
+            for indice, valor in reversed(delta.escritas):
+                memoria[indice] = valor
+        # Os estados vistos depois deste passo não valem como referência para a nova execução
+        nucleo.reiniciar_deteccao_lacos()
+        return True
+
+    def ir_para(self, passo):
+        """Leva o núcleo ao estado depois de `passo` passos. Devolve o passo alcançado."""
+        passo = max(passo, self.primeiro)
+        nucleo = self.nucleo
+
+        # O checkpoint mais próximo abaixo do alvo, se sair mais barato que andar passo a passo
+        checkpoint = None
+        for inicio in reversed(self._checkpoints):
+            if inicio <= passo:
+                checkpoint = inicio
+                break
+        if checkpoint is not None and passo <= self.ultimo and passo - checkpoint < abs(passo - self.passo_atual):
+            rastro, nucleo.rastro = nucleo.rastro, None
+            try:
+                nucleo.restaurar_instantaneo(self._checkpoints[checkpoint])
+                self.passo_atual = checkpoint
+                while self.passo_atual < passo and nucleo.motivo_parada is None:
+                    self._refazer_passo()
+            finally:
+                nucleo.rastro = rastro
+            return self.passo_atual
+
+        while self.passo_atual > passo:
+            self.voltar()
+        while self.passo_atual < passo and nucleo.motivo_parada is None:
+            self.avancar()
+        return self.passo_atual
@@ -0,0 +1,243 @@
+"""Leitura e gravação de imagens de memória fora do editor.
+
+    .bin / outros   imagem binária crua, exatamente do tamanho da memória
+    .hex / .ihx     Intel HEX (registros 00, 01, 02 e 04)
+    .sapi           conjunto de imagens de tamanho fixo gravadas em sequência
+
+O conjunto é lido por mmap: cada imagem é uma fatia de memoryview do arquivo,
+então abrir um milhão de programas custa um mapeamento, não um milhão de leituras.
+"""
+import mmap
+import struct
+
+from nucleo_sap1 import LARGURA_ENDERECO_PADRAO, capacidade_memoria
+
+EXTENSOES_INTEL_HEX = (".hex", ".ihx")
+EXTENSAO_CONJUNTO = ".sapi"
+BYTES_POR_REGISTRO_HEX = 16
+
+ASSINATURA = b"SAP1IMG\0"
+VERSAO = 1
+FLAG_ESTENDIDO = 1
+# assinatura, versão, bits de endereço, flags (bit 0: modo estendido), tamanho de cada imagem, quantidade
+FORMATO_CABECALHO = struct.Struct("<8sHBBIQ8x")
+_DESLOCAMENTO_QUANTIDADE = 16
+
+REGISTRO_DADOS = 0x00
+REGISTRO_FIM = 0x01
+REGISTRO_SEGMENTO = 0x02
+REGISTRO_LINEAR = 0x04
+
+
+def ler_intel_hex(texto, capacidade):
+    """Monta uma imagem de `capacidade` bytes a partir de um texto Intel HEX; bytes não citados ficam em 0."""
+    memoria = bytearray(capacidade)
+    base = 0
+    for num_linha, linha in enumerate(texto.splitlines(), 1):
+        linha = linha.strip()
+        if not linha:
+            continue
+        try:
+            if not linha.startswith(":"):
+                raise ValueError("Registro deve começar com ':'.")
+            registro = bytes.fromhex(linha[1:])
+            if len(registro) < 5 or len(registro) != registro[0] + 5:
+                raise ValueError("Tamanho do registro não confere.")
+            if sum(registro) & 0xFF:
+                raise ValueError("Checksum inválido.")
+            tipo = registro[3]
+            dados = registro[4:-1]
+            if tipo == REGISTRO_DADOS:
+                endereco = base + int.from_bytes(registro[1:3], "big")
+                if endereco + len(dados) > capacidade:
+                    raise ValueError(f"Dados fora da memória de {capacidade} bytes.")
+                memoria[endereco:endereco + len(dados)] = dados
+            elif tipo == REGISTRO_FIM:
+                return memoria
+            elif tipo == REGISTRO_SEGMENTO and len(dados) == 2:
+                base = int.from_bytes(dados, "big") << 4
+            elif tipo == REGISTRO_LINEAR and len(dados) == 2:
+                base = int.from_bytes(dados, "big") << 16
+            elif tipo not in (0x03, 0x05):
+                # 03 e 05 só indicam o endereço de partida, que no SAP-1 é sempre 0
+                raise ValueError(f"Tipo de registro {tipo:02X} não suportado.")
+        except ValueError as e:
+            raise ValueError(f"Intel HEX, linha {num_linha}: {e}") from None
+    raise ValueError("Intel HEX sem registro de fim (:00000001FF).")
+
+
+def gerar_intel_hex(memoria, bytes_por_registro=BYTES_POR_REGISTRO_HEX):
+    """Texto Intel HEX da imagem; trechos zerados são omitidos, já que a carga parte de memória zerada."""
+    linhas = []
+    for inicio in range(0, len(memoria), bytes_por_registro):
+        dados = bytes(memoria[inicio:inicio + bytes_por_registro])
+        if not any(dados):
+            continue
+        registro = bytes((len(dados),)) + inicio.to_bytes(2, "big") + bytes((REGISTRO_DADOS,)) + dados
+        linhas.append(f":{registro.hex().upper()}{-sum(registro) & 0xFF:02X}")
+    linhas.append(":00000001FF")
+    return "\n".join(linhas) + "\n"
+
+
+def carregar_imagem(caminho, largura_endereco=LARGURA_ENDERECO_PADRAO):
+    """Lê uma imagem binária crua ou Intel HEX (pela extensão) para a memória da largura dada."""
+    capacidade = capacidade_memoria(largura_endereco)
+    if caminho.lower().endswith(EXTENSOES_INTEL_HEX):
+        with open(caminho, encoding="ascii") as arquivo:
+            return ler_intel_hex(arquivo.read(), capacidade)
+    with open(caminho, "rb") as arquivo:
+        dados = arquivo.read()
+    if len(dados) != capacidade:
+        raise ValueError(f"Imagem de memória deve ter {capacidade} bytes (lidos {len(dados)}).")
+    return dados
+
+
+def salvar_imagem(caminho, memoria):
+    """Grava a imagem como Intel HEX ou binário cru, conforme a extensão."""
+    if caminho.lower().endswith(EXTENSOES_INTEL_HEX):
+        with open(caminho, "w", encoding="ascii") as arquivo:
+            arquivo.write(gerar_intel_hex(memoria))
+    else:
+        with open(caminho, "wb") as arquivo:
+            arquivo.write(bytes(memoria))
+
+
+def largura_da_imagem(tamanho):
+    """Bits de endereço de uma imagem crua de `tamanho` bytes, ou None se nenhuma largura serve."""
+    largura = tamanho.bit_length() - 1
+    try:
+        if capacidade_memoria(largura) == tamanho:
+            return largura
+    except ValueError:
+        pass
+    return None
+
+
+class EscritorImagens:
+    """Grava um conjunto de imagens do mesmo tamanho em sequência, após um cabeçalho de 32 bytes."""
+
+    def __init__(self, caminho, largura_endereco=LARGURA_ENDERECO_PADRAO, estendido=False):
+        self.largura_endereco = largura_endereco
+        self.estendido = estendido
+        self.tamanho_imagem = capacidade_memoria(largura_endereco)
+        self.quantidade = 0
+        self._arquivo = open(caminho, "wb")
+        self._gravar_cabecalho()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *_):
+        self.fechar()
+
+    def _gravar_cabecalho(self):
+        self._arquivo.write(FORMATO_CABECALHO.pack(ASSINATURA, VERSAO, self.largura_endereco,
+                                                   FLAG_ESTENDIDO if self.estendido else 0,
+                                                   self.tamanho_imagem, self.quantidade))
+
+    def adicionar(self, imagem):
+        if len(imagem) != self.tamanho_imagem:
+            raise ValueError(f"Imagem de memória deve ter {self.tamanho_imagem} bytes.")
+        self._arquivo.write(imagem)
+        self.quantidade += 1
+
+    def adicionar_bloco(self, dados):
+        """Acrescenta várias imagens já concatenadas (ex.: bytes de um array N x tamanho)."""
+        dados = memoryview(dados).cast("B")
+        if len(dados) % self.tamanho_imagem:
+            raise ValueError(f"O bloco deve ter um múltiplo de {self.tamanho_imagem} bytes.")
+        self._arquivo.write(dados)
+        self.quantidade += len(dados) // self.tamanho_imagem
+
+    def fechar(self):
+        if self._arquivo is not None:
+            self._arquivo.seek(_DESLOCAMENTO_QUANTIDADE)
+            self._arquivo.write(struct.pack("<Q", self.quantidade))
+            self._arquivo.close()
+            self._arquivo = None
+
+
+def salvar_conjunto(caminho, imagens, largura_endereco=LARGURA_ENDERECO_PADRAO, estendido=False):
+    with EscritorImagens(caminho, largura_endereco, estendido) as escritor:
+        for imagem in imagens:
+            escritor.adicionar(imagem)
+        return escritor.quantidade
+
+
+class LeitorImagens:
+    """Acesso às imagens de um conjunto (caminho de arquivo ou buffer) sem copiá-las.
+
+    `leitor[i]` é uma memoryview da i-ésima imagem, válida até fechar(); ela
+    pode ser passada direto a NucleoSAP1.carregar_programa. matriz() expõe o
+    mesmo mapeamento como array numpy N x tamanho para MotorVetorizadoSAP1.
+    """
+
+    def __init__(self, origem):
+        self._arquivo = None
+        self._mmap = None
+        if isinstance(origem, str) or hasattr(origem, "__fspath__"):
+            self._arquivo = open(origem, "rb")
+            self._mmap = mmap.mmap(self._arquivo.fileno(), 0, access=mmap.ACCESS_READ)
+            origem = self._mmap
+        self._dados = memoryview(origem)
+        if len(self._dados) < FORMATO_CABECALHO.size:
+            self.fechar()
+            raise ValueError("Arquivo de imagens inválido ou de versão incompatível.")
+
+        (assinatura, versao, self.largura_endereco, flags, self.tamanho_imagem,
+         self.quantidade) = FORMATO_CABECALHO.unpack_from(self._dados)
+        if (assinatura != ASSINATURA or versao != VERSAO
+                or largura_da_imagem(self.tamanho_imagem) != self.largura_endereco):
+            self.fechar()
+            raise ValueError("Arquivo de imagens inválido ou de versão incompatível.")
+        self.estendido = bool(flags & FLAG_ESTENDIDO)
+        fim = FORMATO_CABECALHO.size + self.quantidade * self.tamanho_imagem
+        if len(self._dados) < fim:
+            self.fechar()
+            raise ValueError(f"Arquivo de imagens truncado: esperadas {self.quantidade} imagens.")
+        self._imagens = self._dados[FORMATO_CABECALHO.size:fim]
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *_):
+        self.fechar()
+
+    def __len__(self):
+        return self.quantidade
+
+    def __getitem__(self, indice):
+        if indice < 0:
+            indice += self.quantidade
+        if not 0 <= indice < self.quantidade:
+            raise IndexError("Índice de imagem fora do conjunto.")
+        inicio = indice * self.tamanho_imagem
+        return self._imagens[inicio:inicio + self.tamanho_imagem]
+
+    def __iter__(self):
+        imagens = self._imagens
+        tamanho = self.tamanho_imagem
+        for inicio in range(0, len(imagens), tamanho):
+            yield imagens[inicio:inicio + tamanho]
+
+    def fatia(self, inicio, fim):
+        """Imagens inicio..fim-1 como uma única memoryview contígua."""
+        inicio, fim, _ = slice(inicio, fim).indices(self.quantidade)
+        return self._imagens[inicio * self.tamanho_imagem:max(fim, inicio) * self.tamanho_imagem]
+
+    def matriz(self, inicio=0, fim=None):
+        import numpy as np
+        return np.frombuffer(self.fatia(inicio, fim), dtype=np.uint8).reshape(-1, self.tamanho_imagem)
+
+    def fechar(self):
+        if hasattr(self, "_imagens"):
+            self._imagens.release()
+        self._dados.release()
+        if self._mmap is not None:
+            try:
+                self._mmap.close()
+            except BufferError:
+                # Ainda há fatias em uso; o mapeamento é liberado quando elas forem descartadas
+                pass
+            self._arquivo.close()
+            self._mmap = None
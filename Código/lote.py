@@ -0,0 +1,217 @@
+import argparse
+import collections
+import concurrent.futures
+import itertools
+import json
+import os
+import sys
+
+from nucleo_sap1 import NucleoSAP1, limite_passos
+from montador import ErroMontagem, montar
+from expressao import compilar_expressao
+from imagens import LeitorImagens
+import compilador_jit
+
+TIPO_EXPRESSAO = "expressao"
+TIPO_ASSEMBLY = "asm"
+TAMANHO_BLOCO = 64
+TAMANHO_BLOCO_IMAGENS = 4096
+LIMITE_PASSOS_LOTE = 1000000
+
+# tipo: TIPO_EXPRESSAO ou TIPO_ASSEMBLY; texto: expressão ou fonte assembly
+Trabalho = collections.namedtuple("Trabalho", ["tipo", "texto"])
+
+# indice: posição do trabalho na entrada; erro: mensagem quando a geração ou a montagem falha
+ResultadoLote = collections.namedtuple("ResultadoLote", ["indice", "saida", "passos", "motivo_parada", "erro"])
+
+
+def processar_trabalho(indice, trabalho, max_passos=LIMITE_PASSOS_LOTE):
+    """Gera o código (se for expressão), monta e executa no núcleo sem interface."""
+    tipo, texto = trabalho
+    try:
+        if tipo == TIPO_EXPRESSAO:
+            texto = compilar_expressao(texto).codigo
+        elif tipo != TIPO_ASSEMBLY:
+            raise ValueError(f"Tipo de trabalho desconhecido: {tipo}.")
+        programa = montar(texto)
+    except ErroMontagem as e:
+        return ResultadoLote(indice, None, 0, None, f"Linha {e.linha}: {e}")
+    except ValueError as e:
+        return ResultadoLote(indice, None, 0, None, str(e))
+
+    nucleo = NucleoSAP1()
+    nucleo.carregar_programa(programa.memoria)
+    saida, passos, motivo = compilador_jit.executar(nucleo, max_passos)
+    return ResultadoLote(indice, saida, passos, motivo, None)
+
+
+def processar_bloco(inicio, trabalhos, max_passos=LIMITE_PASSOS_LOTE):
+    # Unidade enviada a um processo: vários trabalhos por vez diluem o custo de serialização
+    return [processar_trabalho(indice, trabalho, max_passos) for indice, trabalho in enumerate(trabalhos, inicio)]
+
+
+# Conjunto de imagens aberto uma vez em cada processo do pool (ver executar_conjunto)
+_conjunto_do_processo = None
+
+
+def _abrir_conjunto_do_processo(caminho):
+    global _conjunto_do_processo
+    _conjunto_do_processo = LeitorImagens(caminho)
+
+
+def processar_faixa_imagens(inicio, fim, max_passos=LIMITE_PASSOS_LOTE, vetorizado=False, leitor=None):
+    """Executa as imagens inicio..fim-1 do conjunto, lidas direto do mapeamento do arquivo."""
+    if leitor is None:
+        leitor = _conjunto_do_processo
+    if vetorizado:
+        from motor_vetorizado import MotorVetorizadoSAP1
+        motor = MotorVetorizadoSAP1(leitor.matriz(inicio, fim)).executar(max_passos)
+        return [ResultadoLote(indice, *motor.resultado(i), None) for i, indice in enumerate(range(inicio, fim))]
+
+    # As imagens de um conjunto raramente se repetem: compilar cada uma custaria mais que interpretá-la
+    nucleo = NucleoSAP1(leitor.estendido, leitor.largura_endereco)
+    resultados = []
+    for indice in range(inicio, fim):
+        nucleo.reiniciar(leitor[indice])
+        saida, passos, motivo = nucleo.executar(max_passos)
+        resultados.append(ResultadoLote(indice, saida, passos, motivo, None))
+    return resultados
+
+
+def _blocos(trabalhos, tamanho_bloco):
+    iterador = iter(trabalhos)
+    inicio = 0
+    while True:
+        bloco = list(itertools.islice(iterador, tamanho_bloco))
+        if not bloco:
+            return
+        yield inicio, bloco
+        inicio += len(bloco)
+
+
+def executar_lote(trabalhos, processos=None, tamanho_bloco=TAMANHO_BLOCO, blocos_em_voo=None,
+                  max_passos=LIMITE_PASSOS_LOTE):
+    """Executa os trabalhos em um pool de processos e gera os resultados na ordem da entrada.
+
+    `trabalhos` pode ser um iterável preguiçoso: no máximo `blocos_em_voo` blocos
+    (padrão: dois por processo) ficam pendentes ao mesmo tempo, então a memória
+    usada não cresce com o tamanho da entrada. Com processos=1 tudo roda no
+    processo atual.
+    """
+    blocos = ((inicio, bloco, max_passos) for inicio, bloco in _blocos(trabalhos, tamanho_bloco))
+    return executar_em_ordem(processar_bloco, blocos, processos, blocos_em_voo)
+
+
+def executar_conjunto(caminho, processos=None, tamanho_bloco=TAMANHO_BLOCO_IMAGENS, blocos_em_voo=None,
+                      max_passos=LIMITE_PASSOS_LOTE, vetorizado=False):
+    """Executa todas as imagens de um arquivo .sapi, gerando os resultados na ordem do arquivo.
+
+    Só as faixas de índices atravessam a fronteira entre processos: cada
+    processo mapeia o arquivo uma vez e lê as imagens sem copiá-las.
+    Com vetorizado=True cada faixa roda no MotorVetorizadoSAP1 (precisa de
+    numpy e de imagens de 16 bytes do conjunto básico).
+
+    O arquivo é aberto e conferido já na chamada (ValueError/OSError saem daqui,
+    não da primeira iteração); só a execução é preguiçosa.
+    """
+    leitor = LeitorImagens(caminho)
+    if vetorizado and (leitor.estendido or leitor.largura_endereco != 4):
+        leitor.fechar()
+        raise ValueError("O motor vetorizado só executa imagens de 16 bytes do conjunto básico.")
+    return _executar_conjunto(leitor, caminho, processos, tamanho_bloco, blocos_em_voo, max_passos, vetorizado)
+
+
+def _executar_conjunto(leitor, caminho, processos, tamanho_bloco, blocos_em_voo, max_passos, vetorizado):
+    with leitor:
+        faixas = [(inicio, min(inicio + tamanho_bloco, len(leitor)), max_passos, vetorizado)
+                  for inicio in range(0, len(leitor), tamanho_bloco)]
+        if (processos or os.cpu_count() or 1) == 1:
+            for faixa in faixas:
+                yield from processar_faixa_imagens(*faixa, leitor=leitor)
+            return
+    yield from executar_em_ordem(processar_faixa_imagens, faixas, processos, blocos_em_voo,
+                                 _abrir_conjunto_do_processo, (caminho,))
+
+
+def executar_em_ordem(funcao, blocos, processos, blocos_em_voo, inicializador=None, argumentos_inicializador=()):
+    """Aplica `funcao` a cada bloco em um pool de processos e gera os resultados na ordem dos blocos.
+
+    Cada bloco é uma tupla de argumentos de `funcao`, que devolve a lista de
+    resultados do bloco; `blocos` pode ser infinito, já que só `blocos_em_voo`
+    ficam pendentes por vez.
+    """
+    processos = processos or os.cpu_count() or 1
+    if processos == 1:
+        for argumentos in blocos:
+            yield from funcao(*argumentos)
+        return
+
+    blocos_em_voo = blocos_em_voo or 2 * processos
+    with concurrent.futures.ProcessPoolExecutor(max_workers=processos, initializer=inicializador,
+                                                initargs=argumentos_inicializador) as executor:
+        pendentes = collections.deque()
+        for argumentos in blocos:
+            if len(pendentes) >= blocos_em_voo:
+                yield from pendentes.popleft().result()
+            pendentes.append(executor.submit(funcao, *argumentos))
+        while pendentes:
+            yield from pendentes.popleft().result()
+
+
+def _ler_trabalhos(caminhos):
+    # Arquivos .asm são um programa cada; os demais (ou "-") têm uma expressão por linha
+    for caminho in caminhos:
+        if caminho.lower().endswith(".asm"):
+            with open(caminho, encoding="utf-8") as arquivo:
+                yield Trabalho(TIPO_ASSEMBLY, arquivo.read())
+            continue
+        arquivo = sys.stdin if caminho == "-" else open(caminho, encoding="utf-8")
+        try:
+            for linha in arquivo:
+                linha = linha.strip()
+                if linha:
+                    yield Trabalho(TIPO_EXPRESSAO, linha)
+        finally:
+            if arquivo is not sys.stdin:
+                arquivo.close()
+
+
+def principal(argumentos=None):
+    parser = argparse.ArgumentParser(description="Executa programas e expressões do SAP-1 em lote.")
+    parser.add_argument("arquivos", nargs="*", default=["-"],
+                        help="arquivos .asm ou listas de expressões, uma por linha ('-' para a entrada padrão)")
+    parser.add_argument("-j", "--processos", type=int, default=None, help="número de processos (padrão: núcleos da CPU)")
+    parser.add_argument("--bloco", type=int, default=None,
+                        help=f"trabalhos enviados por vez a cada processo (padrão: {TAMANHO_BLOCO}, "
+                             f"ou {TAMANHO_BLOCO_IMAGENS} imagens com --conjunto)")
+    parser.add_argument("--max-passos", type=limite_passos, default=LIMITE_PASSOS_LOTE, help="limite de instruções por programa")
+    parser.add_argument("--conjunto", help="executar as imagens deste arquivo .sapi em vez de fontes e expressões")
+    parser.add_argument("--vetorizado", action="store_true",
+                        help="com --conjunto, executar cada bloco no motor vetorizado (numpy)")
+    args = parser.parse_args(argumentos)
+
+    if args.vetorizado:
+        # Falha aqui, e não em cada processo de trabalho, quando o numpy não está instalado
+        try:
+            import motor_vetorizado  # noqa: F401
+        except ImportError as e:
+            print(f"Erro: {e}", file=sys.stderr)
+            return 1
+    if args.conjunto:
+        try:
+            resultados = executar_conjunto(args.conjunto, args.processos, args.bloco or TAMANHO_BLOCO_IMAGENS,
+                                           max_passos=args.max_passos,
+                                           vetorizado=args.vetorizado)
+        except (ValueError, OSError) as e:
+            print(f"Erro: {e}", file=sys.stderr)
+            return 1
+    else:
+        resultados = executar_lote(_ler_trabalhos(args.arquivos), args.processos, args.bloco or TAMANHO_BLOCO,
+                                   max_passos=args.max_passos)
+    for resultado in resultados:
+        sys.stdout.write(json.dumps(resultado._asdict(), ensure_ascii=False) + "\n")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(principal())
@@ -0,0 +1,289 @@
+import collections
+import functools
+
+from nucleo_sap1 import (CAPACIDADE_MEMORIA, PARADA_PAR, PARADA_FIM_MEMORIA, PARADA_OPCODE_INVALIDO,
+                         PARADA_LIMITE_PASSOS, PARADA_LACO_INFINITO, limite_passos)
+
+# Palavra de controle de 12 bits, do bit mais significativo ao menos significativo.
+# Sinais com apóstrofo são ativos em nível baixo, como no SAP-1 original.
+SINAIS = ("Cp", "Ep", "Lm'", "CE'", "Li'", "Ei'", "La'", "Ea", "Su", "Eu", "Lb'", "Lo'")
+_BITS = {sinal: 1 << (len(SINAIS) - 1 - i) for i, sinal in enumerate(SINAIS)}
+# Sinais do modo estendido, acima do bit 11 (ativos em nível alto): Lp carrega o CP,
+# Jz/Jc carregam o CP só com a flag Zero/Carry ligada, We grava a RAM em REM e
+# Lf atualiza as flags com o resultado da ULA
+SINAIS_ESTENDIDOS = ("Lp", "Jz", "Jc", "We", "Lf")
+_BITS.update({sinal: 1 << (len(SINAIS) + i) for i, sinal in enumerate(SINAIS_ESTENDIDOS)})
+TODOS_SINAIS = SINAIS + SINAIS_ESTENDIDOS
+ATIVOS_EM_BAIXO = frozenset(sinal for sinal in SINAIS if sinal.endswith("'"))
+PALAVRA_INATIVA = sum(_BITS[sinal] for sinal in ATIVOS_EM_BAIXO)  # 0x3E3: nenhum sinal ativo
+
+
+def palavra_controle(*sinais):
+    """Monta a palavra de controle com os sinais informados ativos."""
+    palavra = PALAVRA_INATIVA
+    for sinal in sinais:
+        palavra ^= _BITS[sinal]
+    return palavra
+
+
+# Ciclo de busca, igual para todas as instruções
+ROM_BUSCA = (
+    palavra_controle("Ep", "Lm'"),   # T1: CP -> REM
+    palavra_controle("Cp"),          # T2: CP + 1
+    palavra_controle("CE'", "Li'"),  # T3: RAM[REM] -> RI
+)
+
+OPCODE_PAR = 0b1111
+
+# T4, T5 e T6 de cada opcode. PAR não tem entrada: a parada é decodificada em T4.
+ROM_EXECUCAO = {
+    0b0000: (palavra_controle("Lm'", "Ei'"), palavra_controle("CE'", "La'"), PALAVRA_INATIVA),            # CAR
+    0b0001: (palavra_controle("Lm'", "Ei'"), palavra_controle("CE'", "Lb'"), palavra_controle("La'", "Eu")),  # SOM
+    0b0010: (palavra_controle("Lm'", "Ei'"), palavra_controle("CE'", "Lb'"),
+             palavra_controle("La'", "Su", "Eu")),                                                         # SUB
+    0b1110: (palavra_controle("Ea", "Lo'"), PALAVRA_INATIVA, PALAVRA_INATIVA),                              # SAI
+}
+
+# Modo estendido (NucleoSAP1.usar_conjunto_estendido): SOM e SUB também carregam as flags
+ROM_ESTENDIDA = dict(ROM_EXECUCAO)
+ROM_ESTENDIDA.update({
+    0b0001: ROM_EXECUCAO[0b0001][:2] + (palavra_controle("La'", "Eu", "Lf"),),                     # SOM
+    0b0010: ROM_EXECUCAO[0b0010][:2] + (palavra_controle("La'", "Su", "Eu", "Lf"),),               # SUB
+    0b0011: (palavra_controle("Ei'", "La'"), PALAVRA_INATIVA, PALAVRA_INATIVA),                      # LDI
+    0b0100: (palavra_controle("Lm'", "Ei'"), palavra_controle("Ea", "We"), PALAVRA_INATIVA),          # STA
+    0b0101: (palavra_controle("Ei'", "Lp"), PALAVRA_INATIVA, PALAVRA_INATIVA),                       # JMP
+    0b0110: (palavra_controle("Ei'", "Jz"), PALAVRA_INATIVA, PALAVRA_INATIVA),                       # JZ
+    0b0111: (palavra_controle("Ei'", "Jc"), PALAVRA_INATIVA, PALAVRA_INATIVA),                       # JC
+})
+
+# Estados T consumidos por instrução (PAR para o relógio em T4)
+CICLOS_POR_OPCODE = {opcode: len(ROM_BUSCA) + len(palavras) for opcode, palavras in ROM_ESTENDIDA.items()}
+CICLOS_POR_OPCODE[OPCODE_PAR] = len(ROM_BUSCA) + 1
+
+
+# Quem coloca valor no barramento
+FONTE_NENHUMA, FONTE_CP, FONTE_OPERANDO, FONTE_RAM, FONTE_ACC, FONTE_ULA = range(6)
+# Quem carrega o valor do barramento (máscara de bits)
+DESTINO_REM, DESTINO_RI, DESTINO_ACC, DESTINO_B, DESTINO_SAIDA, DESTINO_CP, DESTINO_RAM = 1, 2, 4, 8, 16, 32, 64
+
+# fonte: FONTE_*; destinos: máscara DESTINO_*; incrementa_cp: Cp ativo; subtrai: Su ativo;
+# condicao: atributo da flag que condiciona a carga do CP (None: incondicional); atualiza_flags: Lf ativo
+MicroOperacao = collections.namedtuple("MicroOperacao", ["fonte", "destinos", "incrementa_cp", "subtrai",
+                                                         "condicao", "atualiza_flags"])
+
+# t: estado T (1 a 6); palavra: palavra de controle; barramento: valor no barramento (None se ninguém o dirigiu)
+MicroCiclo = collections.namedtuple("MicroCiclo", ["t", "palavra", "barramento"])
+
+ResultadoMicrocodigo = collections.namedtuple("ResultadoMicrocodigo", ["saida", "passos", "ciclos", "motivo_parada"])
+
+
+def sinais_ativos(palavra):
+    """Nomes dos sinais ativos na palavra, na ordem de TODOS_SINAIS."""
+    return tuple(sinal for sinal in TODOS_SINAIS
+                 if bool(palavra & _BITS[sinal]) != (sinal in ATIVOS_EM_BAIXO))
+
+
+@functools.lru_cache(maxsize=None)
+def decodificar_palavra(palavra):
+    ativos = set(sinais_ativos(palavra))
+    fontes = [fonte for sinal, fonte in (("Ep", FONTE_CP), ("Ei'", FONTE_OPERANDO), ("CE'", FONTE_RAM),
+                                          ("Ea", FONTE_ACC), ("Eu", FONTE_ULA)) if sinal in ativos]
+    if len(fontes) > 1:
+        raise ValueError(f"Palavra de controle 0x{palavra:03X} coloca {len(fontes)} valores no barramento.")
+    destinos = 0
+    for sinal, destino in (("Lm'", DESTINO_REM), ("Li'", DESTINO_RI), ("La'", DESTINO_ACC),
+                           ("Lb'", DESTINO_B), ("Lo'", DESTINO_SAIDA), ("We", DESTINO_RAM)):
+        if sinal in ativos:
+            destinos |= destino
+    condicao = None
+    if "Lp" in ativos or "Jz" in ativos or "Jc" in ativos:
+        destinos |= DESTINO_CP
+        if "Lp" not in ativos:
+            if "Jz" in ativos and "Jc" in ativos:
+                raise ValueError(f"Palavra de controle 0x{palavra:03X} ativa Jz e Jc ao mesmo tempo.")
+            condicao = "flag_zero" if "Jz" in ativos else "flag_carry"
+    return MicroOperacao(fontes[0] if fontes else FONTE_NENHUMA, destinos, "Cp" in ativos, "Su" in ativos,
+                         condicao, "Lf" in ativos)
+
+
+_EXPRESSOES_FONTE = {
+    FONTE_CP: "e.contador_programa",
+    FONTE_OPERANDO: "e.registrador_instrucao & 0x0F",
+    FONTE_RAM: "e.memoria[e.registrador_endereco]",
+    FONTE_ACC: "e.acumulador",
+}
+_ATRIBUTOS_DESTINO = (
+    (DESTINO_REM, "e.registrador_endereco = v & 0x0F"),
+    (DESTINO_RI, "e.registrador_instrucao = v"),
+    (DESTINO_ACC, "e.acumulador = v"),
+    (DESTINO_B, "e.registrador_b = v"),
+    (DESTINO_SAIDA, "e.registrador_saida = v"),
+    (DESTINO_RAM, "e.memoria[e.registrador_endereco] = v"),
+)
+
+
+def _fonte_micro(micro):
+    # Linhas Python equivalentes a um estado T; o valor do barramento fica em v
+    if micro.fonte == FONTE_NENHUMA:
+        linhas = ["v = None"]
+    elif micro.fonte == FONTE_ULA:
+        linhas = [f"s = e.acumulador {'-' if micro.subtrai else '+'} e.registrador_b", "v = s & 0xFF"]
+        if micro.atualiza_flags:
+            # Em SUB o Carry indica empréstimo
+            linhas += ["e.flag_zero = int(v == 0)", f"e.flag_carry = int({'s < 0' if micro.subtrai else 's > 0xFF'})"]
+    else:
+        linhas = [f"v = {_EXPRESSOES_FONTE[micro.fonte]}"]
+    linhas += [atribuicao for destino, atribuicao in _ATRIBUTOS_DESTINO if micro.destinos & destino]
+    if micro.destinos & DESTINO_CP:
+        carga = "e.contador_programa = v"
+        linhas.append(carga if micro.condicao is None else f"if e.{micro.condicao}: {carga}")
+    if micro.incrementa_cp:
+        linhas.append("e.contador_programa += 1")
+    return linhas
+
+
+@functools.lru_cache(maxsize=None)
+def compilar_palavras(palavras):
+    """Função f(estado) que aplica em sequência os estados T das palavras e devolve o último barramento."""
+    corpo = []
+    for palavra in palavras:
+        corpo += _fonte_micro(decodificar_palavra(palavra))
+    fonte = "def microprograma(e):\n" + "".join(f"    {linha}\n" for linha in corpo) + "    return v\n"
+    espaco = {}
+    exec(compile(fonte, "<microcódigo>", "exec"), espaco)
+    return espaco["microprograma"]
+
+
+class SequenciadorSAP1:
+    """Executa a ROM de microcódigo estado T a estado T sobre um EstadoSAP1.
+
+    O resultado de cada instrução é o mesmo de NucleoSAP1.passo(); a diferença é
+    que cada transferência pelo barramento acontece no estado T em que a
+    palavra de controle a ativa, o que permite contar ciclos e animar a
+    interface a partir das mesmas palavras. Cada palavra (e, em executar(),
+    cada sequência de palavras de um opcode) é traduzida uma vez para uma
+    função Python, então o laço não reinterpreta os bits a cada ciclo.
+
+    `verificar_laco`, se informado, é chamado depois de cada salto para trás e
+    devolve True quando o estado já foi visto (NucleoSAP1.estado_repetido); a
+    execução para então com PARADA_LACO_INFINITO, como no núcleo.
+    """
+
+    def __init__(self, estado, rom_execucao=ROM_EXECUCAO, verificar_laco=None):
+        self.estado = estado
+        self.rom_execucao = rom_execucao
+        self.verificar_laco = verificar_laco
+        self.motivo_parada = None
+        self.t = 0  # último estado T executado da instrução corrente (0: início da busca)
+        self._cp_apos_busca = 0
+        self.ciclos = 0
+        self._busca = tuple(compilar_palavras((palavra,)) for palavra in ROM_BUSCA)
+        self._rom = {opcode: tuple(compilar_palavras((palavra,)) for palavra in palavras)
+                     for opcode, palavras in rom_execucao.items()}
+
+    def ciclo(self):
+        """Executa um estado T. Devolve o MicroCiclo executado ou None se a máquina parou."""
+        if self.motivo_parada is not None:
+            return None
+        t = self.t + 1
+        if t == 1 and self.estado.contador_programa >= CAPACIDADE_MEMORIA:
+            self.motivo_parada = PARADA_FIM_MEMORIA
+            return None
+
+        if t <= len(ROM_BUSCA):
+            palavra = ROM_BUSCA[t - 1]
+            micro = self._busca[t - 1]
+            ultimo = False
+        else:
+            opcode = self.estado.registrador_instrucao >> 4
+            micros = self._rom.get(opcode)
+            if micros is None:
+                # PAR (ou opcode sem microcódigo) é decodificado em T4 e para o relógio
+                self.motivo_parada = PARADA_PAR if opcode == OPCODE_PAR else PARADA_OPCODE_INVALIDO
+                self.t = 0
+                self.ciclos += 1
+                return MicroCiclo(t, PALAVRA_INATIVA, None)
+            indice = t - 1 - len(ROM_BUSCA)
+            palavra = self.rom_execucao[opcode][indice]
+            micro = micros[indice]
+            ultimo = indice == len(micros) - 1
+
+        barramento = micro(self.estado)
+        self.ciclos += 1
+        self.t = 0 if ultimo else t
+        if t == len(ROM_BUSCA):
+            self._cp_apos_busca = self.estado.contador_programa
+        elif ultimo and self._saltou_para_laco(self._cp_apos_busca):
+            self.motivo_parada = PARADA_LACO_INFINITO
+        return MicroCiclo(t, palavra, barramento)
+
+    def _saltou_para_laco(self, cp_apos_busca):
+        # Mesma regra de NucleoSAP1._saltar: só saltos para trás passam pela verificação
+        return (self.verificar_laco is not None and self.estado.contador_programa < cp_apos_busca
+                and self.verificar_laco())
+
+    def instrucao(self):
+        """Executa os estados T restantes da instrução corrente e devolve a lista de MicroCiclo."""
+        ciclos = []
+        while True:
+            ciclo = self.ciclo()
+            if ciclo is None:
+                return ciclos
+            ciclos.append(ciclo)
+            if self.t == 0:
+                return ciclos
+
+    def executar(self, max_passos=None):
+        """Laço de ciclos até parar. Conta instruções como NucleoSAP1.executar."""
+        max_passos = limite_passos(max_passos)
+        # Termina a instrução em andamento estado a estado; daí em diante usa as sequências fundidas
+        while self.t and self.motivo_parada is None:
+            self.ciclo()
+
+        estado = self.estado
+        busca = compilar_palavras(ROM_BUSCA)
+        execucao = {opcode: (compilar_palavras(palavras), len(palavras))
+                    for opcode, palavras in self.rom_execucao.items()}
+        ciclos_busca = len(ROM_BUSCA)
+        passos = 0
+        ciclos = self.ciclos
+        while self.motivo_parada is None:
+            if passos == max_passos:
+                self.ciclos = ciclos
+                return ResultadoMicrocodigo(estado.registrador_saida, passos, ciclos, PARADA_LIMITE_PASSOS)
+            if estado.contador_programa >= CAPACIDADE_MEMORIA:
+                self.motivo_parada = PARADA_FIM_MEMORIA
+                break
+            passos += 1
+            busca(estado)
+            opcode = estado.registrador_instrucao >> 4
+            entrada = execucao.get(opcode)
+            if entrada is None:
+                self.motivo_parada = PARADA_PAR if opcode == OPCODE_PAR else PARADA_OPCODE_INVALIDO
+                ciclos += ciclos_busca + 1
+                break
+            cp_apos_busca = estado.contador_programa
+            entrada[0](estado)
+            ciclos += ciclos_busca + entrada[1]
+            if estado.contador_programa < cp_apos_busca and self._saltou_para_laco(cp_apos_busca):
+                self.motivo_parada = PARADA_LACO_INFINITO
+                break
+        self.ciclos = ciclos
+        return ResultadoMicrocodigo(estado.registrador_saida, passos, ciclos, self.motivo_parada)
+
+
+def rom_do_nucleo(nucleo):
+    return ROM_ESTENDIDA if nucleo.estendido else ROM_EXECUCAO
+
+
+def executar_nucleo(nucleo, max_passos=None):
+    """Executa o núcleo pelo microcódigo, mantendo nucleo.motivo_parada coerente."""
+    if nucleo.bytes_operando:
+        raise ValueError("O microcódigo só descreve a máquina com endereços de 4 bits.")
+    verificar_laco = nucleo.estado_repetido if nucleo.detectar_lacos else None
+    sequenciador = SequenciadorSAP1(nucleo.estado, rom_do_nucleo(nucleo), verificar_laco)
+    sequenciador.motivo_parada = nucleo.motivo_parada
+    resultado = sequenciador.executar(max_passos)
+    if resultado.motivo_parada != PARADA_LIMITE_PASSOS:
+        nucleo.motivo_parada = resultado.motivo_parada
+    return resultado
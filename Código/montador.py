@@ -0,0 +1,259 @@
+import collections
+
+from nucleo_sap1 import LARGURA_ENDERECO_PADRAO, capacidade_memoria, bytes_operando
+
+OPCODES = {
+    "CAR": 0b0000,
+    "SOM": 0b0001,
+    "SUB": 0b0010,
+    "SAI": 0b1110,
+    "PAR": 0b1111
+}
+INSTRUCOES_COM_OPERANDO = ("CAR", "SOM", "SUB")
+
+# Modo estendido (NucleoSAP1.usar_conjunto_estendido): LDI carrega o operando no ACC,
+# STA grava o ACC na memória e JMP/JZ/JC desviam para o endereço do operando
+OPCODES_ESTENDIDOS = dict(OPCODES, LDI=0b0011, STA=0b0100, JMP=0b0101, JZ=0b0110, JC=0b0111)
+INSTRUCOES_COM_OPERANDO_ESTENDIDAS = INSTRUCOES_COM_OPERANDO + ("LDI", "STA", "JMP", "JZ", "JC")
+
+# memoria: imagem montada (bytearray); endereco_para_linha / linha_para_endereco: linhas do fonte começando em 1
+ProgramaMontado = collections.namedtuple("ProgramaMontado", ["memoria", "endereco_para_linha", "linha_para_endereco"])
+
+
+class ErroMontagem(ValueError):
+    def __init__(self, linha, mensagem):
+        super().__init__(mensagem)
+        self.linha = linha
+
+
+# tipo: None (linha vazia), "ORG", "DB" ou "INSTRUCAO"; valor: endereço, byte ou bytes da instrução montada
+LinhaAnalisada = collections.namedtuple("LinhaAnalisada", ["tipo", "valor", "erro"])
+LINHA_VAZIA = LinhaAnalisada(None, None, None)
+
+
+def analisar_linha(linha, estendido=False, largura_endereco=LARGURA_ENDERECO_PADRAO):
+    """Analisa uma linha isolada; erros que dependem do contexto ficam para o posicionamento."""
+    capacidade = capacidade_memoria(largura_endereco)
+    try:
+        inicio_comentario = linha.find(';')
+        if inicio_comentario != -1:
+            linha = linha[:inicio_comentario]
+        partes = linha.split()
+        if not partes:
+            return LINHA_VAZIA
+
+        mnemonic = partes[0].upper()
+
+        if mnemonic == "ORG":
+            if len(partes) < 2:
+                raise ValueError(f"ORG requer um endereço.")
+            endereco = int(partes[1], 16)
+            if not (0 <= endereco < capacidade):
+                raise ValueError(f"Endereço ORG fora do intervalo (00-{capacidade-1:01X}).")
+            return LinhaAnalisada("ORG", endereco, None)
+
+        elif mnemonic == "DB":
+            if len(partes) < 2:
+                raise ValueError(f"DB requer um valor.")
+            valor = int(partes[1])
+            if not (0 <= valor <= 255):
+                raise ValueError(f"Valor DB deve estar entre 0 e 255.")
+            return LinhaAnalisada("DB", valor, None)
+
+        opcode = (OPCODES_ESTENDIDOS if estendido else OPCODES).get(mnemonic)
+        if opcode is None:
+            if not estendido and mnemonic in OPCODES_ESTENDIDOS:
+                raise ValueError(f"{mnemonic} só existe no modo estendido.")
+            raise ValueError(f"Mnemonico inválido: {mnemonic}.")
+
+        operando = 0
+        if mnemonic in (INSTRUCOES_COM_OPERANDO_ESTENDIDAS if estendido else INSTRUCOES_COM_OPERANDO):
+            if len(partes) < 2:
+                raise ValueError(f"Operando faltando para {mnemonic}.")
+            try:
+                operando = int(partes[1], 16)
+            except ValueError:
+                raise ValueError(f"Operando inválido para {mnemonic}. Esperado endereço hexadecimal.")
+
+            # LDI carrega um byte no ACC; os demais operandos são endereços
+            limite = min(capacidade, 256) if mnemonic == "LDI" else capacidade
+            if not (0 <= operando < limite):
+                raise ValueError(f"Operando para {mnemonic} deve estar entre 00 e {limite-1:01X}.")
+        elif len(partes) > 1:
+            raise ValueError(f"Instrução {mnemonic} não aceita operando.")
+        else:
+            return LinhaAnalisada("INSTRUCAO", bytes((opcode << 4,)), None)
+
+        tamanho_operando = bytes_operando(largura_endereco)
+        if not tamanho_operando:
+            return LinhaAnalisada("INSTRUCAO", bytes(((opcode << 4) | operando,)), None)
+        return LinhaAnalisada("INSTRUCAO", bytes((opcode << 4,)) + operando.to_bytes(tamanho_operando, "little"), None)
+
+    except ValueError as e:
+        return LinhaAnalisada(None, None, str(e))
+
+
+def posicionar(analisadas, parar_no_primeiro_erro=False, largura_endereco=LARGURA_ENDERECO_PADRAO):
+    """Distribui as linhas analisadas na memória. Devolve (ProgramaMontado, [(linha, mensagem), ...])."""
+    capacidade = capacidade_memoria(largura_endereco)
+    memoria = bytearray(capacidade)
+    endereco_para_linha = {}
+    linha_para_endereco = {}
+    erros = []
+
+    ponteiro_instrucao = 0
+    ponteiro_dados = None
+
+    for num_linha, (tipo, valor, erro) in enumerate(analisadas, 1):
+        if erro is None:
+            if tipo is None:
+                continue
+            elif tipo == "ORG":
+                ponteiro_dados = valor
+                continue
+            elif tipo == "DB":
+                if ponteiro_dados is None:
+                    erro = f"DB deve ser precedido por ORG."
+                elif ponteiro_dados >= capacidade:
+                    erro = f"Memória insuficiente para DB (máx {capacidade} bytes)."
+                else:
+                    memoria[ponteiro_dados] = valor
+                    endereco_para_linha[ponteiro_dados] = num_linha
+                    linha_para_endereco[num_linha] = ponteiro_dados
+                    ponteiro_dados += 1
+                    continue
+            elif ponteiro_instrucao + len(valor) > capacidade:
+                erro = f"Programa muito grande para memória (máx {capacidade} bytes)."
+            else:
+                memoria[ponteiro_instrucao:ponteiro_instrucao + len(valor)] = valor
+                endereco_para_linha[ponteiro_instrucao] = num_linha
+                linha_para_endereco[num_linha] = ponteiro_instrucao
+                ponteiro_instrucao += len(valor)
+                continue
+
+        erros.append((num_linha, erro))
+        if parar_no_primeiro_erro:
+            break
+
+    return ProgramaMontado(memoria, endereco_para_linha, linha_para_endereco), erros
+
+
+def montar(codigo, estendido=False, largura_endereco=LARGURA_ENDERECO_PADRAO):
+    """Monta o fonte em uma imagem de memória e nos índices endereço <-> linha."""
+    programa, erros = posicionar([analisar_linha(linha, estendido, largura_endereco) for linha in codigo.split('\n')],
+                                 parar_no_primeiro_erro=True, largura_endereco=largura_endereco)
+    if erros:
+        raise ErroMontagem(*erros[0])
+    return programa
+
+
+def desmontar(memoria, estendido=False, largura_endereco=LARGURA_ENDERECO_PADRAO):
+    """Gera um fonte que monta exatamente `memoria` (ex.: uma imagem lida de arquivo).
+
+    Instruções são lidas do endereço 0 até o primeiro PAR ou até um byte que o
+    montador não produziria como instrução; o restante vira ORG/DB.
+    """
+    capacidade = capacidade_memoria(largura_endereco)
+    if len(memoria) != capacidade:
+        raise ValueError(f"Imagem de memória deve ter {capacidade} bytes.")
+    nomes = {opcode: nome for nome, opcode in (OPCODES_ESTENDIDOS if estendido else OPCODES).items()}
+    com_operando = INSTRUCOES_COM_OPERANDO_ESTENDIDAS if estendido else INSTRUCOES_COM_OPERANDO
+    tamanho_operando = bytes_operando(largura_endereco)
+    # Daqui em diante a memória é zero, que é o valor inicial de qualquer montagem
+    usados = len(bytes(memoria).rstrip(b"\0"))
+
+    linhas = []
+    endereco = 0
+    while endereco < usados:
+        palavra = memoria[endereco]
+        nome = nomes.get(palavra >> 4)
+        if nome is None:
+            break
+        if nome not in com_operando:
+            if palavra & 0x0F:
+                break
+            fim = endereco + 1
+            linhas.append(nome)
+        else:
+            if tamanho_operando:
+                fim = endereco + 1 + tamanho_operando
+                if palavra & 0x0F or fim > capacidade:
+                    break
+                operando = int.from_bytes(memoria[endereco + 1:fim], "little")
+            else:
+                fim = endereco + 1
+                operando = palavra & 0x0F
+            if operando >= (min(capacidade, 256) if nome == "LDI" else capacidade):
+                break
+            linhas.append(f"{nome} {operando:X}")
+        endereco = fim
+        if nome == "PAR":
+            break
+
+    if endereco < usados:
+        linhas.append("")
+    anterior = None
+    for endereco in range(endereco, usados):
+        valor = memoria[endereco]
+        if not valor:
+            continue
+        if anterior != endereco - 1:
+            linhas.append(f"ORG {endereco:X}")
+        linhas.append(f"DB {valor}")
+        anterior = endereco
+    return "\n".join(linhas)
+
+
+class MontadorIncremental:
+    """Montador que guarda a análise de cada linha e só reanalisa linhas novas ou alteradas.
+
+    A chave do cache é o texto da linha, então inserir ou remover linhas não
+    invalida as demais. O posicionamento em memória é refeito a cada chamada,
+    mas trabalha apenas com os valores já analisados.
+    """
+
+    def __init__(self, estendido=False, largura_endereco=LARGURA_ENDERECO_PADRAO):
+        self._cache = {}
+        self.linhas_reanalisadas = 0
+        self.estendido = estendido
+        self.largura_endereco = largura_endereco
+
+    def usar_conjunto_estendido(self, ativo=True):
+        if ativo != self.estendido:
+            self.estendido = ativo
+            self._cache = {}
+
+    def definir_largura_endereco(self, largura_endereco):
+        if largura_endereco != self.largura_endereco:
+            capacidade_memoria(largura_endereco)
+            self.largura_endereco = largura_endereco
+            self._cache = {}
+
+    def montar(self, codigo):
+        """Devolve (ProgramaMontado, erros) com todos os erros encontrados."""
+        cache_anterior = self._cache
+        cache = {}
+        analisadas = []
+        reanalisadas = 0
+        for linha in codigo.split('\n'):
+            analisada = cache.get(linha)
+            if analisada is None:
+                analisada = cache_anterior.get(linha)
+                if analisada is None:
+                    analisada = analisar_linha(linha, self.estendido, self.largura_endereco)
+                    reanalisadas += 1
+                cache[linha] = analisada
+            analisadas.append(analisada)
+        self._cache = cache
+        self.linhas_reanalisadas = reanalisadas
+        return posicionar(analisadas, largura_endereco=self.largura_endereco)
+
+
+def aplicar_memoria(memoria_destino, memoria):
+    """Escreve em memoria_destino apenas os bytes diferentes. Devolve os endereços alterados."""
+    if memoria_destino == memoria:
+        return []
+    alterados = [endereco for endereco, valor in enumerate(memoria) if memoria_destino[endereco] != valor]
+    for endereco in alterados:
+        memoria_destino[endereco] = memoria[endereco]
+    return alterados
@@ -0,0 +1,120 @@
+try:
+    import numpy as np
+except ImportError as e:
+    raise ImportError("O motor vetorizado precisa do numpy (dependência opcional): pip install numpy") from e
+
+from nucleo_sap1 import (CAPACIDADE_MEMORIA, PARADA_PAR, PARADA_FIM_MEMORIA,
+                         PARADA_OPCODE_INVALIDO, PARADA_LIMITE_PASSOS, ResultadoExecucao)
+
+# Códigos numéricos dos motivos de parada (0 = ainda executando)
+MOTIVOS_PARADA = (None, PARADA_PAR, PARADA_FIM_MEMORIA, PARADA_OPCODE_INVALIDO, PARADA_LIMITE_PASSOS)
+_PAR, _FIM_MEMORIA, _OPCODE_INVALIDO, _LIMITE_PASSOS = 1, 2, 3, 4
+
+OP_CAR = 0b0000
+OP_SOM = 0b0001
+OP_SUB = 0b0010
+OP_SAI = 0b1110
+OP_PAR = 0b1111
+
+
+class MotorVetorizadoSAP1:
+    """Executa N imagens de memória em paralelo com a mesma semântica de NucleoSAP1.
+
+    Cada linha de `imagens` (N x CAPACIDADE_MEMORIA, uint8) é uma máquina
+    independente; máquinas paradas ficam congeladas enquanto as demais avançam.
+    """
+
+    def __init__(self, imagens):
+        self.carregar(imagens)
+
+    def carregar(self, imagens):
+        imagens = np.asarray(imagens, dtype=np.uint8)
+        if imagens.ndim != 2 or imagens.shape[1] != CAPACIDADE_MEMORIA:
+            raise ValueError(f"Esperado array N x {CAPACIDADE_MEMORIA} de imagens de memória.")
+        self.memoria = np.array(imagens, dtype=np.uint8, copy=True)
+        n = self.memoria.shape[0]
+        self.contador_programa = np.zeros(n, dtype=np.intp)
+        self.acumulador = np.zeros(n, dtype=np.uint8)
+        self.registrador_endereco = np.zeros(n, dtype=np.uint8)
+        self.registrador_instrucao = np.zeros(n, dtype=np.uint8)
+        self.registrador_b = np.zeros(n, dtype=np.uint8)
+        self.registrador_saida = np.zeros(n, dtype=np.uint8)
+        self.passos = np.zeros(n, dtype=np.int64)
+        self.motivo = np.zeros(n, dtype=np.uint8)
+
+    def __len__(self):
+        return self.memoria.shape[0]
+
+    def passo(self):
+        """Avança um ciclo de instrução em todas as máquinas ativas. Devolve quantas seguem ativas."""
+        ativos = np.flatnonzero(self.motivo == 0)
+        if ativos.size == 0:
+            return 0
+
+        pc = self.contador_programa[ativos]
+        fora = pc >= CAPACIDADE_MEMORIA
+        if fora.any():
+            self.motivo[ativos[fora]] = _FIM_MEMORIA
+            ativos = ativos[~fora]
+            pc = pc[~fora]
+            if ativos.size == 0:
+                return 0
+
+        # Busca: T1 (CP -> REM), T2 (CP + 1), T3 (Memória[REM] -> RI)
+        memoria = self.memoria
+        ri = memoria[ativos, pc]
+        self.registrador_endereco[ativos] = pc
+        self.contador_programa[ativos] = pc + 1
+        self.registrador_instrucao[ativos] = ri
+        self.passos[ativos] += 1
+
+        opcode = ri >> 4
+        operando = (ri & 0x0F).astype(np.intp)
+
+        acessa_memoria = opcode <= OP_SUB
+        if acessa_memoria.any():
+            linhas = ativos[acessa_memoria]
+            enderecos = operando[acessa_memoria]
+            dado = memoria[linhas, enderecos]
+            op = opcode[acessa_memoria]
+            self.registrador_endereco[linhas] = enderecos
+
+            car = op == OP_CAR
+            self.acumulador[linhas[car]] = dado[car]
+
+            alu = ~car
+            if alu.any():
+                linhas_alu = linhas[alu]
+                dado_alu = dado[alu]
+                self.registrador_b[linhas_alu] = dado_alu
+                acc = self.acumulador[linhas_alu]
+                # uint8 já faz o "& 0xFF" por aritmética modular
+                self.acumulador[linhas_alu] = np.where(op[alu] == OP_SOM, acc + dado_alu, acc - dado_alu)
+
+        sai = opcode == OP_SAI
+        if sai.any():
+            self.registrador_saida[ativos[sai]] = self.acumulador[ativos[sai]]
+
+        self.motivo[ativos[opcode == OP_PAR]] = _PAR
+        invalido = (opcode > OP_SUB) & (opcode != OP_SAI) & (opcode != OP_PAR)
+        self.motivo[ativos[invalido]] = _OPCODE_INVALIDO
+
+        return int(np.count_nonzero(self.motivo == 0))
+
+    def executar(self, max_passos=None):
+        """Executa até todas as máquinas pararem ou até max_passos ciclos."""
+        ciclos = 0
+        while np.any(self.motivo == 0):
+            if max_passos is not None and ciclos >= max_passos:
+                self.motivo[self.motivo == 0] = _LIMITE_PASSOS
+                break
+            self.passo()
+            ciclos += 1
+        return self
+
+    def resultado(self, indice):
+        return ResultadoExecucao(int(self.registrador_saida[indice]), int(self.passos[indice]),
+                                 MOTIVOS_PARADA[self.motivo[indice]])
+
+    def resultados(self):
+        return [self.resultado(i) for i in range(len(self))]
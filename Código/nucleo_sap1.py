@@ -0,0 +1,620 @@
+import collections
+import collections.abc
+import struct
+
+# Largura do endereço em bits. Com 4 bits (o SAP-1 original) cada instrução é um byte
+# opcode | operando; com mais bits a instrução é o byte do opcode seguido do endereço
+# em little-endian, como no SAP-2.
+LARGURA_ENDERECO_PADRAO = 4
+LARGURA_ENDERECO_MAXIMA = 16
+CAPACIDADE_MEMORIA = 1 << LARGURA_ENDERECO_PADRAO
+
+# Instruções que não têm operando (ocupam um byte em qualquer largura)
+INSTRUCOES_SEM_OPERANDO = frozenset(("SAI", "PAR"))
+
+# Motivos de parada devolvidos por NucleoSAP1.executar
+PARADA_PAR = "PAR"
+PARADA_FIM_MEMORIA = "FIM_MEMORIA"
+PARADA_OPCODE_INVALIDO = "OPCODE_INVALIDO"
+PARADA_LIMITE_PASSOS = "LIMITE_PASSOS"
+PARADA_LACO_INFINITO = "LACO_INFINITO"
+
+# Fases registradas em um rastro de execução (ver rastro.py)
+FASE_T1 = 1
+FASE_T2 = 2
+FASE_T3 = 3
+FASE_EXECUCAO = 4
+
+ResultadoExecucao = collections.namedtuple("ResultadoExecucao", ["saida", "passos", "motivo_parada"])
+
+# dados: EstadoSAP1.empacotar(); motivo_parada: motivo do núcleo no momento da cópia
+Instantaneo = collections.namedtuple("Instantaneo", ["dados", "motivo_parada"])
+
+# CP, ACC, REM, RI, B, SAIDA, Zero, Carry (seguidos dos bytes da memória em EstadoSAP1.empacotar).
+# O CP é de 32 bits porque pode passar de 0xFFFF depois da última instrução de uma memória de 64 KiB.
+FORMATO_REGISTRADORES = struct.Struct("<IBHBBBBB")
+
+# Tamanho dos trechos comparados de uma vez ao restaurar a memória (ver NucleoSAP1._restaurar_memoria)
+TRECHO_COMPARACAO_MEMORIA = 256
+
+
+def capacidade_memoria(largura_endereco):
+    """Bytes endereçáveis com `largura_endereco` bits; valida a largura."""
+    if not LARGURA_ENDERECO_PADRAO <= largura_endereco <= LARGURA_ENDERECO_MAXIMA:
+        raise ValueError(f"Largura de endereço deve estar entre {LARGURA_ENDERECO_PADRAO} "
+                         f"e {LARGURA_ENDERECO_MAXIMA} bits.")
+    return 1 << largura_endereco
+
+
+def bytes_operando(largura_endereco):
+    """Bytes de operando depois do opcode (0: operando no próprio byte do opcode)."""
+    if largura_endereco == LARGURA_ENDERECO_PADRAO:
+        return 0
+    return (largura_endereco + 7) // 8
+
+
+def limite_passos(valor):
+    """Valida um limite de passos: inteiro >= 0, ou None para executar sem limite.
+
+    Um limite negativo nunca seria alcançado e viraria "sem limite" sem aviso;
+    serve também de type= para as opções --max-passos do argparse.
+    """
+    if valor is None:
+        return None
+    limite = int(valor)
+    if limite < 0:
+        raise ValueError("max_passos não pode ser negativo.")
+    return limite
+
+
+def resultado_dentro_do_limite(passos, motivo_parada, max_passos):
+    """Indica se uma execução completa de `passos` passos também terminaria assim com max_passos."""
+    if max_passos is None:
+        return True
+    # executar() confere o limite antes de detectar o fim da memória
+    return passos < max_passos or (passos == max_passos and motivo_parada != PARADA_FIM_MEMORIA)
+
+
+class EstadoSAP1:
+    """Estado compacto da máquina: registradores em slots e RAM em bytearray."""
+
+    __slots__ = ("contador_programa", "acumulador", "registrador_endereco", "registrador_instrucao",
+                 "registrador_b", "registrador_saida", "flag_zero", "flag_carry", "memoria")
+
+    def __init__(self, memoria=None):
+        self.contador_programa = 0
+        self.acumulador = 0
+        self.registrador_endereco = 0
+        self.registrador_instrucao = 0
+        self.registrador_b = 0
+        self.registrador_saida = 0
+        self.flag_zero = 0
+        self.flag_carry = 0
+        self.memoria = bytearray(CAPACIDADE_MEMORIA if memoria is None else memoria)
+
+    def reset(self):
+        self.contador_programa = 0
+        self.acumulador = 0
+        self.registrador_endereco = 0
+        self.registrador_instrucao = 0
+        self.registrador_b = 0
+        self.registrador_saida = 0
+        self.flag_zero = 0
+        self.flag_carry = 0
+        self.memoria[:] = bytes(len(self.memoria))
+
+    def copy(self):
+        copia = EstadoSAP1.__new__(EstadoSAP1)
+        copia.contador_programa = self.contador_programa
+        copia.acumulador = self.acumulador
+        copia.registrador_endereco = self.registrador_endereco
+        copia.registrador_instrucao = self.registrador_instrucao
+        copia.registrador_b = self.registrador_b
+        copia.registrador_saida = self.registrador_saida
+        copia.flag_zero = self.flag_zero
+        copia.flag_carry = self.flag_carry
+        copia.memoria = bytearray(self.memoria)
+        return copia
+
+    def empacotar_registradores(self):
+        return FORMATO_REGISTRADORES.pack(
+            self.contador_programa, self.acumulador, self.registrador_endereco, self.registrador_instrucao,
+            self.registrador_b, self.registrador_saida, self.flag_zero, self.flag_carry)
+
+    def restaurar_registradores(self, dados):
+        (self.contador_programa, self.acumulador, self.registrador_endereco, self.registrador_instrucao,
+         self.registrador_b, self.registrador_saida, self.flag_zero,
+         self.flag_carry) = FORMATO_REGISTRADORES.unpack_from(dados)
+
+    def empacotar(self):
+        return self.empacotar_registradores() + bytes(self.memoria)
+
+    @classmethod
+    def desempacotar(cls, dados):
+        estado = cls.__new__(cls)
+        estado.restaurar_registradores(dados)
+        estado.memoria = bytearray(dados[FORMATO_REGISTRADORES.size:])
+        return estado
+
+    def __eq__(self, outro):
+        if not isinstance(outro, EstadoSAP1):
+            return NotImplemented
+        return all(getattr(self, campo) == getattr(outro, campo) for campo in EstadoSAP1.__slots__)
+
+    __hash__ = None
+
+
+# Nomes usados pela interface gráfica -> atributos de EstadoSAP1
+CAMPOS_REGISTRADORES = {
+    "ContadorPrograma": "contador_programa",
+    "Acumulador": "acumulador",
+    "RegistradorEndereco": "registrador_endereco",
+    "RegistradorInstrucao": "registrador_instrucao",
+    "RegistradorB": "registrador_b",
+    "RegistradorSaida": "registrador_saida",
+}
+CAMPOS_FLAGS = {"Zero": "flag_zero", "Carry": "flag_carry"}
+
+
+class _VisaoCampos(collections.abc.MutableMapping):
+    # Visão em forma de dicionário sobre o estado atual do núcleo
+    def __init__(self, nucleo, campos):
+        self._nucleo = nucleo
+        self._campos = campos
+
+    def __getitem__(self, chave):
+        return getattr(self._nucleo.estado, self._campos[chave])
+
+    def __setitem__(self, chave, valor):
+        setattr(self._nucleo.estado, self._campos[chave], valor)
+
+    def __delitem__(self, chave):
+        raise TypeError("Registradores não podem ser removidos.")
+
+    def __iter__(self):
+        return iter(self._campos)
+
+    def __len__(self):
+        return len(self._campos)
+
+    def __repr__(self):
+        return repr(dict(self))
+
+
+class VisaoRegistradores(_VisaoCampos):
+    def __init__(self, nucleo):
+        super().__init__(nucleo, CAMPOS_REGISTRADORES)
+        self._flags = _VisaoCampos(nucleo, CAMPOS_FLAGS)
+
+    def __getitem__(self, chave):
+        if chave == "Flags":
+            return self._flags
+        return super().__getitem__(chave)
+
+    def __setitem__(self, chave, valor):
+        if chave == "Flags":
+            self._flags.update(valor)
+        else:
+            super().__setitem__(chave, valor)
+
+    def __iter__(self):
+        yield from self._campos
+        yield "Flags"
+
+    def __len__(self):
+        return len(self._campos) + 1
+
+
+class MemoriaPrincipal(bytearray):
+    """RAM que invalida a entrada pré-decodificada de cada endereço escrito.
+
+    Com operandos em bytes separados (`alcance` > 0), uma escrita também
+    invalida as instruções que começam até `alcance` bytes antes dela.
+    Se `escritas` for uma lista, cada escrita acrescenta (índice, valor anterior)
+    a ela; é assim que o histórico guarda só os bytes alterados por passo.
+    """
+
+    escritas = None
+
+    def __init__(self, valores, tabela, alcance=0):
+        super().__init__(valores)
+        self._tabela = tabela
+        self._alcance = alcance
+
+    def __setitem__(self, indice, valor):
+        if self.escritas is not None:
+            self.escritas.append((indice, self[indice]))
+        super().__setitem__(indice, valor)
+        if isinstance(indice, slice):
+            inicio, fim, _ = indice.indices(len(self))
+        else:
+            inicio = fim = indice if indice >= 0 else indice + len(self)
+            fim += 1
+        inicio = max(inicio - self._alcance, 0)
+        self._tabela[inicio:fim] = [None] * (fim - inicio)
+
+
+class NucleoSAP1:
+    def __init__(self, estendido=False, largura_endereco=LARGURA_ENDERECO_PADRAO):
+        self.largura_endereco = largura_endereco
+        self.capacidade = capacidade_memoria(largura_endereco)
+        self.bytes_operando = bytes_operando(largura_endereco)
+        self.estado = EstadoSAP1(self.capacidade)
+        self.registradores = VisaoRegistradores(self)
+        self.motivo_parada = None
+        # Instrumentação opcional (rastro.RastroExecucao, perfilador.PerfiladorSAP1);
+        # com ambos em None o laço principal não paga nada por elas
+        self.rastro = None
+        self.perfilador = None
+        # Com saltos, um estado repetido em um salto para trás é um laço sem fim
+        self.detectar_lacos = True
+        self.reiniciar_deteccao_lacos()
+
+        self.estendido = False
+        self.conjunto_instrucoes = {
+            0b0000: ("CAR", self._executar_car),
+            0b0001: ("SOM", self._executar_som),
+            0b0010: ("SUB", self._executar_sub),
+            0b1110: ("SAI", self._executar_sai),
+            0b1111: ("PAR", self._executar_par)
+        }
+        self.memoria_principal = self.estado.memoria
+        if estendido:
+            self.usar_conjunto_estendido()
+
+    def usar_conjunto_estendido(self, ativo=True):
+        """Liga (ou desliga) as instruções do modo estendido, no estilo do SAP-2.
+
+        No modo estendido SOM e SUB atualizam as flags Zero e Carry (em SUB o
+        Carry indica empréstimo), e os opcodes livres ganham LDI, STA, JMP, JZ e JC.
+        """
+        self.estendido = ativo
+        if ativo:
+            self.conjunto_instrucoes.update({
+                0b0001: ("SOM", self._executar_som_flags),
+                0b0010: ("SUB", self._executar_sub_flags),
+                0b0011: ("LDI", self._executar_ldi),
+                0b0100: ("STA", self._executar_sta),
+                0b0101: ("JMP", self._executar_jmp),
+                0b0110: ("JZ", self._executar_jz),
+                0b0111: ("JC", self._executar_jc),
+            })
+        else:
+            for opcode in (0b0011, 0b0100, 0b0101, 0b0110, 0b0111):
+                self.conjunto_instrucoes.pop(opcode, None)
+            self.conjunto_instrucoes[0b0001] = ("SOM", self._executar_som)
+            self.conjunto_instrucoes[0b0010] = ("SUB", self._executar_sub)
+        self.invalidar_decodificacao()
+
+    def definir_largura_endereco(self, largura_endereco):
+        """Troca a largura do endereço; a memória volta zerada com a nova capacidade."""
+        capacidade = capacidade_memoria(largura_endereco)
+        self.largura_endereco = largura_endereco
+        self.capacidade = capacidade
+        self.bytes_operando = bytes_operando(largura_endereco)
+        self.estado.reset()
+        self.memoria_principal = bytes(capacidade)
+        self.motivo_parada = None
+
+    def reiniciar_deteccao_lacos(self):
+        """Esquece os estados vistos; chamar sempre que o estado for alterado por fora da execução."""
+        self._laco_referencia = None
+        self._laco_memoria = None
+        self._laco_saltos = 0
+        self._laco_janela = 1
+
+    @property
+    def memoria_principal(self):
+        return self.estado.memoria
+
+    @memoria_principal.setter
+    def memoria_principal(self, valores):
+        # A tabela começa vazia e cada endereço é decodificado na primeira vez que é executado;
+        # decodificar tudo aqui custaria ~90 ms a cada carga de uma memória de 64 KiB
+        self._tabela_decodificada = [None] * len(valores)
+        self.estado.memoria = MemoriaPrincipal(valores, self._tabela_decodificada, self.bytes_operando)
+        self.reiniciar_deteccao_lacos()
+
+    def invalidar_decodificacao(self):
+        # Esvazia a tabela no lugar (MemoriaPrincipal guarda a mesma lista); chamar após alterar conjunto_instrucoes
+        self._tabela_decodificada[:] = [None] * len(self._tabela_decodificada)
+
+    def predecodificar(self):
+        # Preenche toda a tabela endereço -> (função, operando) de uma vez, em vez de sob demanda
+        for endereco in range(len(self.estado.memoria)):
+            self._decodificar(endereco)
+
+    def _decodificar(self, endereco):
+        # Entrada: (função, operando, tamanho da instrução em bytes)
+        memoria = self.estado.memoria
+        palavra = memoria[endereco]
+        instrucao = self.conjunto_instrucoes.get(palavra >> 4)
+        if instrucao is None:
+            entrada = (self._executar_invalido, 0, 1)
+        elif not self.bytes_operando:
+            entrada = (instrucao[1], palavra & 0x0F, 1)
+        elif instrucao[0] in INSTRUCOES_SEM_OPERANDO:
+            entrada = (instrucao[1], 0, 1)
+        else:
+            # Bytes de operando além do fim da memória valem 0
+            fim = endereco + 1 + self.bytes_operando
+            operando = int.from_bytes(memoria[endereco + 1:fim], "little") & (len(memoria) - 1)
+            entrada = (instrucao[1], operando, 1 + self.bytes_operando)
+        self._tabela_decodificada[endereco] = entrada
+        return entrada
+
+    def instrucao_decodificada(self, endereco):
+        return self._tabela_decodificada[endereco] or self._decodificar(endereco)
+
+    def reiniciar(self, memoria=None):
+        self.estado.reset()
+        self.reiniciar_deteccao_lacos()
+        if memoria is not None:
+            self.carregar_programa(memoria)
+        self.motivo_parada = None
+
+    def restaurar(self, estado, motivo_parada=None):
+        """Copia `estado` para o estado atual, sem trocar o objeto nem refazer a tabela decodificada."""
+        self.estado.restaurar_registradores(estado.empacotar_registradores())
+        self._restaurar_memoria(estado.memoria)
+        self.motivo_parada = motivo_parada
+        self.reiniciar_deteccao_lacos()
+
+    def instantaneo(self):
+        """Cópia compacta (bytes) de registradores, memória e motivo de parada."""
+        return Instantaneo(self.estado.empacotar(), self.motivo_parada)
+
+    def restaurar_instantaneo(self, instantaneo):
+        # Restaura no próprio estado; só os endereços de memória diferentes são reescritos
+        estado = self.estado
+        dados = instantaneo.dados
+        estado.restaurar_registradores(dados)
+        self._restaurar_memoria(dados[FORMATO_REGISTRADORES.size:])
+        self.motivo_parada = instantaneo.motivo_parada
+        self.reiniciar_deteccao_lacos()
+
+    def _restaurar_memoria(self, memoria):
+        # Só os endereços diferentes são reescritos, e só eles saem da tabela decodificada.
+        # Trechos iguais são descartados por comparação de bytes, sem laço em Python
+        atual = self.estado.memoria
+        if len(memoria) != len(atual):
+            self.memoria_principal = memoria
+            return
+        for inicio in range(0, len(memoria), TRECHO_COMPARACAO_MEMORIA):
+            fim = inicio + TRECHO_COMPARACAO_MEMORIA
+            if atual[inicio:fim] == memoria[inicio:fim]:
+                continue
+            for endereco in range(inicio, min(fim, len(memoria))):
+                if atual[endereco] != memoria[endereco]:
+                    atual[endereco] = memoria[endereco]
+
+    def em_estado_inicial(self):
+        # Registradores zerados e nenhuma parada: a execução depende só da memória
+        estado = self.estado
+        return (self.motivo_parada is None
+                and not (estado.contador_programa or estado.acumulador or estado.registrador_endereco
+                         or estado.registrador_instrucao or estado.registrador_b or estado.registrador_saida
+                         or estado.flag_zero or estado.flag_carry))
+
+    def carregar_programa(self, memoria):
+        if len(memoria) != self.capacidade:
+            raise ValueError(f"Imagem de memória deve ter {self.capacidade} bytes.")
+        if not isinstance(memoria, (bytes, bytearray, memoryview)):
+            memoria = bytes(valor & 0xFF for valor in memoria)
+        # Buffers de bytes (inclusive fatias de um LeitorImagens) são copiados direto para a RAM
+        self.memoria_principal = memoria
+        self.estado.contador_programa = 0
+        self.motivo_parada = None
+
+    def buscar(self):
+        # T1: CP -> REM, T2: CP + 1, T3: Memória[REM] -> RI
+        estado = self.estado
+        estado.registrador_endereco = estado.contador_programa
+        estado.contador_programa += 1
+        estado.registrador_instrucao = estado.memoria[estado.registrador_endereco]
+        return estado.registrador_instrucao >> 4, estado.registrador_instrucao & 0x0F
+
+    def passo(self):
+        """Executa uma instrução completa. Devolve o motivo de parada ou None."""
+        if self.motivo_parada is not None:
+            return self.motivo_parada
+        if self.rastro is not None or self.perfilador is not None:
+            return self._passo_instrumentado()
+
+        estado = self.estado
+        pc = estado.contador_programa
+        if pc >= len(estado.memoria):
+            self.motivo_parada = PARADA_FIM_MEMORIA
+            return self.motivo_parada
+
+        funcao, operando, tamanho = self._tabela_decodificada[pc] or self._decodificar(pc)
+        estado.registrador_endereco = pc
+        estado.contador_programa = pc + tamanho
+        estado.registrador_instrucao = estado.memoria[pc]
+        if funcao(operando) and self.motivo_parada is None:
+            self.motivo_parada = PARADA_PAR
+        return self.motivo_parada
+
+    def _passo_instrumentado(self):
+        # Igual a passo(), registrando cada fase no rastro e/ou medindo no perfilador
+        estado = self.estado
+        rastro = self.rastro
+        perfilador = self.perfilador
+        pc = estado.contador_programa
+        if pc >= len(estado.memoria):
+            self.motivo_parada = PARADA_FIM_MEMORIA
+            return self.motivo_parada
+
+        if perfilador is not None:
+            relogio = perfilador.relogio
+            inicio = relogio()
+        funcao, operando, tamanho = self._tabela_decodificada[pc] or self._decodificar(pc)
+        if perfilador is not None:
+            decodificado = relogio()
+
+        estado.registrador_endereco = pc
+        if rastro is not None:
+            rastro.registrar(FASE_T1, estado)
+        estado.contador_programa = pc + tamanho
+        if rastro is not None:
+            rastro.registrar(FASE_T2, estado)
+        estado.registrador_instrucao = estado.memoria[pc]
+        if rastro is not None:
+            rastro.registrar(FASE_T3, estado)
+
+        if perfilador is None:
+            parar = funcao(operando)
+        else:
+            executando = relogio()
+            parar = funcao(operando)
+            perfilador.contar_instrucao(self, pc, estado.registrador_instrucao, decodificado - inicio,
+                                        relogio() - executando)
+        if parar and self.motivo_parada is None:
+            self.motivo_parada = PARADA_PAR
+
+        if rastro is not None:
+            rastro.registrar(FASE_EXECUCAO, estado)
+        return self.motivo_parada
+
+    def executar(self, max_passos=None):
+        """Laço busca/decodifica/executa sem interface gráfica."""
+        max_passos = limite_passos(max_passos)
+        if self.rastro is not None or self.perfilador is not None:
+            return self._executar_instrumentado(max_passos)
+        estado = self.estado
+        memoria = estado.memoria
+        capacidade = len(memoria)
+        tabela = self._tabela_decodificada
+        decodificar = self._decodificar
+        passos = 0
+        limite = -1 if max_passos is None else max_passos  # -1 nunca é alcançado: sem limite
+
+        while self.motivo_parada is None:
+            if passos == limite:
+                return ResultadoExecucao(estado.registrador_saida, passos, PARADA_LIMITE_PASSOS)
+            pc = estado.contador_programa
+            if pc >= capacidade:
+                self.motivo_parada = PARADA_FIM_MEMORIA
+                break
+            funcao, operando, tamanho = tabela[pc] or decodificar(pc)
+            estado.registrador_endereco = pc
+            estado.contador_programa = pc + tamanho
+            estado.registrador_instrucao = memoria[pc]
+            passos += 1
+            if funcao(operando) and self.motivo_parada is None:
+                self.motivo_parada = PARADA_PAR
+
+        return ResultadoExecucao(estado.registrador_saida, passos, self.motivo_parada)
+
+    def _executar_instrumentado(self, max_passos):
+        passos = 0
+        while self.motivo_parada is None:
+            if passos == max_passos:
+                return ResultadoExecucao(self.estado.registrador_saida, passos, PARADA_LIMITE_PASSOS)
+            if self.estado.contador_programa < len(self.estado.memoria):
+                passos += 1
+            self._passo_instrumentado()
+        return ResultadoExecucao(self.estado.registrador_saida, passos, self.motivo_parada)
+
+    step = passo
+    run = executar
+
+    def _executar_car(self, operando):
+        estado = self.estado
+        estado.registrador_endereco = operando
+        estado.acumulador = estado.memoria[operando]
+        return False
+
+    def _executar_som(self, operando):
+        estado = self.estado
+        estado.registrador_endereco = operando
+        estado.registrador_b = estado.memoria[operando]
+        estado.acumulador = (estado.acumulador + estado.registrador_b) & 0xFF
+        return False
+
+    def _executar_sub(self, operando):
+        estado = self.estado
+        estado.registrador_endereco = operando
+        estado.registrador_b = estado.memoria[operando]
+        estado.acumulador = (estado.acumulador - estado.registrador_b) & 0xFF
+        return False
+
+    def _executar_sai(self, _):
+        self.estado.registrador_saida = self.estado.acumulador
+        return False
+
+    def _executar_par(self, _):
+        return True
+
+    def _executar_som_flags(self, operando):
+        estado = self.estado
+        estado.registrador_endereco = operando
+        estado.registrador_b = estado.memoria[operando]
+        soma = estado.acumulador + estado.registrador_b
+        estado.acumulador = soma & 0xFF
+        estado.flag_zero = int(estado.acumulador == 0)
+        estado.flag_carry = int(soma > 0xFF)
+        return False
+
+    def _executar_sub_flags(self, operando):
+        estado = self.estado
+        estado.registrador_endereco = operando
+        estado.registrador_b = estado.memoria[operando]
+        diferenca = estado.acumulador - estado.registrador_b
+        estado.acumulador = diferenca & 0xFF
+        estado.flag_zero = int(estado.acumulador == 0)
+        estado.flag_carry = int(diferenca < 0)
+        return False
+
+    def _executar_ldi(self, operando):
+        self.estado.acumulador = operando & 0xFF
+        return False
+
+    def _executar_sta(self, operando):
+        estado = self.estado
+        estado.registrador_endereco = operando
+        estado.memoria[operando] = estado.acumulador
+        return False
+
+    def _executar_jmp(self, operando):
+        return self._saltar(operando)
+
+    def _executar_jz(self, operando):
+        return self.estado.flag_zero and self._saltar(operando)
+
+    def _executar_jc(self, operando):
+        return self.estado.flag_carry and self._saltar(operando)
+
+    def _saltar(self, destino):
+        estado = self.estado
+        para_tras = destino < estado.contador_programa
+        estado.contador_programa = destino
+        if para_tras and self.detectar_lacos and self.estado_repetido():
+            self.motivo_parada = PARADA_LACO_INFINITO
+            return True
+        return False
+
+    def estado_repetido(self):
+        """Verificação de laço feita a cada salto para trás; True se o estado atual já foi visto.
+
+        Algoritmo de Brent sobre o estado completo: todo laço sem fim passa por um salto
+        para trás, e como a máquina é determinística, rever um estado já visto significa
+        repetir o mesmo trecho para sempre. Guarda um único estado de referência, então a
+        memória é O(1). Os registradores são comparados primeiro; a memória só é comparada
+        (sem cópia) quando eles coincidem, e só é copiada quando a referência avança.
+        """
+        estado = self.estado
+        registradores = estado.empacotar_registradores()
+        if registradores == self._laco_referencia and estado.memoria == self._laco_memoria:
+            return True
+        self._laco_saltos += 1
+        if self._laco_saltos == self._laco_janela:
+            self._laco_referencia = registradores
+            self._laco_memoria = bytes(estado.memoria)
+            self._laco_saltos = 0
+            self._laco_janela *= 2
+        return False
+
+    def _executar_invalido(self, _):
+        self.motivo_parada = PARADA_OPCODE_INVALIDO
+        return True
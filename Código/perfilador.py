@@ -0,0 +1,132 @@
+import collections
+import contextlib
+import functools
+import json
+import time
+
+from nucleo_sap1 import CAPACIDADE_MEMORIA
+
+# Estados T de cada instrução: 3 de busca + execução. PAR para o relógio já em T4.
+T_ESTADOS = {"CAR": 6, "SOM": 6, "SUB": 6, "SAI": 6, "PAR": 4}
+T_ESTADOS_PADRAO = 6
+# Instruções que, além da busca, leem a memória no endereço do operando
+LEITURAS_MEMORIA = frozenset(("CAR", "SOM", "SUB"))
+NOME_INVALIDO = "INVALIDO"
+
+
+class PerfiladorSAP1:
+    """Contadores da máquina e cronômetros do simulador.
+
+    Na máquina: instruções executadas por mnemônico, estados T e leituras por
+    endereço de RAM (atribuir a `nucleo.perfilador`). No simulador: tempo de
+    parede de decodificação, execução e de qualquer método envolvido com
+    `instrumentar`. Desligado (nucleo.perfilador = None e métodos
+    desinstrumentados), nada disso existe no caminho de execução.
+    """
+
+    relogio = staticmethod(time.perf_counter)
+
+    def __init__(self, tamanho_memoria=CAPACIDADE_MEMORIA):
+        self.tamanho_memoria = tamanho_memoria
+        self._originais = {}
+        self.limpar()
+
+    def limpar(self):
+        self.instrucoes = collections.Counter()
+        self.t_estados = collections.Counter()
+        self.leituras_memoria = [0] * self.tamanho_memoria
+        self.tempos = collections.defaultdict(lambda: [0, 0.0])  # nome -> [chamadas, segundos]
+
+    def contar_instrucao(self, nucleo, endereco, palavra, tempo_decodificacao, tempo_execucao):
+        instrucao = nucleo.conjunto_instrucoes.get(palavra >> 4)
+        nome = instrucao[0] if instrucao is not None else NOME_INVALIDO
+        self.instrucoes[nome] += 1
+        self.t_estados[nome] += T_ESTADOS.get(nome, T_ESTADOS_PADRAO)
+
+        leituras = self.leituras_memoria
+        # Depois da execução o REM guarda o endereço do operando, em qualquer largura de endereço
+        operando = nucleo.estado.registrador_endereco if nome in LEITURAS_MEMORIA else endereco
+        maior = max(endereco, operando)
+        if maior >= len(leituras):
+            leituras.extend([0] * (maior + 1 - len(leituras)))
+        leituras[endereco] += 1
+        if nome in LEITURAS_MEMORIA:
+            leituras[operando] += 1
+
+        tempos = self.tempos
+        decodificacao = tempos["decodificar"]
+        decodificacao[0] += 1
+        decodificacao[1] += tempo_decodificacao
+        execucao = tempos["executar"]
+        execucao[0] += 1
+        execucao[1] += tempo_execucao
+
+    @contextlib.contextmanager
+    def medir(self, nome):
+        inicio = self.relogio()
+        try:
+            yield
+        finally:
+            tempo = self.tempos[nome]
+            tempo[0] += 1
+            tempo[1] += self.relogio() - inicio
+
+    def instrumentar(self, objeto, nomes):
+        """Envolve os métodos `nomes` de `objeto` com cronômetros até `desinstrumentar`."""
+        for nome in nomes:
+            chave = (id(objeto), nome)
+            if chave in self._originais:
+                continue
+            original = getattr(objeto, nome)
+            self._originais[chave] = (objeto, nome, nome in vars(objeto), original)
+            setattr(objeto, nome, self._cronometrado(f"{type(objeto).__name__}.{nome}", original))
+
+    def desinstrumentar(self, objeto=None):
+        for chave, (alvo, nome, era_atributo, original) in list(self._originais.items()):
+            if objeto is not None and alvo is not objeto:
+                continue
+            if era_atributo:
+                setattr(alvo, nome, original)
+            else:
+                delattr(alvo, nome)
+            del self._originais[chave]
+
+    def _cronometrado(self, nome, funcao):
+        tempo = self.tempos[nome]
+        relogio = self.relogio
+
+        @functools.wraps(funcao)
+        def cronometrado(*args, **kwargs):
+            inicio = relogio()
+            try:
+                return funcao(*args, **kwargs)
+            finally:
+                tempo[0] += 1
+                tempo[1] += relogio() - inicio
+        return cronometrado
+
+    @property
+    def total_instrucoes(self):
+        return sum(self.instrucoes.values())
+
+    def relatorio(self):
+        """Dicionário com todos os contadores, pronto para json.dumps."""
+        total = self.total_instrucoes
+        return {
+            "instrucoes": dict(self.instrucoes),
+            "total_instrucoes": total,
+            "t_estados": dict(self.t_estados),
+            "total_t_estados": sum(self.t_estados.values()),
+            "t_estados_por_instrucao": sum(self.t_estados.values()) / total if total else 0.0,
+            "leituras_memoria": list(self.leituras_memoria),
+            "tempos": {nome: {"chamadas": chamadas, "segundos": segundos,
+                              "media_us": 1e6 * segundos / chamadas if chamadas else 0.0}
+                       for nome, (chamadas, segundos) in sorted(self.tempos.items())},
+        }
+
+    def json(self, **opcoes):
+        return json.dumps(self.relatorio(), ensure_ascii=False, **opcoes)
+
+    def salvar_json(self, caminho):
+        with open(caminho, "w", encoding="utf-8") as arquivo:
+            arquivo.write(self.json(indent=2))
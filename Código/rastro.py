@@ -0,0 +1,176 @@
+import collections
+import mmap
+import struct
+
+from nucleo_sap1 import (EstadoSAP1, CAPACIDADE_MEMORIA, FASE_T1, FASE_T2, FASE_T3, FASE_EXECUCAO)
+
+ASSINATURA = b"SAP1RST\0"
+VERSAO = 2
+CAPACIDADE_PADRAO = 65536
+
+# assinatura, versão, tamanho do registro, capacidade, total gravado, tamanho da imagem de memória
+FORMATO_CABECALHO = struct.Struct("<8sHHIQI4x")
+# sequência, fase, CP, REM, RI, ACC, B, SAIDA, flags (bit 0: zero, bit 1: carry)
+FORMATO_REGISTRO = struct.Struct("<IBIHBBBBB")
+_DESLOCAMENTO_TOTAL = 16
+
+NOMES_FASES = {FASE_T1: "T1", FASE_T2: "T2", FASE_T3: "T3", FASE_EXECUCAO: "EXEC"}
+
+RegistroRastro = collections.namedtuple("RegistroRastro", ["sequencia", "fase", "contador_programa",
+                                                           "registrador_endereco", "registrador_instrucao",
+                                                           "acumulador", "registrador_b", "registrador_saida",
+                                                           "flags"])
+
+
+def _tamanho_arquivo(capacidade, tamanho_memoria):
+    return FORMATO_CABECALHO.size + tamanho_memoria + capacidade * FORMATO_REGISTRO.size
+
+
+class RastroExecucao:
+    """Buffer circular de registros binários de tamanho fixo com o estado a cada fase.
+
+    Com `arquivo`, o buffer é um mmap do próprio arquivo: gravar um registro é
+    só um struct.pack_into, sem criar objetos Python. O cabeçalho guarda o
+    total gravado e a imagem de memória do início do rastro, então o arquivo
+    pode ser lido por LeitorRastro mesmo com o programa ainda em execução.
+    """
+
+    def __init__(self, capacidade=CAPACIDADE_PADRAO, arquivo=None, tamanho_memoria=CAPACIDADE_MEMORIA):
+        if capacidade < 1:
+            raise ValueError("A capacidade do rastro deve ser pelo menos 1.")
+        self.capacidade = capacidade
+        self.tamanho_memoria = tamanho_memoria
+        self._inicio_registros = FORMATO_CABECALHO.size + tamanho_memoria
+        tamanho = _tamanho_arquivo(capacidade, tamanho_memoria)
+        self._arquivo = None
+        if arquivo is None:
+            self.buffer = bytearray(tamanho)
+        else:
+            self._arquivo = open(arquivo, "w+b")
+            self._arquivo.truncate(tamanho)
+            self.buffer = mmap.mmap(self._arquivo.fileno(), tamanho)
+        self.limpar()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *_):
+        self.fechar()
+
+    def __len__(self):
+        return min(self.total, self.capacidade)
+
+    def limpar(self):
+        """Descarta os registros; a imagem de memória é gravada de novo no próximo registro."""
+        self.total = 0
+        FORMATO_CABECALHO.pack_into(self.buffer, 0, ASSINATURA, VERSAO, FORMATO_REGISTRO.size,
+                                    self.capacidade, 0, self.tamanho_memoria)
+
+    def gravar_memoria(self, memoria):
+        self.buffer[FORMATO_CABECALHO.size:self._inicio_registros] = bytes(memoria[:self.tamanho_memoria])
+
+    def registrar(self, fase, estado):
+        if self.total == 0:
+            self.gravar_memoria(estado.memoria)
+        FORMATO_REGISTRO.pack_into(
+            self.buffer, self._inicio_registros + (self.total % self.capacidade) * FORMATO_REGISTRO.size,
+            self.total & 0xFFFFFFFF, fase, estado.contador_programa, estado.registrador_endereco,
+            estado.registrador_instrucao, estado.acumulador, estado.registrador_b, estado.registrador_saida,
+            estado.flag_zero | (estado.flag_carry << 1))
+        self.total += 1
+        struct.pack_into("<Q", self.buffer, _DESLOCAMENTO_TOTAL, self.total)
+
+    def salvar(self, caminho):
+        with open(caminho, "wb") as destino:
+            destino.write(self.buffer)
+
+    def sincronizar(self):
+        if self._arquivo is not None:
+            self.buffer.flush()
+
+    def fechar(self):
+        if self._arquivo is not None:
+            self.buffer.flush()
+            self.buffer.close()
+            self._arquivo.close()
+            self._arquivo = None
+
+
+class LeitorRastro:
+    """Lê um rastro (caminho de arquivo ou buffer) em ordem cronológica sem copiar os registros."""
+
+    def __init__(self, origem):
+        self._arquivo = None
+        self._mmap = None
+        if isinstance(origem, str) or hasattr(origem, "__fspath__"):
+            self._arquivo = open(origem, "rb")
+            self._mmap = mmap.mmap(self._arquivo.fileno(), 0, access=mmap.ACCESS_READ)
+            origem = self._mmap
+        self._dados = memoryview(origem)
+        if len(self._dados) < FORMATO_CABECALHO.size:
+            self.fechar()
+            raise ValueError("Arquivo de rastro inválido ou de versão incompatível.")
+
+        (assinatura, versao, tamanho_registro, self.capacidade, self.total,
+         self.tamanho_memoria) = FORMATO_CABECALHO.unpack_from(self._dados)
+        if assinatura != ASSINATURA or versao != VERSAO or tamanho_registro != FORMATO_REGISTRO.size:
+            self.fechar()
+            raise ValueError("Arquivo de rastro inválido ou de versão incompatível.")
+        self._inicio_registros = FORMATO_CABECALHO.size + self.tamanho_memoria
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *_):
+        self.fechar()
+
+    def __len__(self):
+        return min(self.total, self.capacidade)
+
+    @property
+    def memoria(self):
+        return self._dados[FORMATO_CABECALHO.size:self._inicio_registros]
+
+    def __iter__(self):
+        """memoryview de cada registro, do mais antigo ao mais recente (válida até fechar())."""
+        dados = self._dados
+        tamanho = FORMATO_REGISTRO.size
+        primeiro = self.total - len(self)
+        for sequencia in range(primeiro, self.total):
+            inicio = self._inicio_registros + (sequencia % self.capacidade) * tamanho
+            yield dados[inicio:inicio + tamanho]
+
+    def registros(self):
+        desempacotar = FORMATO_REGISTRO.unpack_from
+        for registro in self:
+            yield RegistroRastro(*desempacotar(registro))
+
+    def estados(self):
+        """Gera (registro, EstadoSAP1) reconstruindo cada estado sobre a imagem do cabeçalho."""
+        memoria = bytes(self.memoria)
+        for registro in self.registros():
+            estado = EstadoSAP1(memoria)
+            estado.contador_programa = registro.contador_programa
+            estado.registrador_endereco = registro.registrador_endereco
+            estado.registrador_instrucao = registro.registrador_instrucao
+            estado.acumulador = registro.acumulador
+            estado.registrador_b = registro.registrador_b
+            estado.registrador_saida = registro.registrador_saida
+            estado.flag_zero = registro.flags & 1
+            estado.flag_carry = (registro.flags >> 1) & 1
+            yield registro, estado
+
+    def fechar(self):
+        self._dados.release()
+        if self._mmap is not None:
+            self._mmap.close()
+            self._arquivo.close()
+            self._mmap = None
+
+
+def formatar_registro(registro):
+    return (f"{registro.sequencia:>8} {NOMES_FASES.get(registro.fase, '?'):<4} "
+            f"CP={registro.contador_programa:01X} REM={registro.registrador_endereco:01X} "
+            f"RI={registro.registrador_instrucao:02X} ACC={registro.acumulador:02X} "
+            f"B={registro.registrador_b:02X} SAIDA={registro.registrador_saida:02X} "
+            f"Z={registro.flags & 1} C={(registro.flags >> 1) & 1}")
@@ -0,0 +1,141 @@
+from nucleo_sap1 import CAPACIDADE_MEMORIA
+
+COR_CELULA = "#34495e"
+COR_CELULA_ATIVA = "#9b59b6"
+COR_ENDERECO = "#bdc3c7"
+COR_ENDERECO_ATIVO = "#ffffff"
+COR_LED_ACESO = "#e74c3c"
+COR_LED_APAGADO = "#34495e"
+
+# Janela visível da RAM: colunas x linhas células, qualquer que seja o tamanho da memória
+COLUNAS_RAM = 4
+LINHAS_RAM_VISIVEIS = 4
+
+_AUSENTE = object()
+
+
+class RenderizadorCPU:
+    """Camada entre o núcleo e o canvas que só envia ao Tk o que mudou.
+
+    Guarda o último valor desenhado de cada opção de cada item e resolve as
+    tags para IDs uma única vez. Toda alteração de item do canvas deve passar
+    por `configurar` para que o cache continue coerente.
+
+    A RAM é virtualizada: existem só `celulas_visiveis` itens de célula
+    (celula_ram_0, celula_ram_1, ...), que mostram os endereços a partir de
+    `primeira_linha * colunas`. Rolar só troca textos, nunca cria itens.
+    """
+
+    def __init__(self, canvas, capacidade=CAPACIDADE_MEMORIA, colunas=COLUNAS_RAM,
+                 linhas_visiveis=LINHAS_RAM_VISIVEIS):
+        self.canvas = canvas
+        self.chamadas_itemconfig = 0
+        self.colunas = colunas
+        self.linhas_visiveis = linhas_visiveis
+        self.configurar_ram(capacidade)
+        self.invalidar()
+
+    def configurar_ram(self, capacidade):
+        self.capacidade = capacidade
+        self.linhas_ram = -(-capacidade // self.colunas)
+        self.celulas_visiveis = min(capacidade, self.colunas * self.linhas_visiveis)
+        self.digitos_endereco = max(1, (capacidade.bit_length() + 2) // 4)
+        self.primeira_linha = 0
+        self._rem_anterior = None
+        self._ultimo_estado = None
+
+    def rolar_ram(self, linha):
+        """Leva a janela para começar na linha `linha` (limitada à memória). Devolve se mudou."""
+        linha = max(0, min(linha, self.linhas_ram - self.linhas_visiveis))
+        if linha == self.primeira_linha:
+            return False
+        self.primeira_linha = linha
+        return True
+
+    def mostrar_endereco(self, endereco):
+        """Rola a janela o mínimo para que `endereco` fique visível. Devolve se mudou."""
+        linha = endereco // self.colunas
+        if linha < self.primeira_linha:
+            return self.rolar_ram(linha)
+        if linha >= self.primeira_linha + self.linhas_visiveis:
+            return self.rolar_ram(linha - self.linhas_visiveis + 1)
+        return False
+
+    def colorir_celula(self, endereco, cor):
+        """Pinta a célula de `endereco`, rolando a janela até ela se preciso. Devolve se rolou."""
+        rolou = self.mostrar_endereco(endereco)
+        if rolou and self._ultimo_estado is not None:
+            self.desenhar_estado(self._ultimo_estado)
+        tag = self.tag_celula(endereco)
+        if tag is not None:
+            self.configurar(tag, fill=cor)
+        return rolou
+
+    def tag_celula(self, endereco):
+        """Tag do retângulo que mostra `endereco`, ou None se ele está fora da janela."""
+        posicao = endereco - self.primeira_linha * self.colunas
+        if 0 <= posicao < self.celulas_visiveis and endereco < self.capacidade:
+            return f"celula_ram_{posicao}"
+        return None
+
+    def invalidar(self):
+        # Chamar sempre que itens forem recriados (ex.: canvas.delete("all"))
+        self._ids_por_tag = {}
+        self._valores = {}
+
+    def _ids(self, alvo):
+        if isinstance(alvo, int):
+            return (alvo,)
+        ids = self._ids_por_tag.get(alvo)
+        if ids is None:
+            ids = self._ids_por_tag[alvo] = self.canvas.find_withtag(alvo)
+        return ids
+
+    def existe(self, alvo):
+        return bool(self._ids(alvo))
+
+    def configurar(self, alvo, **opcoes):
+        valores = self._valores
+        for item in self._ids(alvo):
+            mudancas = {opcao: valor for opcao, valor in opcoes.items()
+                        if valores.get((item, opcao), _AUSENTE) != valor}
+            if mudancas:
+                self.canvas.itemconfig(item, **mudancas)
+                self.chamadas_itemconfig += 1
+                for opcao, valor in mudancas.items():
+                    valores[(item, opcao)] = valor
+
+    def desenhar_estado(self, estado):
+        configurar = self.configurar
+        configurar("bloco_cp_val", text=f"0x{estado.contador_programa:01X}")
+        configurar("bloco_rem_val", text=f"0x{estado.registrador_endereco:01X}")
+        configurar("bloco_ri_val", text=f"0x{estado.registrador_instrucao:02X}")
+        configurar("bloco_acc_val", text=f"0x{estado.acumulador:02X}")
+        configurar("bloco_regb_val", text=f"0x{estado.registrador_b:02X}")
+        configurar("bloco_saida_val", text=f"0x{estado.registrador_saida:02X}")
+        configurar("flags_val", text=f"Z={estado.flag_zero}  C={estado.flag_carry}")
+
+        self._ultimo_estado = estado
+        memoria = estado.memoria
+        endereco_ativo = estado.registrador_endereco
+        if endereco_ativo != self._rem_anterior:
+            # Acompanha o REM quando ele muda, mas deixa o usuário rolar livremente entre mudanças
+            self._rem_anterior = endereco_ativo
+            self.mostrar_endereco(endereco_ativo)
+        base = self.primeira_linha * self.colunas
+        digitos = self.digitos_endereco
+        for i in range(self.celulas_visiveis):
+            endereco = base + i
+            if endereco < len(memoria):
+                configurar(f"valor_ram_{i}", text=f"{memoria[endereco]:02X}")
+                configurar(f"endereco_ram_{i}", text=f"{endereco:0{digitos}X}")
+            else:
+                configurar(f"valor_ram_{i}", text="")
+                configurar(f"endereco_ram_{i}", text="")
+            ativo = endereco == endereco_ativo
+            configurar(f"celula_ram_{i}", fill=COR_CELULA_ATIVA if ativo else COR_CELULA)
+            configurar(f"endereco_ram_{i}", fill=COR_ENDERECO_ATIVO if ativo else COR_ENDERECO)
+
+        saida = estado.registrador_saida
+        for bit in range(8):
+            configurar(f"led_saida_{bit}", fill=COR_LED_ACESO if (saida >> bit) & 1 else COR_LED_APAGADO)
@@ -0,0 +1,244 @@
+"""Linha de comando do simulador SAP-1.
+
+    sap1 asm programa.asm [-o imagem.bin]   monta e mostra a imagem de memória (-o x.hex grava Intel HEX)
+    sap1 run programa.asm|imagem.bin|.hex   executa e mostra a saída
+    sap1 desmontar imagem.bin               mostra um fonte que monta a mesma imagem
+    sap1 empacotar todos.sapi a.asm b.bin   junta imagens em um conjunto para lote.py --conjunto
+    sap1 eval "12+7-3"                      gera o código da expressão, monta e executa
+    sap1 eval -f termos.txt                 avalia em páginas uma expressão de qualquer tamanho
+    sap1 run programa.asm --rastro r.trc    grava cada fase em um rastro binário
+    sap1 run laco.asm --estendido           usa o modo estendido (LDI, STA, JMP, JZ, JC)
+    sap1 run grande.asm --largura-endereco 16  endereços de 16 bits (64 KiB de memória)
+    sap1 rastro r.trc [--reproduzir]        lista um rastro ou o reproduz na interface
+    sap1 gui                                abre a interface gráfica
+
+O tkinter só é importado pelo subcomando gui.
+"""
+import argparse
+import sys
+
+from nucleo_sap1 import (NucleoSAP1, LARGURA_ENDERECO_PADRAO, LARGURA_ENDERECO_MAXIMA, PARADA_LACO_INFINITO,
+                         PARADA_LIMITE_PASSOS, capacidade_memoria, limite_passos)
+from montador import ErroMontagem, montar, desmontar
+
+LIMITE_PASSOS_CLI = 1000000
+
+
+def _ler_texto(caminho):
+    if caminho == "-":
+        return sys.stdin.read()
+    with open(caminho, encoding="utf-8") as arquivo:
+        return arquivo.read()
+
+
+def _montar_arquivo(caminho, args):
+    return montar(_ler_texto(caminho), args.estendido, args.largura_endereco).memoria
+
+
+def _carregar_imagem(caminho, args):
+    # Fontes .asm são montados; .hex/.ihx são Intel HEX e qualquer outro arquivo é imagem binária crua
+    if caminho.lower().endswith(".asm"):
+        return _montar_arquivo(caminho, args)
+    if caminho != "-":
+        from imagens import carregar_imagem
+        return carregar_imagem(caminho, args.largura_endereco)
+    dados = sys.stdin.buffer.read()
+    capacidade = capacidade_memoria(args.largura_endereco)
+    if len(dados) != capacidade:
+        raise ValueError(f"Imagem de memória deve ter {capacidade} bytes (lidos {len(dados)}).")
+    return dados
+
+
+def _executar(memoria, args):
+    nucleo = NucleoSAP1(estendido=getattr(args, "estendido", False),
+                        largura_endereco=getattr(args, "largura_endereco", LARGURA_ENDERECO_PADRAO))
+    nucleo.carregar_programa(memoria)
+    if getattr(args, "perfil", None):
+        from perfilador import PerfiladorSAP1
+        nucleo.perfilador = PerfiladorSAP1(nucleo.capacidade)
+        try:
+            _executar_nucleo(nucleo, args)
+        finally:
+            if args.perfil == "-":
+                print(nucleo.perfilador.json(indent=2))
+            else:
+                nucleo.perfilador.salvar_json(args.perfil)
+        return
+    _executar_nucleo(nucleo, args)
+
+
+def _executar_nucleo(nucleo, args):
+    if getattr(args, "rastro", None):
+        from rastro import RastroExecucao
+        with RastroExecucao(args.capacidade_rastro, args.rastro, nucleo.capacidade) as rastro:
+            nucleo.rastro = rastro
+            _mostrar_resultado(nucleo.executar(args.max_passos), args)
+        return
+    if args.jit:
+        import compilador_jit
+        resultado = compilador_jit.executar(nucleo, args.max_passos)
+    elif args.microcodigo:
+        import microcodigo
+        resultado = microcodigo.executar_nucleo(nucleo, args.max_passos)
+    else:
+        resultado = nucleo.executar(args.max_passos)
+    _mostrar_resultado(resultado, args)
+
+
+def _mostrar_resultado(resultado, args):
+    if args.detalhes:
+        ciclos = f" ciclos={resultado.ciclos}" if hasattr(resultado, "ciclos") else ""
+        print(f"saida={resultado.saida} passos={resultado.passos}{ciclos} parada={resultado.motivo_parada}")
+    else:
+        print(resultado.saida)
+    if resultado.motivo_parada == PARADA_LACO_INFINITO:
+        print(f"Programa não termina: estado repetido após {resultado.passos} passos (laço infinito).",
+              file=sys.stderr)
+    elif resultado.motivo_parada == PARADA_LIMITE_PASSOS:
+        print(f"Execução interrompida no limite de {resultado.passos} passos.", file=sys.stderr)
+
+
+def comando_asm(args):
+    memoria = _montar_arquivo(args.arquivo, args)
+    if args.saida:
+        from imagens import salvar_imagem
+        salvar_imagem(args.saida, memoria)
+    else:
+        print(" ".join(f"{byte:02X}" for byte in memoria))
+
+
+def comando_run(args):
+    _executar(_carregar_imagem(args.arquivo, args), args)
+
+
+def comando_desmontar(args):
+    print(desmontar(_carregar_imagem(args.arquivo, args), args.estendido, args.largura_endereco))
+
+
+def comando_empacotar(args):
+    from imagens import salvar_conjunto
+    imagens = (_carregar_imagem(caminho, args) for caminho in args.arquivos)
+    quantidade = salvar_conjunto(args.saida, imagens, args.largura_endereco, args.estendido)
+    print(f"{quantidade} imagens gravadas em {args.saida}.")
+
+
+def comando_eval(args):
+    if args.arquivo is not None:
+        return _avaliar_arquivo(args)
+    if args.expressao is None:
+        raise ValueError("Informe uma expressão ou um arquivo com -f.")
+    from expressao import compilar_expressao
+    programa = compilar_expressao(args.expressao, args.dobrar)
+    if args.codigo:
+        print(programa.codigo)
+    _executar(montar(programa.codigo).memoria, args)
+
+
+def _avaliar_arquivo(args):
+    from segmentado import avaliar_segmentado, termos_do_fluxo
+    if args.arquivo == "-":
+        resultado = avaliar_segmentado(termos_do_fluxo(sys.stdin), max_passos=args.max_passos)
+    else:
+        with open(args.arquivo, encoding="utf-8") as arquivo:
+            resultado = avaliar_segmentado(termos_do_fluxo(arquivo), max_passos=args.max_passos)
+    if args.detalhes:
+        print(f"saida={resultado.saida} passos={resultado.passos} paginas={resultado.paginas}")
+    else:
+        print(resultado.saida)
+
+
+def comando_rastro(args):
+    if args.reproduzir:
+        import Trabalho_sap1
+        Trabalho_sap1.principal(rastro=args.arquivo)
+        return
+    from rastro import LeitorRastro, formatar_registro
+    with LeitorRastro(args.arquivo) as leitor:
+        print(f"; {leitor.total} fases gravadas, {len(leitor)} no buffer; memória: "
+              + " ".join(f"{byte:02X}" for byte in leitor.memoria))
+        for registro in leitor.registros():
+            print(formatar_registro(registro))
+
+
+def comando_gui(args):
+    import Trabalho_sap1
+    Trabalho_sap1.principal()
+
+
+def _opcoes_execucao(parser):
+    parser.add_argument("--max-passos", type=limite_passos, default=LIMITE_PASSOS_CLI, help="limite de instruções executadas")
+    parser.add_argument("--jit", action="store_true", help="usar o compilador de imagens em vez do interpretador")
+    parser.add_argument("--microcodigo", action="store_true",
+                        help="executar estado T a estado T pela ROM de microcódigo (conta ciclos de relógio)")
+    parser.add_argument("-v", "--detalhes", action="store_true", help="mostrar também passos e motivo da parada")
+
+
+def _opcoes_maquina(parser):
+    parser.add_argument("--estendido", action="store_true",
+                        help="modo estendido: LDI, STA, JMP, JZ, JC e flags Zero/Carry")
+    parser.add_argument("--largura-endereco", type=int, default=LARGURA_ENDERECO_PADRAO,
+                        choices=range(LARGURA_ENDERECO_PADRAO, LARGURA_ENDERECO_MAXIMA + 1), metavar="BITS",
+                        help=f"bits de endereço, de {LARGURA_ENDERECO_PADRAO} a {LARGURA_ENDERECO_MAXIMA} "
+                             f"(padrão: {LARGURA_ENDERECO_PADRAO}, 16 bytes)")
+
+
+def principal(argumentos=None):
+    parser = argparse.ArgumentParser(prog="sap1", description="Simulador SAP-1 em linha de comando.")
+    subcomandos = parser.add_subparsers(dest="comando", required=True)
+
+    asm = subcomandos.add_parser("asm", help="montar um programa")
+    asm.add_argument("arquivo", help="fonte assembly ('-' para a entrada padrão)")
+    asm.add_argument("-o", "--saida", help="gravar a imagem binária neste arquivo")
+    _opcoes_maquina(asm)
+    asm.set_defaults(funcao=comando_asm)
+
+    run = subcomandos.add_parser("run", help="executar um programa ou imagem")
+    run.add_argument("arquivo", help="fonte .asm, imagem binária ou Intel HEX ('-' para a entrada padrão)")
+    _opcoes_execucao(run)
+    _opcoes_maquina(run)
+    run.add_argument("--perfil", help="gravar contadores e tempos em JSON neste arquivo ('-' para a saída padrão)")
+    run.add_argument("--rastro", help="gravar o rastro de execução neste arquivo")
+    run.add_argument("--capacidade-rastro", type=int, default=65536, help="fases mantidas no buffer circular do rastro")
+    run.set_defaults(funcao=comando_run)
+
+    desmontar_parser = subcomandos.add_parser("desmontar", help="gerar o fonte de uma imagem de memória")
+    desmontar_parser.add_argument("arquivo", help="imagem binária, Intel HEX ou fonte .asm ('-' para a entrada padrão)")
+    _opcoes_maquina(desmontar_parser)
+    desmontar_parser.set_defaults(funcao=comando_desmontar)
+
+    empacotar = subcomandos.add_parser("empacotar", help="juntar imagens em um conjunto .sapi")
+    empacotar.add_argument("saida", help="arquivo de conjunto a gravar")
+    empacotar.add_argument("arquivos", nargs="+", help="fontes .asm, imagens binárias ou Intel HEX")
+    _opcoes_maquina(empacotar)
+    empacotar.set_defaults(funcao=comando_empacotar)
+
+    avaliar = subcomandos.add_parser("eval", help="avaliar uma expressão de somas e subtrações")
+    avaliar.add_argument("expressao", nargs="?")
+    avaliar.add_argument("-f", "--arquivo", help="ler a expressão deste arquivo e avaliá-la em páginas ('-' para a entrada padrão)")
+    avaliar.add_argument("--dobrar", action="store_true", help="calcular a expressão inteira na montagem")
+    avaliar.add_argument("--codigo", action="store_true", help="mostrar o programa gerado")
+    _opcoes_execucao(avaliar)
+    avaliar.set_defaults(funcao=comando_eval)
+
+    rastro = subcomandos.add_parser("rastro", help="listar ou reproduzir um rastro de execução")
+    rastro.add_argument("arquivo")
+    rastro.add_argument("--reproduzir", action="store_true", help="reproduzir o rastro na interface gráfica")
+    rastro.set_defaults(funcao=comando_rastro)
+
+    gui = subcomandos.add_parser("gui", help="abrir a interface gráfica")
+    gui.set_defaults(funcao=comando_gui)
+
+    args = parser.parse_args(argumentos)
+    try:
+        args.funcao(args)
+    except ErroMontagem as e:
+        print(f"Erro na linha {e.linha}: {e}", file=sys.stderr)
+        return 1
+    except (ValueError, OSError) as e:
+        print(f"Erro: {e}", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(principal())
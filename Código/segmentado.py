@@ -0,0 +1,130 @@
+import collections
+
+from nucleo_sap1 import NucleoSAP1, CAPACIDADE_MEMORIA, PARADA_PAR
+from montador import OPCODES
+
+TAMANHO_LEITURA = 65536
+
+# saida: resultado final; passos: instruções executadas somando todas as páginas
+ResultadoSegmentado = collections.namedtuple("ResultadoSegmentado", ["saida", "passos", "paginas"])
+
+
+def termos_do_fluxo(arquivo, tamanho_leitura=TAMANHO_LEITURA):
+    """Lê uma expressão de +/- de um arquivo texto aos poucos e gera (sinal, valor).
+
+    Segue as regras de analisar_expressao: caracteres que não são dígitos nem
+    operadores são ignorados, então dígitos separados por espaço formam um só número.
+    """
+    num_atual = ""
+    sinal = 1
+    indice = 0
+    while True:
+        bloco = arquivo.read(tamanho_leitura)
+        if not bloco:
+            break
+        for caractere in bloco:
+            if "0" <= caractere <= "9":
+                num_atual += caractere
+            elif caractere == "+" or caractere == "-":
+                if not num_atual:
+                    raise ValueError("Expressão mal formada (operador sem operando).")
+                yield _termo(sinal, num_atual, indice)
+                indice += 1
+                num_atual = ""
+                sinal = 1 if caractere == "+" else -1
+    if num_atual:
+        yield _termo(sinal, num_atual, indice)
+    elif indice == 0:
+        raise ValueError("Nenhum número válido encontrado.")
+    else:
+        raise ValueError("Expressão mal formada (operador sem operando).")
+
+
+def _termo(sinal, texto, indice):
+    valor = int(texto)
+    if not (0 <= valor <= 255):
+        raise ValueError(f"Número '{valor}' fora do intervalo (0-255) no termo {indice + 1}.")
+    return sinal, valor
+
+
+def paginas(termos):
+    """Agrupa os termos em páginas que cabem na memória junto com o acumulador herdado.
+
+    Cada página ocupa CAR + um SOM/SUB por termo + SAI + PAR, mais uma célula
+    para o acumulador e uma por valor distinto. Termos nulos são descartados.
+    Só a página corrente fica em memória.
+    """
+    pagina = []
+    valores = set()
+    for sinal, valor in termos:
+        if valor == 0:
+            continue
+        novos = 0 if valor in valores else 1
+        if len(pagina) + 4 + len(valores) + 1 + novos > CAPACIDADE_MEMORIA:
+            yield pagina
+            pagina = []
+            valores = set()
+            novos = 1
+        pagina.append((sinal, valor))
+        valores.add(valor)
+    if pagina:
+        yield pagina
+
+
+def imagem_pagina(acumulador, termos):
+    """Imagem de memória que carrega `acumulador`, aplica os termos e mostra o resultado."""
+    memoria = bytearray(CAPACIDADE_MEMORIA)
+    celulas = list(dict.fromkeys(valor for _, valor in termos))
+    inicio_dados = CAPACIDADE_MEMORIA - 1 - len(celulas)
+    if len(termos) + 3 > inicio_dados:
+        raise ValueError(f"Página com {len(termos)} termos não cabe em {CAPACIDADE_MEMORIA} bytes.")
+    endereco = {valor: inicio_dados + 1 + i for i, valor in enumerate(celulas)}
+
+    memoria[0] = (OPCODES["CAR"] << 4) | inicio_dados
+    for i, (sinal, valor) in enumerate(termos, 1):
+        memoria[i] = (OPCODES["SOM" if sinal > 0 else "SUB"] << 4) | endereco[valor]
+    memoria[len(termos) + 1] = OPCODES["SAI"] << 4
+    memoria[len(termos) + 2] = OPCODES["PAR"] << 4
+
+    memoria[inicio_dados] = acumulador
+    for valor, posicao in endereco.items():
+        memoria[posicao] = valor
+    return memoria
+
+
+def executar_paginas(termos, nucleo=None, max_passos=None):
+    """Gera (imagem, ResultadoExecucao) de cada página, passando a saída adiante como primeiro DB."""
+    nucleo = NucleoSAP1() if nucleo is None else nucleo
+    termos = iter(termos)
+    try:
+        sinal, acumulador = next(termos)
+    except StopIteration:
+        return
+    # O primeiro termo é sempre positivo: vira o acumulador inicial
+    if sinal < 0:
+        acumulador = -acumulador & 0xFF
+    executadas = 0
+    for pagina in paginas(termos):
+        imagem = imagem_pagina(acumulador, pagina)
+        nucleo.reiniciar(imagem)
+        resultado = nucleo.executar(max_passos)
+        executadas += 1
+        yield imagem, resultado
+        if resultado.motivo_parada != PARADA_PAR:
+            return
+        acumulador = resultado.saida
+    if not executadas:
+        # Nenhum termo além do primeiro (ou todos nulos): uma página só mostra o valor
+        imagem = imagem_pagina(acumulador, [])
+        nucleo.reiniciar(imagem)
+        yield imagem, nucleo.executar(max_passos)
+
+
+def avaliar_segmentado(termos, nucleo=None, max_passos=None):
+    """Avalia uma expressão de qualquer tamanho página a página, com memória constante."""
+    saida = passos = quantidade = 0
+    for _, resultado in executar_paginas(termos, nucleo, max_passos):
+        saida = resultado.saida
+        passos += resultado.passos
+        quantidade += 1
+    return ResultadoSegmentado(saida, passos, quantidade)
@@ -0,0 +1,380 @@
+"""Servidor de simulação: pedidos e respostas em JSON, um objeto por linha.
+
+    python servidor.py --unix /tmp/sap1.sock
+    python servidor.py --porta 8765            (só em 127.0.0.1, a menos que --host diga outro)
+
+Pedido:   {"id": 1, "operacao": "executar", "fonte": "CAR E\\n..."}
+          {"id": 2, "operacao": "executar", "imagem": "0E1F...", "largura_endereco": 4}
+          {"id": 3, "operacao": "avaliar", "expressao": "12+7-3"}
+          {"id": 4, "operacao": "montar", "fonte": "...", "estendido": true}
+Resposta: {"id": 1, "saida": 16, "passos": 5, "motivo_parada": "PAR", "erro": null}
+          (montar devolve "memoria" em hexadecimal no lugar de saida/passos/motivo_parada)
+
+Vários pedidos podem ser enviados sem esperar as respostas; elas saem na
+ordem em que ficam prontas, com o "id" do pedido. A simulação roda em um
+pool de processos: os pedidos que chegam enquanto os processos estão
+ocupados são agrupados em lotes, então a carga alta aumenta os lotes em vez
+da fila de mensagens entre processos.
+"""
+import argparse
+import asyncio
+import collections
+import concurrent.futures
+import json
+import os
+import signal
+import sys
+
+from nucleo_sap1 import NucleoSAP1, LARGURA_ENDERECO_PADRAO, limite_passos
+from montador import ErroMontagem, MontadorIncremental
+from expressao import compilar_expressao
+from cache_resultados import CacheResultados
+
+OPERACAO_EXECUTAR = "executar"
+OPERACAO_AVALIAR = "avaliar"
+OPERACAO_MONTAR = "montar"
+
+LIMITE_PASSOS_SERVIDOR = 1000000
+TEMPO_LIMITE_PADRAO = 10.0
+TAMANHO_LOTE = 256
+PEDIDOS_POR_CONEXAO = 256
+PEDIDOS_NA_FILA = 4096
+TAMANHO_MAXIMO_LINHA = 1024 * 1024
+CONEXOES_EM_ESPERA = 4096
+CAPACIDADE_CACHE_PROCESSO = 16384
+TAMANHO_MAXIMO_CACHE = 256
+
+# Cada processo guarda as execuções recentes: pedidos repetidos não executam de novo.
+# Só imagens pequenas entram no cache; uma entrada de 64 KiB custaria mais memória do que vale
+_cache_do_processo = CacheResultados(CAPACIDADE_CACHE_PROCESSO)
+# Um núcleo e um montador por configuração (estendido, bits de endereço), reaproveitados entre pedidos
+_maquinas_do_processo = {}
+
+
+def _maquina(estendido, largura_endereco):
+    maquina = _maquinas_do_processo.get((estendido, largura_endereco))
+    if maquina is None:
+        maquina = (NucleoSAP1(estendido, largura_endereco), MontadorIncremental(estendido, largura_endereco))
+        _maquinas_do_processo[estendido, largura_endereco] = maquina
+    return maquina
+
+
+def _memoria_do_pedido(pedido, montador):
+    operacao = pedido.get("operacao", OPERACAO_EXECUTAR)
+    if operacao == OPERACAO_AVALIAR:
+        fonte = compilar_expressao(str(pedido["expressao"])).codigo
+    elif operacao not in (OPERACAO_EXECUTAR, OPERACAO_MONTAR):
+        raise ValueError(f"Operação desconhecida: {operacao}.")
+    elif "imagem" in pedido:
+        return bytes.fromhex(pedido["imagem"])
+    else:
+        fonte = pedido["fonte"]
+    # O montador incremental reaproveita as linhas repetidas entre pedidos (SAI, PAR, DB...)
+    programa, erros = montador.montar(fonte)
+    if erros:
+        raise ErroMontagem(*erros[0])
+    return programa.memoria
+
+
+def processar_pedido(pedido):
+    """Atende um pedido já decodificado e devolve o dicionário da resposta (sem o id)."""
+    try:
+        if pedido.get("operacao") == OPERACAO_AVALIAR:
+            # O gerador de expressões produz programas para a máquina básica de 16 bytes
+            estendido, largura_endereco = False, LARGURA_ENDERECO_PADRAO
+        else:
+            estendido = bool(pedido.get("estendido", False))
+            largura_endereco = int(pedido.get("largura_endereco", LARGURA_ENDERECO_PADRAO))
+        # Todo pedido tem um teto, mesmo com "max_passos": null
+        max_passos = limite_passos(pedido.get("max_passos"))
+        if max_passos is None or max_passos > LIMITE_PASSOS_SERVIDOR:
+            max_passos = LIMITE_PASSOS_SERVIDOR
+        nucleo, montador = _maquina(estendido, largura_endereco)
+        memoria = _memoria_do_pedido(pedido, montador)
+        if pedido.get("operacao") == OPERACAO_MONTAR:
+            return {"memoria": bytes(memoria).hex().upper(), "erro": None}
+
+        nucleo.reiniciar(memoria)
+        if len(memoria) <= TAMANHO_MAXIMO_CACHE:
+            saida, passos, motivo = _cache_do_processo.executar(nucleo, max_passos)
+        else:
+            saida, passos, motivo = nucleo.executar(max_passos)
+        return {"saida": saida, "passos": passos, "motivo_parada": motivo, "erro": None}
+    except ErroMontagem as e:
+        return {"erro": f"Linha {e.linha}: {e}"}
+    except KeyError as e:
+        return {"erro": f"Campo obrigatório ausente: {e.args[0]}."}
+    except (ValueError, TypeError, AttributeError, OverflowError) as e:
+        return {"erro": str(e)}
+
+
+def pode_demorar(pedido):
+    """Pedidos com saltos ou memória larga podem executar até o limite de passos; os demais param em poucos passos."""
+    return (pedido.get("operacao", OPERACAO_EXECUTAR) == OPERACAO_EXECUTAR
+            and (bool(pedido.get("estendido")) or pedido.get("largura_endereco", LARGURA_ENDERECO_PADRAO)
+                 != LARGURA_ENDERECO_PADRAO))
+
+
+def _ignorar_interrupcao():
+    # Ctrl+C chega a todo o grupo de processos; quem encerra o pool é o processo principal
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+
+
+def processar_pedidos(pedidos):
+    # Unidade enviada a um processo: um lote inteiro por viagem dilui o custo de serialização
+    return [processar_pedido(pedido) for pedido in pedidos]
+
+
+class ServidorSAP1:
+    """Atende conexões de linhas JSON, despachando os pedidos em lotes para o pool de processos.
+
+    Contrapressão: cada conexão tem no máximo `pedidos_por_conexao` pedidos sem
+    resposta escrita e a fila compartilhada guarda no máximo `pedidos_na_fila`;
+    quando um dos dois enche, o servidor para de ler a conexão até abrir vaga.
+    Com processos=1 os lotes rodam no próprio laço de eventos.
+    """
+
+    def __init__(self, processos=None, tamanho_lote=TAMANHO_LOTE, lotes_em_voo=None,
+                 pedidos_por_conexao=PEDIDOS_POR_CONEXAO, pedidos_na_fila=PEDIDOS_NA_FILA,
+                 tempo_limite=TEMPO_LIMITE_PADRAO):
+        self.processos = processos or os.cpu_count() or 1
+        self.tamanho_lote = tamanho_lote
+        self.lotes_em_voo = lotes_em_voo or 2 * self.processos
+        self.pedidos_por_conexao = pedidos_por_conexao
+        self.pedidos_na_fila = pedidos_na_fila
+        self.tempo_limite = tempo_limite
+        self.atendidos = 0
+        self.tempos_esgotados = 0
+        self.lotes = 0
+        self._pool = None
+        self._fila = None
+        self._vagas_lotes = None
+        self._despachante = None
+        self._servidores = []
+        self._conexoes = {}
+        self._isolados = collections.deque()
+
+    async def iniciar(self, host="127.0.0.1", porta=None, caminho_unix=None):
+        """Começa a aceitar conexões em um socket Unix (`caminho_unix`) ou TCP (`host`:`porta`)."""
+        if self._despachante is None:
+            if self.processos > 1:
+                self._pool = self._novo_pool()
+            self._fila = asyncio.Queue(self.pedidos_na_fila)
+            self._vagas_lotes = asyncio.Semaphore(self.lotes_em_voo)
+            self._despachante = asyncio.create_task(self._despachar())
+        if caminho_unix is not None:
+            servidor = await asyncio.start_unix_server(self._atender, caminho_unix, limit=TAMANHO_MAXIMO_LINHA,
+                                                     backlog=CONEXOES_EM_ESPERA)
+        else:
+            servidor = await asyncio.start_server(self._atender, host, porta, limit=TAMANHO_MAXIMO_LINHA,
+                                                  backlog=CONEXOES_EM_ESPERA)
+        self._servidores.append(servidor)
+        return servidor
+
+    def _novo_pool(self):
+        return concurrent.futures.ProcessPoolExecutor(max_workers=self.processos, initializer=_ignorar_interrupcao)
+
+    async def encerrar(self):
+        for servidor in self._servidores:
+            servidor.close()
+            await servidor.wait_closed()
+        self._servidores = []
+        # Derruba as conexões e espera cada uma terminar; os pedidos em andamento ainda são concluídos
+        for escritor in self._conexoes.values():
+            escritor.transport.abort()
+        if self._conexoes:
+            await asyncio.gather(*self._conexoes, return_exceptions=True)
+        if self._despachante is not None:
+            self._despachante.cancel()
+            try:
+                await self._despachante
+            except asyncio.CancelledError:
+                pass
+            self._despachante = None
+        if self._pool is not None:
+            self._pool.shutdown(cancel_futures=True)
+            self._pool = None
+
+    async def executar_pedido(self, pedido):
+        """Resposta de um pedido, passando pela fila e pelo pool como os pedidos das conexões."""
+        futuro = asyncio.get_running_loop().create_future()
+        await self._fila.put((pedido, futuro))
+        return await futuro
+
+    async def _despachar(self):
+        fila = self._fila
+        while True:
+            # A vaga é reservada antes de montar o lote: enquanto todos os processos estão
+            # ocupados, os pedidos se acumulam na fila e seguem juntos no próximo lote
+            await self._vagas_lotes.acquire()
+            if self._isolados:
+                lote = [self._isolados.popleft()]
+            else:
+                lote = [await fila.get()]
+                # Um pedido demorado segue sozinho: num lote ele atrasaria todos os outros
+                while not pode_demorar(lote[0][0]) and len(lote) < self.tamanho_lote and not fila.empty():
+                    item = fila.get_nowait()
+                    if pode_demorar(item[0]):
+                        self._isolados.append(item)
+                    else:
+                        lote.append(item)
+            lote = [(pedido, futuro) for pedido, futuro in lote if not futuro.done()]
+            if not lote:
+                self._vagas_lotes.release()
+                continue
+            self.lotes += 1
+            pedidos = [pedido for pedido, _ in lote]
+            if self._pool is None:
+                self._concluir_lote(lote, respostas=processar_pedidos(pedidos))
+                await asyncio.sleep(0)
+                continue
+            try:
+                tarefa = asyncio.get_running_loop().run_in_executor(self._pool, processar_pedidos, pedidos)
+            except RuntimeError as e:
+                self._concluir_lote(lote, erro=e)
+                continue
+            tarefa.add_done_callback(lambda tarefa, lote=lote: self._lote_executado(lote, tarefa))
+
+    def _lote_executado(self, lote, tarefa):
+        if tarefa.cancelled():
+            self._concluir_lote(lote, erro=RuntimeError("Servidor encerrado."))
+        elif tarefa.exception() is not None:
+            erro = tarefa.exception()
+            if isinstance(erro, concurrent.futures.process.BrokenProcessPool) and self._pool is not None:
+                # Um processo morreu: o pool fica inutilizável, então é recriado para os próximos lotes
+                self._pool.shutdown(wait=False)
+                self._pool = self._novo_pool()
+            self._concluir_lote(lote, erro=erro)
+        else:
+            self._concluir_lote(lote, respostas=tarefa.result())
+
+    def _concluir_lote(self, lote, respostas=None, erro=None):
+        self._vagas_lotes.release()
+        for indice, (_, futuro) in enumerate(lote):
+            if futuro.done():
+                continue
+            if respostas is None:
+                futuro.set_result({"erro": f"Falha no processo de simulação: {erro}"})
+            else:
+                futuro.set_result(respostas[indice])
+
+    async def _atender(self, leitor, escritor):
+        vagas = asyncio.Semaphore(self.pedidos_por_conexao)
+        respostas = asyncio.Queue()
+        redator = asyncio.create_task(self._escrever_respostas(escritor, respostas, vagas))
+        pendentes = set()
+        conexao = asyncio.current_task()
+        self._conexoes[conexao] = escritor
+        try:
+            while True:
+                await vagas.acquire()
+                try:
+                    linha = await leitor.readline()
+                except ValueError:
+                    respostas.put_nowait({"id": None, "erro": f"Linha maior que {TAMANHO_MAXIMO_LINHA} bytes."})
+                    break
+                if not linha:
+                    vagas.release()
+                    break
+                if not linha.strip():
+                    vagas.release()
+                    continue
+                tarefa = asyncio.create_task(self._responder(linha, respostas))
+                pendentes.add(tarefa)
+                tarefa.add_done_callback(pendentes.discard)
+        except ConnectionError:
+            pass
+        finally:
+            if pendentes:
+                await asyncio.gather(*pendentes, return_exceptions=True)
+            respostas.put_nowait(None)
+            await redator
+            del self._conexoes[conexao]
+
+    async def _responder(self, linha, respostas):
+        try:
+            pedido = json.loads(linha)
+            if not isinstance(pedido, dict):
+                raise ValueError("o pedido deve ser um objeto")
+        except ValueError as e:
+            respostas.put_nowait({"id": None, "erro": f"JSON inválido: {e}"})
+            return
+        # O pedido pode encurtar o tempo limite do servidor, mas não estendê-lo
+        tempo_limite = pedido.get("tempo_limite", self.tempo_limite)
+        if isinstance(tempo_limite, bool) or not isinstance(tempo_limite, (int, float)) or tempo_limite <= 0:
+            resposta = {"erro": "tempo_limite deve ser um número positivo de segundos."}
+        else:
+            tempo_limite = min(tempo_limite, self.tempo_limite)
+            try:
+                resposta = await asyncio.wait_for(self.executar_pedido(pedido), tempo_limite)
+            except asyncio.TimeoutError:
+                self.tempos_esgotados += 1
+                resposta = {"erro": f"Tempo limite de {tempo_limite} s esgotado."}
+        self.atendidos += 1
+        respostas.put_nowait(dict(id=pedido.get("id"), **resposta))
+
+    async def _escrever_respostas(self, escritor, respostas, vagas):
+        # Único escritor da conexão; a vaga do pedido só é devolvida depois que a resposta
+        # foi entregue ao socket, então um cliente que não lê as respostas deixa de ser lido
+        aberta = True
+        while True:
+            resposta = await respostas.get()
+            if resposta is None:
+                break
+            if aberta:
+                try:
+                    escritor.write(json.dumps(resposta, ensure_ascii=False).encode("utf-8") + b"\n")
+                    await escritor.drain()
+                except ConnectionError:
+                    aberta = False
+            vagas.release()
+        if aberta:
+            escritor.close()
+            try:
+                await escritor.wait_closed()
+            except ConnectionError:
+                pass
+
+    def estatisticas(self):
+        return {"atendidos": self.atendidos, "tempos_esgotados": self.tempos_esgotados, "lotes": self.lotes,
+                "na_fila": self._fila.qsize() if self._fila is not None else 0}
+
+
+async def servir(args):
+    servidor = ServidorSAP1(args.processos, args.lote, pedidos_por_conexao=args.pedidos_por_conexao,
+                            tempo_limite=args.tempo_limite)
+    if args.unix:
+        await servidor.iniciar(caminho_unix=args.unix)
+        print(f"Servidor SAP-1 em {args.unix} ({servidor.processos} processos).", file=sys.stderr)
+    else:
+        await servidor.iniciar(args.host, args.porta)
+        print(f"Servidor SAP-1 em {args.host}:{args.porta} ({servidor.processos} processos).", file=sys.stderr)
+    parar = asyncio.Event()
+    laco = asyncio.get_running_loop()
+    for sinal in (signal.SIGINT, signal.SIGTERM):
+        laco.add_signal_handler(sinal, parar.set)
+    try:
+        await parar.wait()
+    finally:
+        await servidor.encerrar()
+
+
+def principal(argumentos=None):
+    parser = argparse.ArgumentParser(description="Servidor de simulação SAP-1 com pedidos em linhas JSON.")
+    destino = parser.add_mutually_exclusive_group(required=True)
+    destino.add_argument("--unix", help="caminho do socket Unix")
+    destino.add_argument("--porta", type=int, help="porta TCP")
+    parser.add_argument("--host", default="127.0.0.1", help="endereço TCP (padrão: 127.0.0.1)")
+    parser.add_argument("-j", "--processos", type=int, default=None, help="número de processos (padrão: núcleos da CPU)")
+    parser.add_argument("--lote", type=int, default=TAMANHO_LOTE, help="máximo de pedidos enviados juntos a um processo")
+    parser.add_argument("--pedidos-por-conexao", type=int, default=PEDIDOS_POR_CONEXAO,
+                        help="pedidos sem resposta aceitos de cada conexão antes de parar de lê-la")
+    parser.add_argument("--tempo-limite", type=float, default=TEMPO_LIMITE_PADRAO,
+                        help="segundos até um pedido ser respondido com erro (o pedido pode trazer 'tempo_limite')")
+    args = parser.parse_args(argumentos)
+    asyncio.run(servir(args))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(principal())